@@ -4,16 +4,31 @@ API REST do BoraDeDesconto implementada com FastAPI.
 Esta API fornece endpoints para consultar ofertas coletadas em tempo quase-real 
 de diversos e-commerces, com suporte a filtros, paginação e estatísticas de cliques.
 """
-from fastapi import FastAPI, HTTPException, Query, Depends, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
 from pydantic import BaseModel, Field
+import hashlib
+import json
+import os
+import sys
+import zlib
 
-import models
+# Adiciona o diretório parent ao PYTHONPATH. Os módulos da API são sempre
+# importados pelo pacote "api", para haver uma única instância de cada um
+# (pool e caches) qualquer que seja a forma de iniciar a API.
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from api import models
+from api.cache import LRUCache, OFFERS_PAGE_CACHE_BYTES, OFFERS_PAGE_CACHE_SIZE
+from api.click_buffer import ClickBuffer
 
 # Definir modelos Pydantic para as respostas para melhor documentação
 class OfferResponse(BaseModel):
@@ -45,6 +60,7 @@ class PaginatedOfferResponse(BaseModel):
     """Modelo de resposta paginada para ofertas"""
     data: List[OfferResponse] = Field(..., description="Lista de ofertas")
     count: int = Field(..., description="Número total de ofertas na resposta")
+    next_cursor: Optional[str] = Field(None, description="Cursor para a próxima página (ausente na última página)")
     
     class Config:
         schema_extra = {
@@ -61,7 +77,36 @@ class PaginatedOfferResponse(BaseModel):
                         "ts": "2023-06-01T10:00:00Z"
                     }
                 ],
-                "count": 1
+                "count": 1,
+                "next_cursor": "WyIyMDIzLTA2LTAxVDEwOjAwOjAwWiIsMV0"
+            }
+        }
+
+class PricePointResponse(BaseModel):
+    """Modelo de resposta para um ponto do histórico de preços"""
+    ts: datetime = Field(..., description="Início do intervalo (ou momento da mudança de preço)")
+    price: float = Field(..., description="Menor preço no intervalo, em reais")
+    discount_pct: int = Field(..., description="Maior desconto no intervalo (0-100)")
+
+class PriceHistoryResponse(BaseModel):
+    """Modelo de resposta para o histórico de preços de uma oferta"""
+    offer_id: int = Field(..., description="ID da oferta")
+    days: int = Field(..., description="Período em dias do histórico")
+    current_price: float = Field(..., description="Preço atual da oferta")
+    lowest_price_30d: Optional[float] = Field(None, description="Menor preço dos últimos 30 dias")
+    points: List[PricePointResponse] = Field(..., description="Série de preços reduzida")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "offer_id": 1,
+                "days": 90,
+                "current_price": 1899.99,
+                "lowest_price_30d": 1799.0,
+                "points": [
+                    {"ts": "2023-05-20T10:00:00Z", "price": 2199.0, "discount_pct": 10},
+                    {"ts": "2023-06-01T10:00:00Z", "price": 1799.0, "discount_pct": 28}
+                ]
             }
         }
 
@@ -128,6 +173,23 @@ Os dados são atualizados periodicamente pelos scrapers automatizados que coleta
     }
 )
 
+# Tempo (s) que navegadores, CDN e proxies podem reaproveitar uma resposta de /offers
+OFFERS_MAX_AGE = int(os.getenv("BDD_OFFERS_MAX_AGE", "30"))
+
+# Tempo (s) em que uma resposta vencida ainda pode ser servida enquanto é revalidada
+OFFERS_STALE_WHILE_REVALIDATE = int(os.getenv("BDD_OFFERS_STALE_WHILE_REVALIDATE", "300"))
+
+# Páginas de /offers já serializadas, por filtros; valem para uma versão das ofertas
+offers_page_cache = LRUCache(
+    maxsize=OFFERS_PAGE_CACHE_SIZE, sizeof=len, maxbytes=OFFERS_PAGE_CACHE_BYTES
+)
+
+# Versão das ofertas (models.get_dataset_version) das páginas em cache
+offers_page_version = None
+
+# Buffer de cliques do /go, gravados em lote pelo ciclo de vida da API
+click_buffer = ClickBuffer(models.register_offer_clicks)
+
 # Configura CORS para permitir requisições do frontend
 app.add_middleware(
     CORSMiddleware,
@@ -138,6 +200,70 @@ app.add_middleware(
 )
 
 
+def _cache_headers(version: tuple) -> Dict[str, str]:
+    """
+    Monta ETag, Last-Modified e Cache-Control a partir da versão das ofertas
+    (contador de gravações e instante da última, ver models.get_dataset_version).
+    
+    O ETag muda a cada coleta gravada e também com a versão da API (formato
+    da resposta); o Last-Modified é o instante da última gravação.
+    """
+    counter, changed_at = version
+    digest = hashlib.blake2b(f"{app.version}:{counter}".encode(), digest_size=8).hexdigest()
+    headers = {
+        "ETag": f'W/"{digest}"',
+        "Cache-Control": (
+            f"public, max-age={OFFERS_MAX_AGE}, "
+            f"stale-while-revalidate={OFFERS_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+    
+    try:
+        last_modified = datetime.fromisoformat(changed_at).replace(tzinfo=timezone.utc)
+    except ValueError:
+        # Sem ofertas gravadas não há data de modificação
+        pass
+    else:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    
+    return headers
+
+
+def _not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Diz se a cópia do cliente ainda vale (If-None-Match ou If-Modified-Since).
+    
+    Como manda a RFC 9110, If-Modified-Since só é considerado quando a
+    requisição não traz If-None-Match.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparação fraca: W/"x" e "x" são a mesma versão
+        etag = headers["ETag"][2:]
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since.tzinfo is not None and parsedate_to_datetime(headers["Last-Modified"]) <= since
+    
+    return False
+
+
+def _use_offers_page_version(version: tuple):
+    """
+    Descarta todas as páginas em cache quando as ofertas mudam de versão.
+    """
+    global offers_page_version
+    if version != offers_page_version:
+        offers_page_cache.clear()
+        offers_page_version = version
+
+
 # Endpoint principal para listar ofertas
 @app.get(
     "/offers", 
@@ -146,14 +272,18 @@ app.add_middleware(
     summary="Lista ofertas com filtros",
     responses={
         200: {"description": "Lista de ofertas retornada com sucesso"},
+        304: {"description": "As ofertas não mudaram desde a cópia do cliente (ETag/Last-Modified)"},
+        400: {"description": "Cursor de paginação inválido"},
         500: {"description": "Erro interno do servidor"}
     }
 )
 async def list_offers(
+    request: Request,
     merchant: str = Query(None, description="Filtrar por loja (amazon, mercadolivre etc)"),
     min_discount: int = Query(0, ge=0, le=100, description="Desconto mínimo em porcentagem (0-100)"),
     limit: int = Query(20, ge=1, le=100, description="Limite de resultados (1-100)"),
-    offset: int = Query(0, ge=0, description="Deslocamento para paginação")
+    offset: int = Query(0, ge=0, description="Deslocamento para paginação"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (campo next_cursor da resposta anterior)")
 ):
     """
     Lista ofertas com suporte a filtros e paginação.
@@ -162,17 +292,178 @@ async def list_offers(
     - **min_discount**: Desconto mínimo em porcentagem (0-100)
     - **limit**: Limite de resultados por página (1-100)
     - **offset**: Deslocamento para paginação
+    - **cursor**: Cursor da próxima página, mais eficiente que `offset` em páginas profundas
+    
+    As respostas trazem `ETag` e `Last-Modified`, que só mudam quando uma
+    coleta grava ofertas novas ou alteradas; com `If-None-Match` ou
+    `If-Modified-Since` a API responde 304 sem consultar as ofertas. As
+    páginas também ficam em cache, já serializadas, até a próxima coleta.
     
     Exemplo de requisição: `/offers?merchant=amazon&min_discount=20`
     """
-    offers = await models.get_offers(
+    # A versão é lida antes das ofertas: se uma coleta terminar no meio, a
+    # resposta sai com a versão anterior e o próximo pedido a busca de novo
+    version = await models.get_dataset_version()
+    headers = _cache_headers(version)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    
+    _use_offers_page_version(version)
+    key = (merchant or None, min_discount, limit, offset, cursor or None)
+    body = offers_page_cache.get(key)
+    
+    if body is None:
+        # Uma troca de versão durante a consulta impede que a página vá para o cache
+        generation = offers_page_cache.generation
+        try:
+            offers = await models.get_offers(
+                merchant=merchant,
+                min_discount=min_discount,
+                limit=limit,
+                offset=offset,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Só há próxima página se esta veio completa
+        next_cursor = models.encode_offers_cursor(offers[-1]) if len(offers) == limit else None
+        
+        page = PaginatedOfferResponse(data=offers, count=len(offers), next_cursor=next_cursor)
+        body = page.model_dump_json().encode()
+        offers_page_cache.set(key, body, generation)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Endpoint de busca textual. Declarado antes de /offers/{offer_id} para que
+# "search" não seja interpretado como ID.
+@app.get(
+    "/offers/search",
+    response_model=PaginatedOfferResponse,
+    tags=["ofertas"],
+    summary="Busca ofertas pelo título",
+    responses={
+        200: {"description": "Ofertas encontradas, das mais relevantes para as menos"},
+        400: {"description": "Busca sem termos ou cursor de paginação inválido"},
+        500: {"description": "Erro interno do servidor"}
+    }
+)
+async def search_offers(
+    q: str = Query(..., min_length=1, max_length=200, description="Termos da busca"),
+    merchant: str = Query(None, description="Filtrar por loja (amazon, mercadolivre etc)"),
+    min_discount: int = Query(0, ge=0, le=100, description="Desconto mínimo em porcentagem (0-100)"),
+    limit: int = Query(20, ge=1, le=100, description="Limite de resultados (1-100)"),
+    offset: int = Query(0, ge=0, description="Deslocamento para paginação"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (campo next_cursor da resposta anterior)")
+):
+    """
+    Busca ofertas pelo título, ordenadas por relevância (BM25).
+
+    A busca ignora acentos e maiúsculas ("acucar" encontra "Açúcar") e cada
+    termo casa também pelo prefixo ("fone" encontra "fones").
+
+    - **q**: Termos da busca (todos precisam aparecer no título)
+    - **merchant**, **min_discount**, **limit**, **offset**, **cursor**: como em `/offers`
+
+    Exemplo de requisição: `/offers/search?q=fone bluetooth&min_discount=20`
+    """
+    try:
+        offers = await models.search_offers(
+            q,
+            merchant=merchant,
+            min_discount=min_discount,
+            limit=limit,
+            offset=offset,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    next_cursor = models.encode_search_cursor(offers[-1]) if len(offers) == limit else None
+
+    return {"data": offers, "count": len(offers), "next_cursor": next_cursor}
+
+
+async def _export_lines(batches, compress: bool):
+    """
+    Converte os lotes de ``models.export_offers`` em linhas NDJSON, um bloco
+    por lote, comprimidas em gzip se ``compress``.
+    """
+    # wbits=31: formato gzip (cabeçalho e CRC), não zlib puro
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    async for batch in batches:
+        chunk = "".join(
+            json.dumps(offer, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for offer in batch
+        ).encode()
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    
+    if compressor:
+        yield compressor.flush()
+
+
+# Exportação completa do catálogo. Também declarada antes de /offers/{offer_id}.
+@app.get(
+    "/offers/export",
+    tags=["ofertas"],
+    summary="Exporta todas as ofertas em NDJSON",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Uma oferta (JSON) por linha, da gravação mais antiga para a mais recente",
+            "content": {"application/x-ndjson": {}},
+        },
+        500: {"description": "Erro interno do servidor"}
+    }
+)
+async def export_offers(
+    request: Request,
+    merchant: str = Query(None, description="Filtrar por loja (amazon, mercadolivre etc)"),
+    min_discount: int = Query(0, ge=0, le=100, description="Desconto mínimo em porcentagem (0-100)"),
+    since: Optional[datetime] = Query(None, description="Só ofertas gravadas depois deste instante (last_changed da última linha, ISO 8601, UTC)")
+):
+    """
+    Exporta todas as ofertas do filtro em NDJSON (uma oferta por linha).
+    
+    As ofertas são lidas do banco em lotes e enviadas à medida que chegam, sem
+    montar a resposta inteira em memória. Com `Accept-Encoding: gzip` a
+    resposta vem comprimida.
+    
+    Cada linha traz também `last_changed`, o instante (UTC) em que a oferta
+    foi gravada. Para sincronizações incrementais, use o `last_changed` da
+    última linha recebida como `since` na próxima exportação; o `ts` é o
+    instante da extração no scraper e não segue a ordem das gravações.
+    
+    - **merchant**, **min_discount**: como em `/offers`
+    - **since**: Só ofertas criadas ou alteradas (gravadas) depois deste instante
+    
+    Exemplo de requisição: `/offers/export?merchant=amazon&since=2023-06-01T10:00:00`
+    """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    batches = models.export_offers(
         merchant=merchant,
         min_discount=min_discount,
-        limit=limit,
-        offset=offset
+        # Mesmo formato do last_changed (milissegundos), para comparar como texto
+        since=since.isoformat(timespec="milliseconds") if since else None
     )
     
-    return {"data": offers, "count": len(offers)}
+    headers = {"Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        _export_lines(batches, compress),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
 
 
 # Endpoint para detalhes de uma oferta específica
@@ -202,6 +493,49 @@ async def get_offer(offer_id: int):
     return offer
 
 
+# Endpoint para o histórico de preços de uma oferta
+@app.get(
+    "/offers/{offer_id}/history",
+    response_model=PriceHistoryResponse,
+    tags=["ofertas"],
+    summary="Obter o histórico de preços de uma oferta",
+    responses={
+        200: {"description": "Histórico de preços retornado com sucesso"},
+        404: {"description": "Oferta não encontrada"},
+        500: {"description": "Erro interno do servidor"}
+    }
+)
+async def get_offer_history(
+    offer_id: int,
+    days: int = Query(90, ge=1, le=365, description="Número de dias do histórico (1-365)"),
+    points: int = Query(120, ge=10, le=1000, description="Número máximo de pontos da série (10-1000)")
+):
+    """
+    Retorna o histórico de preços de uma oferta para gráficos.
+    
+    A série é reduzida a no máximo `points` pontos, cada um com o menor preço
+    do seu intervalo, e vem acompanhada do menor preço dos últimos 30 dias.
+    
+    - **offer_id**: ID único da oferta no sistema
+    - **days**: Período do histórico em dias (1-365)
+    - **points**: Número máximo de pontos da série (10-1000)
+    
+    Exemplo de requisição: `/offers/42/history?days=30`
+    """
+    offer = await models.get_offer_by_id(offer_id)
+    if not offer:
+        raise HTTPException(status_code=404, detail="Oferta não encontrada")
+    
+    history = await models.get_price_history(offer_id, days=days, points=points)
+    
+    return {
+        "offer_id": offer_id,
+        "days": days,
+        "current_price": offer["price"],
+        **history
+    }
+
+
 # Endpoint para redirecionamento com registro de clique
 @app.get(
     "/go/{offer_id}",
@@ -232,11 +566,12 @@ async def redirect_offer(offer_id: int, request: Request):
     user_agent = request.headers.get("user-agent", "")
     referer = request.headers.get("referer", "")
     
-    await models.register_offer_click(
+    # O clique é gravado em lote pelo buffer, sem atrasar o redirecionamento
+    await click_buffer.add(models.OfferClick(
         offer_id=offer_id,
         user_agent=user_agent,
         referer=referer
-    )
+    ))
     
     # Obtém a URL para redirecionamento
     redirect_url = offer["url"]
@@ -274,6 +609,9 @@ async def get_click_stats(
     
     Exemplo de requisição: `/stats/clicks?days=7` ou `/stats/clicks?offer_id=42&days=30`
     """
+    # Grava os cliques pendentes para que as estatísticas fiquem atualizadas
+    await click_buffer.flush()
+    
     stats = await models.get_offer_clicks_stats(
         offer_id=offer_id,
         days=days
@@ -301,7 +639,17 @@ async def health_check():
     
     Exemplo de requisição: `/health`
     """
-    return {"status": "ok", "version": app.version}
+    pool = await models.get_pool()
+    database = await pool.health_check()
+    
+    return {
+        "status": "ok",
+        "version": app.version,
+        "database": database,
+        "pending_clicks": click_buffer.pending,
+        "offer_cache": models.offer_cache.stats(),
+        "offers_page_cache": offers_page_cache.stats()
+    }
 
 
 # Inicializa o banco de dados na startup
@@ -310,7 +658,19 @@ async def startup_db_client():
     """
     Garante que o banco está inicializado na startup da API.
     """
+    await models.open_pool()
     await models.init_db()
+    click_buffer.start()
+
+
+# Grava os cliques pendentes e fecha o pool de conexões no shutdown
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    """
+    Grava os cliques pendentes e fecha as conexões do pool ao encerrar a API.
+    """
+    await click_buffer.stop()
+    await models.close_pool()
 
 
 # Documentação personalizada
@@ -348,4 +708,4 @@ app.openapi = custom_openapi
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True) 
\ No newline at end of file
+    uvicorn.run("api.app:app", host="127.0.0.1", port=8000, reload=True, app_dir=str(parent_dir)) 
\ No newline at end of file
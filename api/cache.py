@@ -0,0 +1,154 @@
+"""
+Cache em memória com política LRU e expiração (TTL) para a API do BoraDeDesconto.
+"""
+import os
+import time
+from collections import OrderedDict
+
+
+# Número máximo de ofertas mantidas no cache de /offers/{id} e /go/{id}
+OFFER_CACHE_SIZE = int(os.getenv("BDD_OFFER_CACHE_SIZE", "2048"))
+
+# Tempo (s) que uma oferta pode ficar no cache sem ser relida do banco. A
+# invalidação dos upserts só vale dentro do processo; o scraper grava de outro
+# processo, então este é o atraso máximo até a API ver as suas mudanças.
+OFFER_CACHE_TTL = float(os.getenv("BDD_OFFER_CACHE_TTL", "30"))
+
+# Tempo (s) que a versão do conjunto de ofertas (ETag de /offers) é usada sem
+# consultar o banco; pelo mesmo motivo, é o atraso máximo até a API perceber
+# uma coleta gravada por outro processo.
+DATASET_VERSION_TTL = float(os.getenv("BDD_DATASET_VERSION_TTL", "5"))
+
+# Número máximo de páginas de /offers guardadas já serializadas
+OFFERS_PAGE_CACHE_SIZE = int(os.getenv("BDD_OFFERS_PAGE_CACHE_SIZE", "256"))
+
+# Memória máxima (bytes) ocupada pelas páginas de /offers em cache
+OFFERS_PAGE_CACHE_BYTES = int(os.getenv("BDD_OFFERS_PAGE_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+
+class LRUCache:
+    """
+    Cache limitado por número de entradas, com expiração por tempo.
+
+    Ao atingir ``maxsize`` a entrada usada há mais tempo é descartada. Entradas
+    mais antigas que ``ttl`` segundos são tratadas como ausentes. Os contadores
+    de acertos e falhas ajudam a dimensionar o cache.
+
+    ``generation`` muda a cada invalidação: quem lê o valor do banco guarda a
+    geração antes da leitura e a passa para ``set``, que ignora o valor se
+    houve uma invalidação no meio (ele pode ser anterior à escrita).
+
+    Com ``sizeof``, o cache também soma o tamanho dos valores (``nbytes``) e,
+    se ``maxbytes`` for informado, descarta entradas até caber nesse limite.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None, sizeof=None, maxbytes: int = None):
+        """
+        Args:
+            maxsize: Número máximo de entradas
+            ttl: Validade de cada entrada em segundos (None para não expirar)
+            sizeof: Função que retorna o tamanho (bytes) de um valor
+            maxbytes: Soma máxima dos tamanhos (exige ``sizeof``)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize precisa ser pelo menos 1")
+        if maxbytes is not None and sizeof is None:
+            raise ValueError("maxbytes exige sizeof")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Retorna o valor da chave, ou ``default`` se ausente ou expirado.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self._discard(key)
+
+        self.misses += 1
+        return default
+
+    def set(self, key, value, generation: int = None) -> bool:
+        """
+        Armazena o valor, descartando a entrada menos usada se necessário.
+
+        Args:
+            generation: ``generation`` lida antes de buscar o valor; se o
+                cache foi invalidado desde então, o valor não é guardado
+
+        Returns:
+            bool: Se o valor foi guardado
+        """
+        if generation is not None and generation != self.generation:
+            return False
+
+        self._discard(key)
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return False
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self.nbytes += size
+
+        while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self.nbytes > self.maxbytes):
+            self._discard(next(iter(self._data)))
+        return True
+
+    def _discard(self, key):
+        """
+        Remove a entrada (se existir) e desconta o seu tamanho.
+        """
+        entry = self._data.pop(key, None)
+        if entry is not None and self.sizeof:
+            self.nbytes -= self.sizeof(entry[0])
+
+    def invalidate(self, key):
+        """
+        Remove a chave do cache, se existir.
+        """
+        self.generation += 1
+        self._discard(key)
+
+    def clear(self):
+        """
+        Remove todas as entradas (os contadores são mantidos).
+        """
+        self.generation += 1
+        self._data.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Tamanho, capacidade, acertos, falhas e taxa de acerto (e,
+                com ``sizeof``, a memória ocupada)
+        """
+        total = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+        if self.sizeof:
+            stats["bytes"] = self.nbytes
+            stats["maxbytes"] = self.maxbytes
+        return stats
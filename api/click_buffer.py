@@ -0,0 +1,161 @@
+"""
+Buffer de cliques em memória para o endpoint de redirecionamento /go.
+
+Os cliques são enfileirados em uma asyncio.Queue e gravados em lote, em uma
+única transação, quando o buffer atinge um tamanho máximo ou quando o
+intervalo de flush expira. Assim o redirecionamento não espera pelo commit.
+"""
+import asyncio
+import os
+
+
+# Número de cliques que dispara um flush imediato
+CLICK_FLUSH_SIZE = int(os.getenv("BDD_CLICK_FLUSH_SIZE", "100"))
+
+# Intervalo máximo (s) entre flushes: é a janela máxima de perda em caso de queda
+CLICK_FLUSH_INTERVAL = float(os.getenv("BDD_CLICK_FLUSH_INTERVAL", "1.0"))
+
+# Limite de cliques pendentes; acima disso o clique é gravado antes de responder
+CLICK_MAX_PENDING = int(os.getenv("BDD_CLICK_MAX_PENDING", "10000"))
+
+
+class ClickBuffer:
+    """
+    Acumula cliques e os grava em lote por tamanho ou por tempo.
+
+    A função de gravação recebe a lista de cliques pendentes e deve persisti-los
+    em uma única transação (ex: ``models.register_offer_clicks``).
+    """
+
+    def __init__(self, write_clicks, flush_size: int = CLICK_FLUSH_SIZE,
+                 flush_interval: float = CLICK_FLUSH_INTERVAL,
+                 max_pending: int = CLICK_MAX_PENDING):
+        """
+        Args:
+            write_clicks: Corrotina que grava uma lista de cliques
+            flush_size: Número de cliques que dispara um flush
+            flush_interval: Janela máxima (s) de cliques não gravados
+            max_pending: Limite de cliques na fila
+        """
+        if flush_size < 1:
+            raise ValueError("flush_size precisa ser pelo menos 1")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval precisa ser positivo")
+        self.write_clicks = write_clicks
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, flush_size)
+        self._queue = None
+        self._wakeup = None
+        self._flush_lock = None
+        self._task = None
+        self._stopping = False
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        """Indica se a tarefa de flush em background está ativa."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        """Número de cliques aguardando gravação."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """
+        Inicia a tarefa de flush periódico no event loop atual.
+        """
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Para a tarefa de flush e grava os cliques pendentes.
+
+        A tarefa não é cancelada: um flush em andamento termina (ou devolve os
+        cliques à fila) antes de o laço sair.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._queue is not None:
+            await self.flush()
+
+    async def add(self, click):
+        """
+        Enfileira um clique para gravação em lote.
+
+        Se o buffer não estiver rodando, o clique é gravado imediatamente. Com
+        a fila cheia os pendentes são gravados antes; se essa gravação falhar,
+        o clique é descartado (e contado em ``dropped``) para o
+        redirecionamento não falhar.
+        """
+        if not self.running:
+            await self.write_clicks([click])
+            return
+
+        if self._queue.qsize() >= self.max_pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                self.dropped += 1
+                print(f"Erro ao gravar cliques em lote, clique descartado: {str(e)}")
+                return
+
+        self._queue.put_nowait(click)
+        if self._queue.qsize() >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Grava todos os cliques pendentes em uma única transação.
+
+        Returns:
+            int: Número de cliques gravados
+        """
+        if self._queue is None:
+            return 0
+
+        async with self._flush_lock:
+            clicks = []
+            while not self._queue.empty():
+                clicks.append(self._queue.get_nowait())
+
+            if not clicks:
+                return 0
+
+            try:
+                await self.write_clicks(clicks)
+            except BaseException:
+                # Devolve os cliques para a fila para tentar no próximo flush
+                # (inclusive se a tarefa for cancelada no meio da gravação)
+                for click in clicks:
+                    self._queue.put_nowait(click)
+                raise
+
+            return len(clicks)
+
+    async def _run(self):
+        """
+        Laço que grava os cliques a cada intervalo ou quando o lote enche,
+        até ``stop()`` ser chamado.
+        """
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Erro ao gravar cliques em lote: {str(e)}")
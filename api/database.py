@@ -0,0 +1,208 @@
+"""
+Pool de conexões SQLite (aiosqlite) compartilhado pela API do BoraDeDesconto.
+
+Mantém N conexões de leitura e uma única conexão de escrita abertas durante
+todo o ciclo de vida da aplicação, evitando abrir uma thread e reabrir o
+arquivo do banco a cada requisição.
+"""
+import asyncio
+import itertools
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+# Número padrão de conexões de leitura (pode ser ajustado por variável de ambiente)
+DB_POOL_SIZE = int(os.getenv("BDD_DB_POOL_SIZE", "4"))
+
+# Tempo máximo (ms) que uma conexão espera por um lock do SQLite
+DB_BUSY_TIMEOUT_MS = int(os.getenv("BDD_DB_BUSY_TIMEOUT_MS", "5000"))
+
+# PRAGMAs aplicados uma única vez em cada conexão aberta
+CONNECTION_PRAGMAS = [
+    f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS};",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-8000;",
+]
+
+MEMORY_DB = ":memory:"
+
+
+class DatabasePool:
+    """
+    Pool com N conexões de leitura e uma conexão dedicada de escrita.
+
+    O SQLite em modo WAL permite leitores concorrentes com um único escritor,
+    então as escritas são serializadas por um lock na conexão de escrita e as
+    leituras são distribuídas em round-robin entre as conexões de leitura.
+    Para bancos ``:memory:`` todas as operações usam a conexão de escrita, já
+    que cada conexão em memória teria o seu próprio banco.
+    """
+
+    def __init__(self, db_path, size: int = DB_POOL_SIZE):
+        """
+        Args:
+            db_path: Caminho do arquivo do banco (ou ``:memory:``)
+            size: Número de conexões de leitura
+        """
+        if size < 1:
+            raise ValueError("O pool precisa de pelo menos uma conexão de leitura")
+        self.db_path = str(db_path)
+        self.size = size if self.db_path != MEMORY_DB else 0
+        self._readers = []
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._next_reader = itertools.count()
+        self.loop = None
+        self.closed = True
+
+    async def _connect(self, read_only: bool = False):
+        """
+        Abre uma conexão e aplica os PRAGMAs configurados.
+        """
+        db = await aiosqlite.connect(self.db_path)
+        db.row_factory = sqlite3.Row
+        pragmas = CONNECTION_PRAGMAS + (["PRAGMA query_only=ON;"] if read_only else [])
+        try:
+            for pragma in pragmas:
+                # Fecha o cursor para não manter o statement (e o lock) aberto
+                cursor = await db.execute(pragma)
+                await cursor.close()
+        except Exception:
+            await db.close()
+            raise
+        return db
+
+    async def open(self):
+        """
+        Abre a conexão de escrita (ativando o WAL) e as conexões de leitura.
+        """
+        if not self.closed:
+            return
+
+        if self.db_path != MEMORY_DB:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+
+        self._writer = await self._connect()
+        try:
+            # O modo WAL é persistente no arquivo, basta ativá-lo pelo escritor
+            cursor = await self._writer.execute("PRAGMA journal_mode=WAL;")
+            await cursor.close()
+
+            for _ in range(self.size):
+                self._readers.append(await self._connect(read_only=True))
+        except Exception:
+            # Não deixa threads de conexões abertas em caso de falha
+            for db in [self._writer, *self._readers]:
+                await db.close()
+            self._writer = None
+            self._readers = []
+            raise
+
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+
+    async def close(self):
+        """
+        Fecha todas as conexões do pool.
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        async with self._write_lock:
+            for db in [self._writer, *self._readers]:
+                try:
+                    await db.close()
+                except Exception:
+                    pass
+        self._writer = None
+        self._readers = []
+        self.loop = None
+
+    def stop(self):
+        """
+        Encerra as threads das conexões sem esperar por elas.
+
+        Para quando não há event loop disponível para ``close()`` (ex: ao
+        final de testes síncronos); as threads fecham as conexões sozinhas.
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        for db in [self._writer, *self._readers]:
+            db.stop()
+        self._writer = None
+        self._readers = []
+        self.loop = None
+
+    @asynccontextmanager
+    async def reader(self):
+        """
+        Fornece uma conexão de leitura do pool.
+        """
+        if self.closed:
+            raise RuntimeError("Pool de conexões fechado")
+        if not self._readers:
+            yield self._writer
+            return
+        yield self._readers[next(self._next_reader) % len(self._readers)]
+
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Fornece a conexão de escrita com acesso exclusivo.
+
+        Faz commit ao sair do bloco e rollback se ocorrer uma exceção.
+        """
+        if self.closed:
+            raise RuntimeError("Pool de conexões fechado")
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    @staticmethod
+    async def _ping(db):
+        """
+        Executa ``SELECT 1`` na conexão informada.
+        """
+        cursor = await db.execute("SELECT 1")
+        await cursor.fetchone()
+        await cursor.close()
+
+    async def health_check(self):
+        """
+        Verifica cada conexão com ``SELECT 1`` e reabre as que falharem.
+
+        Returns:
+            dict: Estado do pool (conexões saudáveis e reabertas)
+        """
+        if self.closed:
+            return {"status": "closed", "readers": 0, "reopened": 0}
+
+        reopened = 0
+
+        async with self._write_lock:
+            try:
+                await self._ping(self._writer)
+            except Exception:
+                self._writer = await self._connect()
+                reopened += 1
+
+        for i, db in enumerate(self._readers):
+            try:
+                await self._ping(db)
+            except Exception:
+                self._readers[i] = await self._connect(read_only=True)
+                reopened += 1
+
+        return {"status": "ok", "readers": len(self._readers), "reopened": reopened}
@@ -1,7 +1,14 @@
 """Script para inserir dados de amostra no banco de dados."""
 import asyncio
 import datetime
-from models import init_db, Offer, upsert_offer
+import sys
+from pathlib import Path
+
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from api.models import init_db, close_pool, Offer, upsert_offers
 
 # Dados de amostra
 SAMPLE_OFFERS = [
@@ -68,13 +75,17 @@ async def insert_sample_data():
     
     print("Inserindo dados de amostra no banco...")
     
-    # Insere cada oferta
-    for offer_data in SAMPLE_OFFERS:
-        offer = Offer(**offer_data)
-        await upsert_offer(offer)
+    # Insere todas as ofertas em uma única transação
+    offers = [Offer(**offer_data) for offer_data in SAMPLE_OFFERS]
+    await upsert_offers(offers)
+    
+    for offer in offers:
         print(f"Oferta inserida: {offer.title}")
     
     print("Dados de amostra inseridos com sucesso!")
+    
+    # Fecha as conexões do pool para o processo poder encerrar
+    await close_pool()
 
 if __name__ == "__main__":
     asyncio.run(insert_sample_data()) 
\ No newline at end of file
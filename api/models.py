@@ -1,14 +1,27 @@
 """
 Modelos de dados e inicialização do banco SQLite para o BoraDeDesconto.
 """
+import asyncio
+import base64
+import binascii
 import datetime
+import hashlib
+import json
 import os
-import sqlite3
+import re
+import sys
+from collections import Counter
 from pathlib import Path
 
-import aiosqlite
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
 from pydantic import BaseModel, Field
 
+from api.cache import LRUCache, DATASET_VERSION_TTL, OFFER_CACHE_SIZE, OFFER_CACHE_TTL
+from api.database import DatabasePool, DB_POOL_SIZE
+
 
 class Offer(BaseModel):
     """Modelo para representar uma oferta."""
@@ -37,19 +50,257 @@ async def get_db_path() -> Path:
     return db_path
 
 
+# Pool de conexões compartilhado, aberto no startup da API (ou sob demanda)
+_pool = None
+
+# Cache das linhas de ofertas por ID, invalidado pelos upserts
+offer_cache = LRUCache(maxsize=OFFER_CACHE_SIZE, ttl=OFFER_CACHE_TTL)
+
+# Versão do conjunto de ofertas (ver get_dataset_version), relida a cada
+# DATASET_VERSION_TTL segundos ou após uma escrita deste processo
+dataset_version_cache = LRUCache(maxsize=1, ttl=DATASET_VERSION_TTL)
+
+
+async def get_pool() -> DatabasePool:
+    """
+    Retorna o pool de conexões, abrindo-o se necessário.
+    
+    O pool é recriado se o caminho do banco mudar (ex: banco de testes) ou se
+    for usado a partir de outro event loop.
+    """
+    global _pool
+    db_path = str(await get_db_path())
+    
+    if (_pool is None or _pool.closed or _pool.db_path != db_path
+            or _pool.loop is not asyncio.get_running_loop()):
+        if _pool is not None:
+            await _pool.close()
+        # As ofertas em cache podem ser de outro banco
+        offer_cache.clear()
+        dataset_version_cache.clear()
+        _pool = DatabasePool(db_path)
+        await _pool.open()
+    
+    return _pool
+
+
+async def open_pool(size: int = DB_POOL_SIZE) -> DatabasePool:
+    """
+    Abre o pool de conexões com o número de leitores informado.
+    """
+    global _pool
+    await close_pool()
+    offer_cache.clear()
+    dataset_version_cache.clear()
+    _pool = DatabasePool(await get_db_path(), size=size)
+    await _pool.open()
+    return _pool
+
+
+async def close_pool():
+    """
+    Fecha o pool de conexões (usado no shutdown da API).
+    """
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def stop_pool():
+    """
+    Encerra o pool sem event loop (ver ``DatabasePool.stop``).
+    """
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
+
+
+# Formato do bucket horário do rollup de cliques (prefixo do ts em ISO 8601)
+CLICK_BUCKET_FORMAT = "%Y-%m-%dT%H"
+
+# Recalcula o rollup de cliques a partir da tabela offer_clicks
+BACKFILL_CLICK_ROLLUP_QUERY = """
+    INSERT OR REPLACE INTO offer_click_rollup (bucket, offer_id, click_count)
+    SELECT substr(ts, 1, 13), offer_id, COUNT(*)
+    FROM offer_clicks
+    GROUP BY substr(ts, 1, 13), offer_id
+"""
+
+
+# Migrações de esquema, na ordem; o índice + 1 é a versão resultante
+SCHEMA_MIGRATIONS = [
+    # 1: índices compostos para as consultas de /offers e /stats/clicks.
+    # O id entra explicitamente para que ORDER BY ts DESC, id DESC venha
+    # pronto do índice, e o discount_pct no final permite filtrar sem ler a linha.
+    [
+        "DROP INDEX IF EXISTS idx_discount;",
+        "DROP INDEX IF EXISTS idx_timestamp;",
+        "DROP INDEX IF EXISTS idx_offer_clicks;",
+        "CREATE INDEX IF NOT EXISTS idx_offers_merchant_ts ON offers(merchant, ts, id, discount_pct);",
+        "CREATE INDEX IF NOT EXISTS idx_offers_ts ON offers(ts, id, discount_pct);",
+        "CREATE INDEX IF NOT EXISTS idx_offer_clicks_offer_ts ON offer_clicks(offer_id, ts);",
+        "CREATE INDEX IF NOT EXISTS idx_offer_clicks_ts ON offer_clicks(ts, offer_id);",
+    ],
+    # 2: contagem de cliques por hora, mantida a cada gravação de cliques
+    [
+        """
+        CREATE TABLE IF NOT EXISTS offer_click_rollup (
+            bucket TEXT NOT NULL,
+            offer_id INTEGER NOT NULL,
+            click_count INTEGER NOT NULL,
+            PRIMARY KEY (bucket, offer_id)
+        ) WITHOUT ROWID;
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_offer_click_rollup_offer ON offer_click_rollup(offer_id, bucket);",
+        BACKFILL_CLICK_ROLLUP_QUERY,
+    ],
+    # 3: impressão digital do conteúdo e última vez em que a oferta foi vista.
+    # Ofertas antigas ficam sem hash e são regravadas uma vez na próxima coleta.
+    [
+        "ALTER TABLE offers ADD COLUMN content_hash TEXT;",
+        "ALTER TABLE offers ADD COLUMN last_seen DATETIME;",
+        "UPDATE offers SET last_seen = ts;",
+    ],
+    # 4: histórico de preços, só com as mudanças. A chave primária
+    # (offer_id, ts) é o próprio índice das consultas de histórico.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS offer_prices (
+            offer_id INTEGER NOT NULL,
+            ts DATETIME NOT NULL,
+            price REAL NOT NULL,
+            discount_pct INTEGER NOT NULL,
+            PRIMARY KEY (offer_id, ts)
+        ) WITHOUT ROWID;
+        """,
+        """
+        INSERT OR IGNORE INTO offer_prices (offer_id, ts, price, discount_pct)
+        SELECT id, ts, price, discount_pct FROM offers;
+        """,
+    ],
+    # 5: busca textual nos títulos. Índice FTS5 de conteúdo externo (o texto
+    # fica só em offers), sem acentos/maiúsculas e com índices de prefixo;
+    # os triggers o mantêm em dia com qualquer escrita em offers.
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS offers_fts USING fts5(
+            title,
+            content='offers',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS offers_fts_insert AFTER INSERT ON offers BEGIN
+            INSERT INTO offers_fts (rowid, title) VALUES (new.id, new.title);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS offers_fts_delete AFTER DELETE ON offers BEGIN
+            INSERT INTO offers_fts (offers_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS offers_fts_update AFTER UPDATE OF title ON offers
+        WHEN old.title IS NOT new.title BEGIN
+            INSERT INTO offers_fts (offers_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO offers_fts (rowid, title) VALUES (new.id, new.title);
+        END;
+        """,
+        "INSERT INTO offers_fts (offers_fts) VALUES ('rebuild');",
+    ],
+    # 6: fila persistente de URLs a coletar (crawl frontier) do scraper
+    [
+        """
+        CREATE TABLE IF NOT EXISTS crawl_frontier (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            merchant TEXT NOT NULL,
+            url TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            next_due DATETIME NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            leased_until DATETIME,
+            lease_owner TEXT,
+            last_error TEXT,
+            last_crawled DATETIME,
+            UNIQUE(merchant, url)
+        );
+        """,
+        # Itens vencidos em ordem de vencimento (consulta do lease)
+        "CREATE INDEX IF NOT EXISTS idx_frontier_status_due ON crawl_frontier (status, next_due);",
+    ],
+    # 7: agendamento adaptativo da fila. Cada URL tem o seu intervalo de
+    # coleta e a frequência com que as coletas encontram mudanças; o
+    # orçamento de coletas por hora fica em crawl_budget.
+    [
+        "ALTER TABLE crawl_frontier ADD COLUMN refresh_interval INTEGER;",
+        "ALTER TABLE crawl_frontier ADD COLUMN change_rate REAL NOT NULL DEFAULT 0.5;",
+        """
+        CREATE TABLE IF NOT EXISTS crawl_budget (
+            hour TEXT PRIMARY KEY,
+            pages INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """,
+    ],
+    # 8: registro das execuções agendadas do scraper. Uma execução em andamento
+    # (status 'running') também impede outra do mesmo merchant.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS scrape_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            merchant TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            owner TEXT,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME,
+            duration_s REAL,
+            offers INTEGER,
+            error TEXT
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_scrape_runs_merchant ON scrape_runs (merchant, status, started_at);",
+    ],
+    # 9: versão do conjunto de ofertas (ETag de /offers). Um contador em
+    # linha única, incrementado na mesma transação que grava as ofertas, com
+    # o instante do commit pelo relógio do banco; o ts das ofertas é o da
+    # extração e não segue a ordem das gravações.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS dataset_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            changed_at DATETIME
+        );
+        """,
+        "INSERT OR IGNORE INTO dataset_version (id, version, changed_at) SELECT 1, 0, MAX(ts) FROM offers;",
+    ],
+    # 10: instante da gravação de cada oferta (changed_at de dataset_version),
+    # base do ``since`` da exportação incremental. As ofertas existentes ficam
+    # com a versão atual e saem uma vez na próxima sincronização.
+    [
+        "ALTER TABLE offers ADD COLUMN last_changed DATETIME;",
+        "UPDATE offers SET last_changed = (SELECT changed_at FROM dataset_version WHERE id = 1);",
+        "CREATE INDEX IF NOT EXISTS idx_offers_merchant_last_changed ON offers(merchant, last_changed, id, discount_pct);",
+        "CREATE INDEX IF NOT EXISTS idx_offers_last_changed ON offers(last_changed, id, discount_pct);",
+    ],
+]
+
+
 async def init_db():
     """
     Inicializa o banco de dados SQLite em modo WAL.
     """
     db_path = await get_db_path()
     
-    # Verifica se o diretório existe
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    # O pool cria o diretório do banco e ativa o modo WAL na conexão de escrita
+    pool = await get_pool()
     
-    async with aiosqlite.connect(db_path) as db:
-        # Ativa o modo WAL para melhor concorrência
-        await db.execute("PRAGMA journal_mode=WAL;")
-        
+    async with pool.writer() as db:
         # Cria a tabela de ofertas se não existir
         await db.execute("""
         CREATE TABLE IF NOT EXISTS offers (
@@ -77,24 +328,146 @@ async def init_db():
         );
         """)
         
-        # Cria índices para consultas comuns
-        await db.execute("""
-        CREATE INDEX IF NOT EXISTS idx_discount ON offers(discount_pct DESC);
-        """)
-        
-        await db.execute("""
-        CREATE INDEX IF NOT EXISTS idx_timestamp ON offers(ts DESC);
-        """)
-        
-        await db.execute("""
-        CREATE INDEX IF NOT EXISTS idx_offer_clicks ON offer_clicks(offer_id);
-        """)
-        
-        await db.commit()
+        # Aplica as migrações de esquema pendentes (índices etc.)
+        await migrate_db(db)
     
     print(f"Banco inicializado em {db_path}")
 
 
+async def migrate_db(db):
+    """
+    Aplica as migrações de SCHEMA_MIGRATIONS ainda não executadas no banco.
+    
+    A versão do esquema fica em ``PRAGMA user_version``.
+    
+    Args:
+        db: Conexão de escrita (a transação é controlada por quem chama)
+    
+    Returns:
+        int: Versão do esquema após as migrações
+    """
+    cursor = await db.execute("PRAGMA user_version;")
+    version = (await cursor.fetchone())[0]
+    await cursor.close()
+    
+    for target, statements in enumerate(SCHEMA_MIGRATIONS, start=1):
+        if target <= version:
+            continue
+        for statement in statements:
+            await db.execute(statement)
+        # PRAGMA não aceita parâmetros; target é sempre um int
+        await db.execute(f"PRAGMA user_version = {target};")
+        version = target
+    
+    return version
+
+
+# Colunas de ofertas devolvidas pela API (content_hash, last_seen e last_changed são internos)
+OFFER_COLUMNS = "id, merchant, external_id, title, url, price, discount_pct, ts"
+
+OFFER_BY_ID_QUERY = f"SELECT {OFFER_COLUMNS} FROM offers WHERE id = ?"
+
+# Upsert nativo do SQLite: uma única instrução por oferta, sem SELECT prévio.
+# Só é usado para ofertas novas ou cujo conteúdo mudou.
+UPSERT_OFFER_QUERY = """
+    INSERT INTO offers (merchant, external_id, title, url, price, discount_pct, ts,
+                        content_hash, last_seen, last_changed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(merchant, external_id) DO UPDATE SET
+    title = excluded.title,
+    url = excluded.url,
+    price = excluded.price,
+    discount_pct = excluded.discount_pct,
+    ts = excluded.ts,
+    content_hash = excluded.content_hash,
+    last_seen = excluded.last_seen,
+    last_changed = excluded.last_changed
+"""
+
+# Ofertas inalteradas só têm o last_seen atualizado
+TOUCH_OFFER_QUERY = "UPDATE offers SET last_seen = ? WHERE id = ?"
+
+# Atualiza last_seen das ofertas inalteradas (0 = não grava nada para elas)
+TOUCH_UNCHANGED = os.getenv("BDD_TOUCH_UNCHANGED", "1").lower() not in ("0", "false", "no")
+
+# Registra um ponto no histórico de preços
+INSERT_PRICE_POINT_QUERY = """
+    INSERT OR REPLACE INTO offer_prices (offer_id, ts, price, discount_pct)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Nova versão do conjunto de ofertas, a cada gravação que altera ofertas.
+# É a primeira escrita da transação: o relógio é lido já com o lock de escrita,
+# e o changed_at nunca se repete nem volta (no mesmo milissegundo ou com o
+# relógio atrasado, avança 1 ms), então gravações commitadas depois sempre
+# têm changed_at maior; é o last_changed das ofertas gravadas.
+BUMP_DATASET_VERSION_QUERY = """
+    UPDATE dataset_version
+    SET version = version + 1,
+    changed_at = CASE
+        WHEN changed_at IS NULL OR strftime('%Y-%m-%dT%H:%M:%f', 'now') > changed_at
+        THEN strftime('%Y-%m-%dT%H:%M:%f', 'now')
+        ELSE strftime('%Y-%m-%dT%H:%M:%f', changed_at, '+0.001 seconds')
+    END
+    WHERE id = 1
+    RETURNING version, changed_at
+"""
+
+# Máximo de external_ids por SELECT ao buscar as ofertas do lote
+UPSERT_ID_CHUNK_SIZE = 400
+
+# Ofertas já gravadas de um merchant. A igualdade em merchant com IN em
+# external_id vira buscas pontuais no índice UNIQUE(merchant, external_id);
+# "(merchant, external_id) IN (VALUES ...)" varreria a tabela inteira.
+OFFER_HASHES_QUERY = """
+    SELECT id, external_id, content_hash, price, discount_pct FROM offers
+    WHERE merchant = ? AND external_id IN ({placeholders})
+"""
+
+
+def build_offer_hashes_query(merchant, external_ids):
+    """
+    Monta a consulta das ofertas existentes de um merchant.
+    
+    Returns:
+        tuple: (query, params)
+    """
+    placeholders = ", ".join("?" for _ in external_ids)
+    return OFFER_HASHES_QUERY.format(placeholders=placeholders), [merchant, *external_ids]
+
+
+def offer_content_hash(title, url, price, discount_pct) -> str:
+    """
+    Impressão digital do conteúdo visível de uma oferta.
+    """
+    content = json.dumps([title, url, float(price), int(discount_pct)], ensure_ascii=False)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _offer_params(offer) -> tuple:
+    """
+    Converte uma oferta nos parâmetros de UPSERT_OFFER_QUERY.
+    """
+    if hasattr(offer, 'timestamp'):
+        # Converte o timestamp do scraper para o formato esperado
+        ts = offer.timestamp
+    else:
+        # Usa o timestamp atual
+        ts = datetime.datetime.utcnow().isoformat()
+    
+    return (
+        offer.merchant,
+        offer.external_id,
+        offer.title,
+        offer.url,
+        offer.price,
+        offer.discount_pct,
+        ts,
+        offer_content_hash(offer.title, offer.url, offer.price, offer.discount_pct),
+        ts
+    )
+
+
 # Função para inserir ou atualizar ofertas
 async def upsert_offer(offer):
     """
@@ -106,73 +479,126 @@ async def upsert_offer(offer):
     Returns:
         int: ID da oferta inserida/atualizada
     """
-    async with aiosqlite.connect(await get_db_path()) as db:
-        db.row_factory = sqlite3.Row
+    result = await sync_offers([offer])
+    return result["ids"][0]
+
+
+# Função para inserir ou atualizar ofertas em lote
+async def upsert_offers(offers):
+    """
+    Insere ou atualiza várias ofertas em uma única transação.
+    
+    Args:
+        offers: Iterável de ofertas (de scraper.models.Offer ou api.models.Offer)
+    
+    Returns:
+        list: IDs das ofertas inseridas/atualizadas, na ordem de entrada
+    """
+    result = await sync_offers(offers)
+    return result["ids"]
+
+
+async def _fetch_offer_hashes(db, keys):
+    """
+    Busca id, content_hash, preço e desconto das ofertas existentes, em blocos
+    por merchant.
+    
+    Returns:
+        dict: (merchant, external_id) -> (id, content_hash, price, discount_pct)
+    """
+    by_merchant = {}
+    for merchant, external_id in keys:
+        by_merchant.setdefault(merchant, []).append(external_id)
+    
+    found = {}
+    for merchant, external_ids in by_merchant.items():
+        for i in range(0, len(external_ids), UPSERT_ID_CHUNK_SIZE):
+            query, params = build_offer_hashes_query(
+                merchant, external_ids[i:i + UPSERT_ID_CHUNK_SIZE]
+            )
+            cursor = await db.execute(query, params)
+            for row in await cursor.fetchall():
+                found[(merchant, row['external_id'])] = (
+                    row['id'], row['content_hash'], row['price'], row['discount_pct']
+                )
+            await cursor.close()
+    return found
+
+
+async def sync_offers(offers, touch_unchanged: bool = TOUCH_UNCHANGED):
+    """
+    Grava um lote de ofertas, pulando as que não mudaram.
+    
+    As impressões digitais (content_hash) do lote são comparadas com as do
+    banco em um único passo antes da escrita: só ofertas novas ou alteradas
+    passam pelo UPSERT (e têm o ``ts``, o ``last_changed`` e o cache renovados,
+    além de incrementar a versão do conjunto em ``dataset_version``); as inalteradas
+    recebem apenas o ``last_seen`` ou, com ``touch_unchanged=False``, nada.
+    Ofertas novas e mudanças de preço ou desconto entram em ``offer_prices``.
+    
+    Args:
+        offers: Iterável de ofertas (de scraper.models.Offer ou api.models.Offer)
+        touch_unchanged: Atualiza last_seen das ofertas inalteradas
+    
+    Returns:
+        dict: ``ids`` (na ordem de entrada) e as contagens ``new``, ``changed``
+            e ``unchanged``
+    """
+    params = [_offer_params(offer) for offer in offers]
+    result = {"ids": [], "new": 0, "changed": 0, "unchanged": 0}
+    if not params:
+        return result
+    
+    # Se a mesma oferta aparecer mais de uma vez no lote, vale a última
+    latest = {(p[0], p[1]): p for p in params}
+    keys = list(latest)
+    
+    pool = await get_pool()
+    
+    async with pool.writer() as db:
+        existing = await _fetch_offer_hashes(db, keys)
         
-        # Verifica se a oferta já existe
-        query = """
-            SELECT id FROM offers 
-            WHERE merchant = ? AND external_id = ?
-        """
+        writes, touches, price_changes = [], [], []
+        for key, p in latest.items():
+            if key not in existing:
+                result["new"] += 1
+                writes.append(p)
+                price_changes.append(key)
+            elif existing[key][1] != p[7]:
+                result["changed"] += 1
+                writes.append(p)
+                if existing[key][2:] != (p[4], p[5]):
+                    price_changes.append(key)
+            else:
+                result["unchanged"] += 1
+                touches.append((p[8], existing[key][0]))
         
-        cursor = await db.execute(query, (offer.merchant, offer.external_id))
-        existing = await cursor.fetchone()
+        if writes:
+            version = await db.execute_fetchall(BUMP_DATASET_VERSION_QUERY)
+            changed_at = version[0]["changed_at"]
+            await db.executemany(UPSERT_OFFER_QUERY, [p + (changed_at,) for p in writes])
+        if touches and touch_unchanged:
+            await db.executemany(TOUCH_OFFER_QUERY, touches)
         
-        if hasattr(offer, 'timestamp'):
-            # Converte o timestamp do scraper para o formato esperado
-            ts = offer.timestamp
-        else:
-            # Usa o timestamp atual
-            ts = datetime.datetime.utcnow().isoformat()
+        # O sqlite3 descarta as linhas de RETURNING no executemany, então os IDs
+        # das ofertas novas são buscados depois, na mesma transação
+        new_keys = [key for key in keys if key not in existing]
+        if new_keys:
+            existing.update(await _fetch_offer_hashes(db, new_keys))
         
-        if existing:
-            # Atualiza a oferta existente
-            update_query = """
-                UPDATE offers SET
-                title = ?,
-                url = ?,
-                price = ?,
-                discount_pct = ?,
-                ts = ?
-                WHERE id = ?
-            """
-            
-            await db.execute(
-                update_query,
-                (
-                    offer.title,
-                    offer.url,
-                    offer.price,
-                    offer.discount_pct,
-                    ts,
-                    existing['id']
-                )
-            )
-            
-            await db.commit()
-            return existing['id']
-        else:
-            # Insere nova oferta
-            insert_query = """
-                INSERT INTO offers (merchant, external_id, title, url, price, discount_pct, ts)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            cursor = await db.execute(
-                insert_query,
-                (
-                    offer.merchant,
-                    offer.external_id,
-                    offer.title,
-                    offer.url,
-                    offer.price,
-                    offer.discount_pct,
-                    ts
-                )
-            )
-            
-            await db.commit()
-            return cursor.lastrowid
+        if price_changes:
+            await db.executemany(INSERT_PRICE_POINT_QUERY, [
+                (existing[key][0], latest[key][6], latest[key][4], latest[key][5])
+                for key in price_changes
+            ])
+    
+    for p in writes:
+        offer_cache.invalidate(existing[(p[0], p[1])][0])
+    if writes:
+        dataset_version_cache.clear()
+    
+    result["ids"] = [existing[(p[0], p[1])][0] for p in params]
+    return result
 
 
 # Função para registrar clique na oferta
@@ -180,90 +606,551 @@ async def register_offer_click(offer_id: int, user_agent: str = None, referer: s
     """
     Registra um clique em uma oferta.
     """
-    db_path = await get_db_path()
-    
     click = OfferClick(
         offer_id=offer_id,
         user_agent=user_agent,
         referer=referer
     )
     
-    async with aiosqlite.connect(db_path) as db:
-        await db.execute("""
+    await register_offer_clicks([click])
+    
+    return click
+
+
+# Função para registrar cliques em lote
+async def register_offer_clicks(clicks):
+    """
+    Registra vários cliques em uma única transação.
+    
+    Args:
+        clicks: Lista de OfferClick
+    """
+    if not clicks:
+        return
+    
+    pool = await get_pool()
+    
+    # Cliques agregados por (bucket, offer_id) para atualizar o rollup
+    rollup = Counter(
+        (click.ts.strftime(CLICK_BUCKET_FORMAT), click.offer_id) for click in clicks
+    )
+    
+    async with pool.writer() as db:
+        await db.executemany("""
         INSERT INTO offer_clicks (offer_id, user_agent, referer, ts)
         VALUES (?, ?, ?, ?)
-        """, (
-            click.offer_id,
-            click.user_agent,
-            click.referer,
-            click.ts.isoformat()
-        ))
+        """, [
+            (
+                click.offer_id,
+                click.user_agent,
+                click.referer,
+                click.ts.isoformat()
+            )
+            for click in clicks
+        ])
         
-        await db.commit()
+        await db.executemany("""
+        INSERT INTO offer_click_rollup (bucket, offer_id, click_count)
+        VALUES (?, ?, ?)
+        ON CONFLICT(bucket, offer_id) DO UPDATE SET
+        click_count = click_count + excluded.click_count
+        """, [
+            (bucket, offer_id, count)
+            for (bucket, offer_id), count in rollup.items()
+        ])
+
+
+# Função para recalcular o rollup de cliques
+async def backfill_click_rollup():
+    """
+    Reconstrói o rollup horário de cliques a partir de offer_clicks.
     
-    return click
+    Returns:
+        int: Número de buckets (hora, oferta) gravados
+    """
+    pool = await get_pool()
+    
+    async with pool.writer() as db:
+        await db.execute("DELETE FROM offer_click_rollup;")
+        cursor = await db.execute(BACKFILL_CLICK_ROLLUP_QUERY)
+        count = cursor.rowcount
+        await cursor.close()
+    
+    return count
+
+
+CLICK_STATS_OFFER_QUERY = """
+    SELECT SUM(r.click_count) as click_count, r.offer_id, o.merchant, o.title
+    FROM offer_click_rollup r
+    JOIN offers o ON r.offer_id = o.id
+    WHERE r.offer_id = ? AND r.bucket >= ?
+    GROUP BY r.offer_id
+"""
+
+# O "+" no GROUP BY impede que o SQLite percorra o rollup inteiro pelo índice
+# de offer_id só para evitar a ordenação; assim ele busca apenas os buckets
+# do período e agrupa o resultado
+CLICK_STATS_ALL_QUERY = """
+    SELECT SUM(r.click_count) as click_count, r.offer_id, o.merchant, o.title
+    FROM offer_click_rollup r
+    JOIN offers o ON r.offer_id = o.id
+    WHERE r.bucket >= ?
+    GROUP BY +r.offer_id
+    ORDER BY click_count DESC
+    LIMIT 100
+"""
 
 
 # Função para obter estatísticas de cliques por oferta
 async def get_offer_clicks_stats(offer_id: int = None, days: int = 30):
     """
     Retorna estatísticas de cliques para uma oferta específica ou todas.
+    
+    As contagens vêm do rollup horário, então a hora inicial do período é
+    contada inteira.
     """
-    db_path = await get_db_path()
+    # Calcula o bucket limite para a consulta
+    date_limit = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    date_limit = date_limit.strftime(CLICK_BUCKET_FORMAT)
     
-    # Calcula a data limite para a consulta
-    date_limit = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat()
+    pool = await get_pool()
     
-    async with aiosqlite.connect(db_path) as db:
-        db.row_factory = sqlite3.Row
-        
+    async with pool.reader() as db:
         if offer_id:
             # Estatísticas para uma oferta específica
-            cursor = await db.execute("""
-            SELECT COUNT(*) as click_count, offer_id, o.merchant, o.title
-            FROM offer_clicks c
-            JOIN offers o ON c.offer_id = o.id
-            WHERE c.offer_id = ? AND c.ts > ?
-            GROUP BY offer_id
-            """, (offer_id, date_limit))
+            cursor = await db.execute(CLICK_STATS_OFFER_QUERY, (offer_id, date_limit))
         else:
             # Estatísticas para todas as ofertas
-            cursor = await db.execute("""
-            SELECT COUNT(*) as click_count, offer_id, o.merchant, o.title
-            FROM offer_clicks c
-            JOIN offers o ON c.offer_id = o.id
-            WHERE c.ts > ?
-            GROUP BY offer_id
-            ORDER BY click_count DESC
-            LIMIT 100
-            """, (date_limit,))
+            cursor = await db.execute(CLICK_STATS_ALL_QUERY, (date_limit,))
             
         rows = await cursor.fetchall()
         
         return [dict(row) for row in rows]
 
 
+# Dias de histórico de preços mantidos com todas as mudanças
+PRICE_HISTORY_FULL_DAYS = int(os.getenv("BDD_PRICE_HISTORY_FULL_DAYS", "30"))
+
+# Dias de histórico de preços mantidos no total (os mais antigos são apagados)
+PRICE_HISTORY_MAX_DAYS = int(os.getenv("BDD_PRICE_HISTORY_MAX_DAYS", "365"))
+
+# Apaga os pontos anteriores ao limite, exceto o último de cada oferta
+# (que ainda representa o preço em vigor)
+PRUNE_PRICE_HISTORY_QUERY = """
+    DELETE FROM offer_prices
+    WHERE ts < ?
+    AND ts < (SELECT MAX(p.ts) FROM offer_prices p WHERE p.offer_id = offer_prices.offer_id)
+"""
+
+# Antes do limite, mantém por oferta e dia só o menor preço e o último ponto
+DOWNSAMPLE_PRICE_HISTORY_QUERY = """
+    DELETE FROM offer_prices
+    WHERE ts < ?
+    AND (offer_id, ts) NOT IN (
+        SELECT offer_id, ts FROM (
+            SELECT offer_id, ts,
+                ROW_NUMBER() OVER (
+                    PARTITION BY offer_id, substr(ts, 1, 10) ORDER BY price, ts
+                ) AS lowest,
+                ROW_NUMBER() OVER (
+                    PARTITION BY offer_id, substr(ts, 1, 10) ORDER BY ts DESC
+                ) AS latest
+            FROM offer_prices
+            WHERE ts < ?
+        )
+        WHERE lowest = 1 OR latest = 1
+    )
+"""
+
+# Série do período reduzida a até N baldes de tempo: o ponto de menor preço de
+# cada balde. Com um único MIN(), o SQLite tira as colunas sem agregação (ts e
+# discount_pct) da mesma linha que tem o menor preço.
+PRICE_HISTORY_QUERY = """
+    SELECT ts, MIN(price) AS price, discount_pct
+    FROM offer_prices
+    WHERE offer_id = ? AND ts >= ?
+    GROUP BY CAST((julianday(ts) - julianday(?)) * ? AS INTEGER)
+    ORDER BY ts
+"""
+
+# Último ponto antes do período: o preço em vigor no seu início
+PRICE_BEFORE_QUERY = """
+    SELECT ts, price, discount_pct FROM offer_prices
+    WHERE offer_id = ? AND ts < ?
+    ORDER BY ts DESC
+    LIMIT 1
+"""
+
+# Menor preço desde a data informada
+LOWEST_PRICE_QUERY = "SELECT MIN(price) FROM offer_prices WHERE offer_id = ? AND ts >= ?"
+
+
+async def get_price_history(offer_id: int, days: int = 90, points: int = 120):
+    """
+    Retorna a série de preços de uma oferta, reduzida a no máximo ``points`` pontos.
+    
+    O período é dividido em baldes de tempo iguais e cada balde traz o menor
+    preço registrado nele. O primeiro ponto pode ser anterior ao período: é o
+    preço que estava em vigor no seu início.
+    
+    Returns:
+        dict: ``points`` (lista de ts/price/discount_pct) e ``lowest_price_30d``
+    """
+    now = datetime.datetime.utcnow()
+    since = (now - datetime.timedelta(days=days)).isoformat()
+    since_30d = (now - datetime.timedelta(days=30)).isoformat()
+    
+    pool = await get_pool()
+    
+    async with pool.reader() as db:
+        rows = await db.execute_fetchall(
+            PRICE_HISTORY_QUERY, (offer_id, since, since, points / days)
+        )
+        before = await db.execute_fetchall(PRICE_BEFORE_QUERY, (offer_id, since))
+        lowest = await db.execute_fetchall(LOWEST_PRICE_QUERY, (offer_id, since_30d))
+        before_30d = await db.execute_fetchall(PRICE_BEFORE_QUERY, (offer_id, since_30d))
+    
+    series = [dict(row) for row in before] + [dict(row) for row in rows]
+    
+    # O preço em vigor no início dos 30 dias também conta para o menor preço
+    candidates = [row[0] for row in lowest if row[0] is not None]
+    candidates += [row["price"] for row in before_30d]
+    
+    return {
+        "points": series,
+        "lowest_price_30d": min(candidates) if candidates else None,
+    }
+
+
+async def compact_price_history(full_days: int = PRICE_HISTORY_FULL_DAYS,
+                                max_days: int = PRICE_HISTORY_MAX_DAYS):
+    """
+    Aplica a política de retenção do histórico de preços.
+    
+    Mudanças dos últimos ``full_days`` dias são mantidas todas; antes disso,
+    fica só o menor preço e o último ponto de cada dia; pontos com mais de
+    ``max_days`` dias são apagados, exceto o último de cada oferta.
+    
+    Returns:
+        int: Número de pontos removidos
+    """
+    now = datetime.datetime.utcnow()
+    full_cutoff = (now - datetime.timedelta(days=full_days)).isoformat()
+    max_cutoff = (now - datetime.timedelta(days=max_days)).isoformat()
+    
+    pool = await get_pool()
+    
+    async with pool.writer() as db:
+        cursor = await db.execute(PRUNE_PRICE_HISTORY_QUERY, (max_cutoff,))
+        removed = cursor.rowcount
+        await cursor.close()
+        
+        cursor = await db.execute(DOWNSAMPLE_PRICE_HISTORY_QUERY, (full_cutoff, full_cutoff))
+        removed += cursor.rowcount
+        await cursor.close()
+    
+    return removed
+
+
+def _encode_cursor(values: list) -> str:
+    """Codifica os valores de um cursor em base64 (JSON compacto)."""
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, types: tuple) -> tuple:
+    """
+    Decodifica um cursor e valida o tipo de cada valor.
+    
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Cursor de paginação inválido")
+    
+    if not isinstance(values, list) or len(values) != len(types) or not all(
+        isinstance(value, kind) and not isinstance(value, bool)
+        for value, kind in zip(values, types)
+    ):
+        raise ValueError("Cursor de paginação inválido")
+    
+    return tuple(values)
+
+
+def encode_offers_cursor(offer) -> str:
+    """
+    Gera o cursor opaco que aponta para depois da oferta informada.
+    
+    Args:
+        offer: Dict da oferta (precisa de ``ts`` e ``id``)
+    """
+    return _encode_cursor([str(offer["ts"]), offer["id"]])
+
+
+def decode_offers_cursor(cursor: str) -> tuple:
+    """
+    Decodifica um cursor gerado por ``encode_offers_cursor``.
+    
+    Returns:
+        tuple: (ts, id) da última oferta da página anterior
+    
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    return _decode_cursor(cursor, (str, int))
+
+
+def build_offers_query(merchant=None, min_discount=0, limit=20, offset=0, cursor=None):
+    """
+    Monta a consulta de ``get_offers`` e os seus parâmetros.
+    
+    Returns:
+        tuple: (query, params)
+    """
+    query = f"SELECT {OFFER_COLUMNS} FROM offers WHERE discount_pct >= ?"
+    params = [min_discount]
+    
+    if merchant:
+        query += " AND merchant = ?"
+        params.append(merchant)
+    
+    if cursor:
+        query += " AND (ts, id) < (?, ?)"
+        params.extend(decode_offers_cursor(cursor))
+    
+    query += " ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    
+    return query, params
+
+
 # Função para consultar ofertas com filtros
-async def get_offers(merchant=None, min_discount=0, limit=20, offset=0):
+async def get_offers(merchant=None, min_discount=0, limit=20, offset=0, cursor=None):
     """
     Consulta ofertas com filtros opcionais.
+    
+    A paginação por ``cursor`` (keyset em ``(ts, id)``) não precisa percorrer
+    as linhas das páginas anteriores; ``offset`` continua disponível por
+    compatibilidade.
+    
+    Args:
+        cursor: Cursor opaco retornado por ``encode_offers_cursor``
+    
+    Raises:
+        ValueError: Se o cursor for inválido
     """
-    db_path = await get_db_path()
+    query, params = build_offers_query(merchant, min_discount, limit, offset, cursor)
     
-    query = "SELECT * FROM offers WHERE discount_pct >= ?"
-    params = [min_discount]
+    pool = await get_pool()
     
+    async with pool.reader() as db:
+        rows = await db.execute_fetchall(query, params)
+        
+        return [dict(row) for row in rows]
+
+
+# Versão do conjunto de ofertas, mantida por sync_offers (ver migração 9)
+DATASET_VERSION_QUERY = "SELECT version, changed_at FROM dataset_version WHERE id = 1"
+
+
+async def get_dataset_version() -> tuple:
+    """
+    Retorna a versão atual do conjunto de ofertas: o contador de gravações e
+    o instante (UTC, relógio do banco) da última delas, ou texto vazio se
+    nenhuma oferta foi gravada.
+    
+    A versão fica em cache por ``DATASET_VERSION_TTL`` segundos; gravações
+    deste processo a renovam na hora.
+    """
+    version = dataset_version_cache.get("offers")
+    if version is not None:
+        return version
+    
+    pool = await get_pool()
+    generation = dataset_version_cache.generation
+    async with pool.reader() as db:
+        rows = await db.execute_fetchall(DATASET_VERSION_QUERY)
+    
+    version = (rows[0]["version"], rows[0]["changed_at"] or "") if rows else (0, "")
+    dataset_version_cache.set("offers", version, generation)
+    return version
+
+
+# Colunas da exportação: as da API mais o instante da gravação (since)
+EXPORT_COLUMNS = f"{OFFER_COLUMNS}, last_changed"
+
+# Ofertas lidas por consulta na exportação completa
+EXPORT_BATCH_SIZE = int(os.getenv("BDD_EXPORT_BATCH_SIZE", "1000"))
+
+
+def build_export_query(merchant=None, min_discount=0, since=None, after=None,
+                       batch_size=EXPORT_BATCH_SIZE):
+    """
+    Monta a consulta de um lote de ``export_offers`` e os seus parâmetros.
+
+    A ordem é crescente em ``(last_changed, id)``: o ``last_changed`` da
+    última linha exportada serve de ``since`` na próxima sincronização
+    incremental. Ao contrário do ``ts`` (instante da extração no scraper),
+    ele é atribuído na gravação e segue a ordem dos commits.
+
+    Args:
+        since: Só ofertas gravadas depois deste instante (ISO 8601, UTC)
+        after: (last_changed, id) da última oferta do lote anterior
+
+    Returns:
+        tuple: (query, params)
+    """
+    query = f"SELECT {EXPORT_COLUMNS} FROM offers WHERE discount_pct >= ?"
+    params = [min_discount]
+
     if merchant:
         query += " AND merchant = ?"
         params.append(merchant)
+
+    if since:
+        query += " AND last_changed > ?"
+        params.append(since)
+
+    if after:
+        query += " AND (last_changed, id) > (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY last_changed, id LIMIT ?"
+    params.append(batch_size)
+
+    return query, params
+
+
+async def export_offers(merchant=None, min_discount=0, since=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Percorre todas as ofertas do filtro, em lotes, sem carregá-las de uma vez.
+
+    Cada lote é uma consulta keyset em ``(last_changed, id)`` com a sua
+    própria conexão de leitura, que é devolvida ao pool entre os lotes; um
+    cliente lento não segura uma leitora nem uma transação aberta durante a
+    exportação toda.
+
+    Yields:
+        list: Dicts das ofertas de cada lote (no máximo ``batch_size``)
+    """
+    pool = await get_pool()
+    after = None
+
+    while True:
+        query, params = build_export_query(merchant, min_discount, since, after, batch_size)
+        async with pool.reader() as db:
+            rows = await db.execute_fetchall(query, params)
+
+        if not rows:
+            return
+
+        batch = [dict(row) for row in rows]
+        yield batch
+
+        if len(batch) < batch_size:
+            return
+        after = (batch[-1]["last_changed"], batch[-1]["id"])
+
+
+# Máximo de termos considerados em uma busca
+SEARCH_MAX_TERMS = 10
+
+# Termos da busca: sequências de letras/dígitos (acentos são tratados pelo FTS5)
+SEARCH_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_fts_query(q: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura.
     
-    query += " ORDER BY ts DESC LIMIT ? OFFSET ?"
+    Cada termo vira um prefixo entre aspas ("fone"* "bluetooth"*), o que evita
+    erros de sintaxe com caracteres especiais e aproxima plurais e variações
+    (ex: "fone" encontra "fones").
+    
+    Raises:
+        ValueError: Se a busca não tiver nenhum termo
+    """
+    terms = SEARCH_TERM_PATTERN.findall(q or "")[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("Informe ao menos um termo de busca")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def encode_search_cursor(offer) -> str:
+    """
+    Gera o cursor da busca, que aponta para depois da oferta informada.
+    
+    Args:
+        offer: Dict retornado por ``search_offers`` (precisa de ``rank`` e ``id``)
+    """
+    return _encode_cursor([offer["rank"], offer["id"]])
+
+
+def decode_search_cursor(cursor: str) -> tuple:
+    """
+    Decodifica um cursor gerado por ``encode_search_cursor``.
+    
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    rank, offer_id = _decode_cursor(cursor, ((int, float), int))
+    return float(rank), offer_id
+
+
+def build_search_query(q, merchant=None, min_discount=0, limit=20, offset=0, cursor=None):
+    """
+    Monta a consulta de ``search_offers`` e os seus parâmetros.
+    
+    Os resultados vêm ordenados por relevância (BM25, menor é melhor) e id,
+    o que permite paginar por cursor em ``(rank, id)``.
+    
+    Returns:
+        tuple: (query, params)
+    """
+    columns = ", ".join(f"o.{column.strip()}" for column in OFFER_COLUMNS.split(","))
+    query = f"""
+        SELECT {columns}, s.rank AS rank
+        FROM (
+            SELECT rowid, bm25(offers_fts) AS rank FROM offers_fts WHERE offers_fts MATCH ?
+        ) AS s
+        JOIN offers o ON o.id = s.rowid
+        WHERE o.discount_pct >= ?
+    """
+    params = [build_fts_query(q), min_discount]
+    
+    if merchant:
+        query += " AND o.merchant = ?"
+        params.append(merchant)
+    
+    if cursor:
+        query += " AND (s.rank, o.id) > (?, ?)"
+        params.extend(decode_search_cursor(cursor))
+    
+    query += " ORDER BY s.rank, o.id LIMIT ? OFFSET ?"
     params.extend([limit, offset])
     
-    async with aiosqlite.connect(db_path) as db:
-        db.row_factory = sqlite3.Row
-        cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
+    return query, params
+
+
+async def search_offers(q, merchant=None, min_discount=0, limit=20, offset=0, cursor=None):
+    """
+    Busca ofertas pelo título, ordenadas por relevância.
+    
+    Aceita os mesmos filtros e paginação de ``get_offers``; o cursor vem de
+    ``encode_search_cursor``.
+    
+    Raises:
+        ValueError: Se a busca não tiver termos ou o cursor for inválido
+    """
+    query, params = build_search_query(q, merchant, min_discount, limit, offset, cursor)
+    
+    pool = await get_pool()
+    
+    async with pool.reader() as db:
+        rows = await db.execute_fetchall(query, params)
         
         return [dict(row) for row in rows]
 
@@ -271,19 +1158,44 @@ async def get_offers(merchant=None, min_discount=0, limit=20, offset=0):
 # Função para obter oferta por ID
 async def get_offer_by_id(offer_id: int):
     """
-    Retorna uma oferta pelo ID.
+    Retorna uma oferta pelo ID, consultando antes o cache de ofertas.
     """
-    db_path = await get_db_path()
+    pool = await get_pool()
+    
+    cached = offer_cache.get(offer_id)
+    if cached is not None:
+        return dict(cached)
     
-    async with aiosqlite.connect(db_path) as db:
-        db.row_factory = sqlite3.Row
-        cursor = await db.execute("SELECT * FROM offers WHERE id = ?", (offer_id,))
+    # Um upsert concluído durante a leitura invalida a oferta; nesse caso a
+    # linha lida pode ser a antiga e não vai para o cache
+    generation = offer_cache.generation
+    async with pool.reader() as db:
+        cursor = await db.execute(OFFER_BY_ID_QUERY, (offer_id,))
         row = await cursor.fetchone()
-        
-        return dict(row) if row else None
+    
+    if not row:
+        return None
+    
+    offer = dict(row)
+    offer_cache.set(offer_id, offer, generation)
+    
+    return dict(offer)
 
 
 if __name__ == "__main__":
     # Quando executado diretamente, inicializa o banco
-    import asyncio
-    asyncio.run(init_db()) 
\ No newline at end of file
+    # Uso: python models.py [backfill-clicks] [compact-prices]
+    async def _init_and_close():
+        await init_db()
+        
+        if "backfill-clicks" in sys.argv[1:]:
+            count = await backfill_click_rollup()
+            print(f"Rollup de cliques recalculado: {count} buckets")
+        
+        if "compact-prices" in sys.argv[1:]:
+            removed = await compact_price_history()
+            print(f"Histórico de preços compactado: {removed} pontos removidos")
+        
+        await close_pool()
+    
+    asyncio.run(_init_and_close()) 
\ No newline at end of file
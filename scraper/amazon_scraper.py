@@ -14,7 +14,8 @@ sys.path.append(str(parent_dir))
 from playwright.async_api import async_playwright
 import random
 import datetime
-from api.models import Offer, upsert_offer, init_db
+from api.models import Offer, close_pool, upsert_offers, init_db
+from scraper.rate_limiter import limited_goto
 
 
 async def scrape_amazon_offers(keyword="ofertas do dia", max_pages=2, max_offers=10):
@@ -39,7 +40,7 @@ async def scrape_amazon_offers(keyword="ofertas do dia", max_pages=2, max_offers
         # Navega para a página inicial de ofertas
         base_url = f"https://www.amazon.com.br/s?k={keyword.replace(' ', '+')}"
         print(f"Navegando para: {base_url}")
-        await page.goto(base_url, wait_until="domcontentloaded")
+        await limited_goto(page, base_url, wait_until="domcontentloaded")
         
         # Tira um screenshot para debug
         screenshot_path = Path(__file__).parent / "amazon_page.png"
@@ -206,23 +207,26 @@ async def scrape_amazon_offers(keyword="ofertas do dia", max_pages=2, max_offers
 
 async def main():
     """Função principal"""
-    # Inicializa o banco
-    await init_db()
-    print("Banco de dados inicializado")
-    
-    # Coleta ofertas da Amazon
-    print("Coletando ofertas da Amazon...")
-    keyword = "ofertas do dia eletronicos"
-    offers = await scrape_amazon_offers(keyword=keyword, max_pages=2, max_offers=10)
-    
-    # Salva no banco
-    if offers:
-        print(f"Salvando {len(offers)} ofertas no banco...")
-        for offer in offers:
-            await upsert_offer(offer)
-        print("✅ Ofertas salvas com sucesso!")
-    else:
-        print("❌ Nenhuma oferta encontrada!")
+    try:
+        # Inicializa o banco
+        await init_db()
+        print("Banco de dados inicializado")
+        
+        # Coleta ofertas da Amazon
+        print("Coletando ofertas da Amazon...")
+        keyword = "ofertas do dia eletronicos"
+        offers = await scrape_amazon_offers(keyword=keyword, max_pages=2, max_offers=10)
+        
+        # Salva no banco
+        if offers:
+            print(f"Salvando {len(offers)} ofertas no banco...")
+            await upsert_offers(offers)
+            print("✅ Ofertas salvas com sucesso!")
+        else:
+            print("❌ Nenhuma oferta encontrada!")
+    finally:
+        # As threads das conexões do pool impedem o processo de terminar
+        await close_pool()
 
 
 if __name__ == "__main__":
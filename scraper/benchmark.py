@@ -0,0 +1,369 @@
+"""
+Benchmark offline dos extratores do scraper.
+
+Serve as páginas de resultados salvas em ``benchmark_data/`` por um servidor
+HTTP local e roda cada extrator contra elas, medindo páginas/s, ofertas/s,
+tempo de CPU e pico de memória (RSS). Os resultados podem ser gravados como
+baseline e comparados nas execuções seguintes.
+
+A vazão (páginas/s, ofertas/s) depende da máquina em que a baseline foi
+gravada, então uma queda só gera aviso; com ``--strict`` ela também reprova.
+Ofertas por página diferentes da baseline sempre reprovam. As páginas são
+sintéticas e geradas por ``python -m scraper.benchmark_fixtures``.
+
+Uso:
+    python -m scraper.benchmark                     # roda e compara com a baseline
+    python -m scraper.benchmark --strict            # queda de vazão também reprova
+    python -m scraper.benchmark --save-baseline     # grava a baseline atual
+    python -m scraper.benchmark --browser           # também mede o caminho Playwright
+    python -m scraper.benchmark --record            # atualiza as páginas a partir dos sites
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.extractors import (
+    AMAZON_SELECTORS, MERCADOLIVRE_PRODUCT_SELECTORS, extract_amazon_offers,
+    extract_mercadolivre_offers, parse_amazon_html, parse_mercadolivre_html
+)
+from scraper.fetch_strategy import FetchStrategy
+from scraper.rate_limiter import RateLimiter
+
+
+DATA_DIR = Path(__file__).parent / "benchmark_data"
+BASELINE_PATH = DATA_DIR / "baseline.json"
+
+# Queda de vazão (fração) a partir da qual a comparação acusa regressão
+DEFAULT_TOLERANCE = 0.25
+
+# Parser HTTP (html, url), extrator no navegador e URLs de gravação de cada merchant
+BENCHMARK_MERCHANTS = {
+    "amazon": {
+        "parse_html": lambda html, url: parse_amazon_html(html),
+        "extract_page": extract_amazon_offers,
+        "ready_selectors": AMAZON_SELECTORS["product"],
+        "record_urls": [
+            "https://www.amazon.com.br/s?k=ofertas+do+dia",
+            "https://www.amazon.com.br/s?k=ofertas+do+dia&page=2",
+        ],
+    },
+    "mercadolivre": {
+        "parse_html": parse_mercadolivre_html,
+        "extract_page": extract_mercadolivre_offers,
+        "ready_selectors": MERCADOLIVRE_PRODUCT_SELECTORS,
+        "record_urls": [
+            "https://www.mercadolivre.com.br/ofertas",
+            "https://www.mercadolivre.com.br/ofertas?page=2",
+        ],
+    },
+}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Serve os arquivos sem logar cada requisição."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_fixtures(directory: Path = DATA_DIR):
+    """
+    Sobe um servidor HTTP local com as páginas salvas.
+
+    Yields:
+        str: URL base do servidor (ex: http://127.0.0.1:8123)
+    """
+    handler = partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fixture_pages(merchant: str, directory: Path = DATA_DIR) -> List[str]:
+    """Caminhos relativos das páginas salvas do merchant, em ordem."""
+    return sorted(
+        f"{merchant}/{path.name}" for path in (directory / merchant).glob("page*.html")
+    )
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Pico de memória residente do processo (MB), ou None se indisponível.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _result(merchant: str, mode: str, offers_per_page: List[int], iterations: int,
+            wall_s: float, cpu_s: float) -> Dict:
+    """Monta o resultado de uma medição."""
+    pages = len(offers_per_page) * iterations
+    offers = sum(offers_per_page) * iterations
+    rss = peak_rss_mb()
+    return {
+        "merchant": merchant,
+        "mode": mode,
+        "iterations": iterations,
+        "offers_per_page": offers_per_page,
+        "pages_per_sec": round(pages / wall_s, 2),
+        "offers_per_sec": round(offers / wall_s, 2),
+        "cpu_s": round(cpu_s, 3),
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+async def bench_http(merchant: str, base_url: str, iterations: int = 5) -> Dict:
+    """
+    Mede o caminho HTTP (download pelo httpx + parse com BeautifulSoup).
+    """
+    config = BENCHMARK_MERCHANTS[merchant]
+    pages = fixture_pages(merchant)
+    # O servidor é local: o limite de requisições só distorceria a medição
+    fetcher = FetchStrategy(limiter=RateLimiter(enabled=False))
+    offers_per_page = []
+
+    try:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        # Os extratores imprimem cada oferta; fora da medição isso é só ruído
+        with contextlib.redirect_stdout(io.StringIO()):
+            for iteration in range(iterations):
+                for page in pages:
+                    url = f"{base_url}/{page}"
+                    html = await fetcher.fetch_html(url)
+                    offers = config["parse_html"](html, url)
+                    if iteration == 0:
+                        offers_per_page.append(len(offers))
+        wall_s = time.perf_counter() - wall_start
+        cpu_s = time.process_time() - cpu_start
+    finally:
+        await fetcher.close()
+
+    return _result(merchant, "http", offers_per_page, iterations, wall_s, cpu_s)
+
+
+async def bench_browser(merchant: str, base_url: str, iterations: int = 5) -> Dict:
+    """
+    Mede o caminho Playwright (navegação + espera + extração no navegador).
+
+    O tempo de CPU medido é o deste processo; o do Chromium fica de fora.
+    """
+    from scraper.browser_pool import BrowserPool
+    from scraper.readiness import WaitTimings, wait_for_results
+    from scraper.resource_blocking import MERCHANT_ALLOWED_DOMAINS, BlockingProfile
+
+    config = BENCHMARK_MERCHANTS[merchant]
+    pages = fixture_pages(merchant)
+    # O servidor local faz o papel do domínio do merchant
+    profile = BlockingProfile.for_merchant(
+        merchant, allowed_domains=MERCHANT_ALLOWED_DOMAINS[merchant] | {"127.0.0.1"}
+    )
+    pool = BrowserPool()
+    offers_per_page = []
+
+    try:
+        async with pool.context(merchant, blocking_profile=profile) as context:
+            page = await context.new_page()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for iteration in range(iterations):
+                    for fixture in pages:
+                        await page.goto(f"{base_url}/{fixture}", wait_until="domcontentloaded")
+                        await wait_for_results(page, merchant, config["ready_selectors"],
+                                               timings=WaitTimings())
+                        offers = await config["extract_page"](page)
+                        if iteration == 0:
+                            offers_per_page.append(len(offers))
+            wall_s = time.perf_counter() - wall_start
+            cpu_s = time.process_time() - cpu_start
+    finally:
+        await pool.close()
+
+    return _result(merchant, "browser", offers_per_page, iterations, wall_s, cpu_s)
+
+
+async def run_benchmark(merchants: List[str], iterations: int = 5, browser: bool = False) -> Dict:
+    """
+    Roda o benchmark dos merchants informados.
+
+    Returns:
+        dict: Resultados por chave ``merchant:modo``
+    """
+    results = {}
+    with serve_fixtures() as base_url:
+        for merchant in merchants:
+            results[f"{merchant}:http"] = await bench_http(merchant, base_url, iterations)
+            if browser:
+                results[f"{merchant}:browser"] = await bench_browser(merchant, base_url, iterations)
+    return results
+
+
+def throughput_regressions(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Lista as quedas de vazão maiores que ``tolerance`` em relação à baseline.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        for metric in ("pages_per_sec", "offers_per_sec"):
+            if base[metric] and result[metric] < base[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{key}: {metric} caiu de {base[metric]} para {result[metric]}"
+                )
+    return regressions
+
+
+def compare_results(results: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE,
+                    strict: bool = False) -> List[str]:
+    """
+    Compara os resultados com a baseline.
+
+    Args:
+        strict: Trata as quedas de vazão (``throughput_regressions``) como problema
+
+    Returns:
+        list: Problemas encontrados (ofertas por página diferentes e, com
+            ``strict``, vazão abaixo da tolerância)
+    """
+    problems = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        if result["offers_per_page"] != base["offers_per_page"]:
+            problems.append(
+                f"{key}: ofertas por página mudaram de {base['offers_per_page']} "
+                f"para {result['offers_per_page']}"
+            )
+
+    if strict:
+        problems.extend(throughput_regressions(results, baseline, tolerance))
+    return problems
+
+
+def format_report(results: Dict, baseline: Optional[Dict] = None) -> str:
+    """
+    Formata os resultados em tabela, com a variação sobre a baseline.
+    """
+    baseline = baseline or {}
+    metrics = ("pages_per_sec", "offers_per_sec", "cpu_s", "peak_rss_mb")
+    lines = []
+    for key, result in results.items():
+        lines.append(f"{key}  (ofertas por página: {result['offers_per_page']})")
+        base = baseline.get(key, {})
+        for metric in metrics:
+            value = result[metric]
+            line = f"    {metric:<16}{value}"
+            old = base.get(metric)
+            if old and value is not None:
+                line += f"  (baseline {old}, {(value - old) / old * 100:+.1f}%)"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict:
+    """Carrega a baseline gravada (vazia se não existir)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results: Dict, path: Path = BASELINE_PATH):
+    """Grava os resultados como nova baseline."""
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+async def record_fixtures(merchants: List[str], directory: Path = DATA_DIR):
+    """
+    Baixa as páginas atuais dos sites e substitui as páginas salvas.
+    """
+    fetcher = FetchStrategy()
+    try:
+        for merchant in merchants:
+            for n, url in enumerate(BENCHMARK_MERCHANTS[merchant]["record_urls"], start=1):
+                html = await fetcher.fetch_html(url)
+                if not html:
+                    print(f"Não foi possível baixar {url}")
+                    continue
+                path = directory / merchant / f"page{n}.html"
+                path.write_text(html, encoding="utf-8")
+                print(f"Página salva em: {path}")
+    finally:
+        await fetcher.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline dos extratores do scraper")
+    parser.add_argument("--merchant", choices=sorted(BENCHMARK_MERCHANTS),
+                        help="Merchant a medir (todos se omitido)")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Vezes que cada página é processada")
+    parser.add_argument("--browser", action="store_true",
+                        help="Mede também o caminho Playwright")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Grava os resultados como baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Queda de vazão aceita antes de acusar regressão")
+    parser.add_argument("--strict", action="store_true",
+                        help="Reprova também quedas de vazão (só faz sentido na máquina da baseline)")
+    parser.add_argument("--record", action="store_true",
+                        help="Atualiza as páginas salvas a partir dos sites")
+    args = parser.parse_args(argv)
+
+    merchants = [args.merchant] if args.merchant else list(BENCHMARK_MERCHANTS)
+
+    if args.record:
+        asyncio.run(record_fixtures(merchants))
+        return 0
+
+    results = asyncio.run(run_benchmark(merchants, args.iterations, args.browser))
+    baseline = load_baseline()
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        save_baseline({**baseline, **results})
+        print(f"Baseline gravada em: {BASELINE_PATH}")
+        return 0
+
+    if not args.strict:
+        for regression in throughput_regressions(results, baseline, args.tolerance):
+            print(f"AVISO: {regression}")
+
+    problems = compare_results(results, baseline, args.tolerance, args.strict)
+    for problem in problems:
+        print(f"REGRESSÃO: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+Gera as páginas sintéticas usadas pelo benchmark offline (``benchmark_data/``).
+
+As páginas imitam a estrutura dos resultados da Amazon e das ofertas do
+Mercado Livre (mesmas classes e seletores que os extratores usam) e trazem o
+volume típico de uma página real: navegação extensa, scripts de estado e JSON
+pré-carregado, preenchidos com ``xxxx``/``yyyy``. Tudo vem de um gerador
+aleatório com semente fixa, então a saída é sempre a mesma.
+
+Uso:
+    python -m scraper.benchmark_fixtures                # regrava benchmark_data/
+    python -m scraper.benchmark_fixtures --out /tmp/fx  # grava em outro diretório
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent / "benchmark_data"
+
+# Semente do gerador; mudá-la muda todas as páginas (e a baseline)
+SEED = 42
+
+# Páginas geradas por merchant
+PAGES = 2
+
+WORDS = (
+    "Fone Bluetooth Smartphone Notebook Cadeira Gamer Monitor Teclado Mouse Sem Fio Air Fryer "
+    "Cafeteira Aspirador Robô Smart TV 4K Caixa de Som Kindle Echo Dot Tênis Mochila Garrafa "
+    "Térmica Panela Elétrica Relógio Inteligente Câmera Carregador Rápido USB-C Cabo HDMI SSD 1TB"
+).split()
+
+# Script de estado da página da Amazon (só volume; os extratores o ignoram)
+AMAZON_NOISE_JS = "window.P && P.when('A').execute(function(A){" + ";".join(
+    f"A.state('s{i}',{json.dumps({'k': i, 'v': 'x' * 60})})" for i in range(900)
+) + "});"
+
+
+def brl(value: float) -> str:
+    """Formata um valor em reais (1.234,56)."""
+    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def title(rnd: random.Random) -> str:
+    """Título de produto com 6 a 14 palavras."""
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 14)))
+
+
+def amazon_page(rnd: random.Random, n: int) -> str:
+    """
+    Página de resultados da Amazon com 60 produtos (parte sem preço ou sem
+    preço original, como nas páginas reais).
+    """
+    items = []
+    for i in range(60):
+        asin = "B0" + "".join(rnd.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(8))
+        t = title(rnd)
+        slug = "-".join(t.split()[:5])
+        href = f"/{slug}/dp/{asin}/ref=sr_1_{i+1}?keywords=ofertas&amp;qid=1700000000&amp;sr=8-{i+1}"
+        price = round(rnd.uniform(19, 4999), 2)
+        has_orig = rnd.random() < 0.6
+        orig = round(price * rnd.uniform(1.1, 2.0), 2)
+        no_price = rnd.random() < 0.05
+        orig_html = (
+            f' <span class="a-price a-text-price" data-a-size="b" data-a-strike="true" data-a-color="secondary">'
+            f'<span class="a-offscreen">R$&nbsp;{brl(orig)}</span><span aria-hidden="true">R$&nbsp;{brl(orig)}</span></span>'
+            if has_orig else ''
+        )
+        price_html = "" if no_price else (
+            f'<div class="a-row a-size-base a-color-base"><a class="a-link-normal s-no-hover s-underline-text '
+            f's-underline-link-text s-link-style a-text-normal" href="{href}"><span class="a-price" data-a-size="xl" '
+            f'data-a-color="base"><span class="a-offscreen">R$&nbsp;{brl(price)}</span><span aria-hidden="true">'
+            f'<span class="a-price-symbol">R$</span><span class="a-price-whole">{brl(price).split(",")[0]}'
+            f'<span class="a-price-decimal">,</span></span><span class="a-price-fraction">{brl(price).split(",")[1]}'
+            f'</span></span></span>{orig_html}</a></div>'
+        )
+        items.append(
+            f'<div data-asin="{asin}" data-index="{i+2}" data-uuid="{rnd.getrandbits(64):x}" '
+            f'data-component-type="s-search-result" class="sg-col-4-of-24 sg-col-4-of-12 s-result-item s-asin '
+            f'sg-col-4-of-16 sg-col s-widget-spacing-small sg-col-4-of-20" data-component-id="{i+10}" '
+            f'data-cel-widget="search_result_{i+1}"><div class="sg-col-inner"><div cel_widget_id="MAIN-SEARCH_RESULTS-{i+1}" '
+            f'class="s-widget-container s-spacing-small s-widget-container-height-small celwidget slot=MAIN '
+            f'template=SEARCH_RESULTS widgetId=search-results_{i+1}"><span class="a-declarative" '
+            f'data-action="puis-card-container-declarative"><div class="puis-card-container s-card-container '
+            f's-overflow-hidden aok-relative puis-expand-height puis-include-content-margin puis s-latency-cf-section '
+            f'puis-card-border"><div class="a-section a-spacing-base"><div class="s-product-image-container '
+            f'aok-relative s-text-center s-image-overlay-grey puis-image-overlay-grey s-padding-left-small '
+            f's-padding-right-small puis-spacing-small s-height-equalized puis"><span '
+            f'data-component-type="s-product-image" class="rush-component"><a class="a-link-normal s-no-outline" '
+            f'href="{href}"><div class="a-section aok-relative s-image-square-aspect"><img class="s-image" '
+            f'src="https://m.media-amazon.com/images/I/{asin}._AC_UL320_.jpg" '
+            f'srcset="https://m.media-amazon.com/images/I/{asin}._AC_UL320_.jpg 1x, '
+            f'https://m.media-amazon.com/images/I/{asin}._AC_UL480_FMwebp_QL65_.jpg 1.5x" alt="{t}" '
+            f'data-image-index="{i+1}" data-image-load="" data-image-latency="s-product-image" '
+            f'data-image-source-density="1"></div></a></span></div><div class="a-section a-spacing-small '
+            f'puis-padding-left-small puis-padding-right-small"><div data-cy="title-recipe" class="a-section '
+            f'a-spacing-none a-spacing-top-small s-title-instructions-style"><h2 class="a-size-mini a-spacing-none '
+            f'a-color-base s-line-clamp-4"><a class="a-link-normal s-underline-text s-underline-link-text '
+            f's-link-style a-text-normal" href="{href}"><span class="a-size-base-plus a-color-base a-text-normal">'
+            f'{t}</span></a></h2></div><div data-cy="reviews-block" class="a-section a-spacing-none '
+            f'a-spacing-top-micro"><div class="a-row a-size-small"><span aria-label="{rnd.randint(30,50)/10:.1f} '
+            f'de 5 estrelas"><span class="a-declarative" data-action="a-popover"><a href="javascript:void(0)" '
+            f'role="button" class="a-popover-trigger a-declarative"><i class="a-icon a-icon-star-small '
+            f'a-star-small-4-5 aok-align-bottom"><span class="a-icon-alt">4,5 de 5 estrelas</span></i>'
+            f'<i class="a-icon a-icon-popover"></i></a></span></span><span aria-label="{rnd.randint(10,9999)}">'
+            f'<a class="a-link-normal s-underline-text s-underline-link-text s-link-style" '
+            f'href="{href}#customerReviews"><span class="a-size-base s-underline-text">{rnd.randint(10,9999)}'
+            f'</span></a></span></div></div><div data-cy="price-recipe" class="a-section a-spacing-none '
+            f'a-spacing-top-small s-price-instructions-style">{price_html}</div><div data-cy="delivery-recipe" '
+            f'class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-base a-color-secondary '
+            f's-align-children-center"><span aria-label="Entrega GRÁTIS"><span class="a-color-base">Entrega GRÁTIS'
+            f'</span></span></div></div></div></div></div></span></div></div></div>'
+        )
+
+    nav = "".join(
+        f'<li class="nav-li"><a href="/b?node={rnd.randint(1, 10**9)}" class="nav-a">{rnd.choice(WORDS)}</a></li>'
+        for _ in range(250)
+    )
+    pagination = (
+        f'<div class="a-section a-text-center s-pagination-container" role="navigation">'
+        f'<span class="s-pagination-strip"><a href="/s?k=ofertas&amp;page={n+1}" class="s-pagination-item '
+        f's-pagination-next s-pagination-button s-pagination-separator">Próximo</a></span></div>'
+    )
+    return (
+        f'<!doctype html><html lang="pt-br" class="a-no-js"><head><meta charset="utf-8">'
+        f'<title>Amazon.com.br : ofertas do dia</title><link rel="stylesheet" '
+        f'href="https://m.media-amazon.com/images/I/style.css"><script>{AMAZON_NOISE_JS}</script></head><body>'
+        f'<header id="navbar"><ul class="nav-ul">{nav}</ul></header><div id="search"><div '
+        f'class="s-desktop-width-max s-desktop-content s-opposite-dir s-wide-grid-style sg-row"><div '
+        f'class="sg-col-20-of-24 s-matching-dir sg-col-16-of-20 sg-col sg-col-8-of-12 sg-col-12-of-16"><div '
+        f'class="sg-col-inner"><span data-component-type="s-search-results" class="rush-component '
+        f's-latency-cf-section"><div class="s-main-slot s-result-list s-search-results sg-row">{"".join(items)}'
+        f'</div></span>{pagination}</div></div></div></div><script>{AMAZON_NOISE_JS}</script></body></html>'
+    )
+
+
+def mercadolivre_page(rnd: random.Random, n: int) -> str:
+    """
+    Página de ofertas do Mercado Livre com 48 itens e o estado pré-carregado.
+    """
+    items = []
+    for _ in range(48):
+        mlb = rnd.randint(10**9, 10**10 - 1)
+        t = title(rnd)
+        slug = "-".join(t.lower().split()[:6])
+        url = f"https://produto.mercadolivre.com.br/MLB-{mlb}-{slug}-_JM"
+        price = rnd.randint(19, 4999)
+        prev = int(price * rnd.uniform(1.1, 2.0))
+        pct = round(100 - price * 100 / prev)
+        items.append(
+            f'<li class="promotion-item default"><a href="{url}#polycard_client=offers&amp;'
+            f'deal_print_id={rnd.getrandbits(64):x}" class="promotion-item__link-container"><div '
+            f'class="promotion-item__img-container"><img decoding="async" '
+            f'src="https://http2.mlstatic.com/D_Q_NP_{mlb}-O.webp" class="promotion-item__img" alt="{t}"></div>'
+            f'<div class="promotion-item__description"><p class="promotion-item__today-offer-text">OFERTA DO DIA</p>'
+            f'<p class="promotion-item__title">{t}</p><div class="andes-money-amount-combo"><s '
+            f'class="andes-money-amount andes-money-amount--previous andes-money-amount--cents-comma" role="img" '
+            f'aria-label="Antes: {prev} reais"><span class="andes-money-amount__currency-symbol" '
+            f'aria-hidden="true">R$</span><span class="andes-money-amount__fraction" aria-hidden="true">{prev}'
+            f'</span></s><div class="andes-money-amount-combo__main-container"><span class="andes-money-amount '
+            f'andes-money-amount--cents-superscript" role="img" aria-label="Agora: {price} reais"><span '
+            f'class="andes-money-amount__currency-symbol" aria-hidden="true">R$</span><span '
+            f'class="andes-money-amount__fraction" aria-hidden="true">{price}</span></span><span '
+            f'class="andes-money-amount__discount">{pct}% OFF</span></div></div><span '
+            f'class="promotion-item__installments">em 10x R$ {price/10:.2f} sem juros</span><span '
+            f'class="promotion-item__shipping">Frete grátis</span><span class="promotion-item__seller">Por '
+            f'{rnd.choice(WORDS)} Store</span></div></a></li>'
+        )
+
+    state = json.dumps({"initialState": {"items": [
+        {"id": f"MLB{rnd.randint(10**9, 10**10)}", "attrs": "y" * 120} for _ in range(600)
+    ]}})
+    nav = "".join(
+        f'<li class="nav-categs-departments__list"><a href="https://www.mercadolivre.com.br/c/'
+        f'{rnd.randint(1, 10**6)}">{rnd.choice(WORDS)}</a></li>'
+        for _ in range(200)
+    )
+    return (
+        f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Ofertas | Mercado Livre</title>'
+        f'<link rel="stylesheet" href="https://http2.mlstatic.com/frontend-assets/deals.css"></head><body>'
+        f'<header class="nav-header"><ul>{nav}</ul></header><main id="root-app"><section class="container">'
+        f'<ol class="items_container">{"".join(items)}</ol><ul class="andes-pagination"><li '
+        f'class="andes-pagination__button andes-pagination__button--next"><a '
+        f'href="https://www.mercadolivre.com.br/ofertas?page={n+1}" class="andes-pagination__link" '
+        f'title="Seguinte">Seguinte</a></li></ul></section></main><script id="__PRELOADED_STATE__" '
+        f'type="application/json">{state}</script></body></html>'
+    )
+
+
+def generate(directory: Path = DATA_DIR, pages: int = PAGES, seed: int = SEED):
+    """
+    Grava ``page1.html`` ... ``pageN.html`` de cada merchant em ``directory``.
+
+    As páginas são geradas alternando os merchants, na ordem em que as
+    páginas de ``benchmark_data/`` foram criadas.
+    """
+    rnd = random.Random(seed)
+    for merchant in ("amazon", "mercadolivre"):
+        (directory / merchant).mkdir(parents=True, exist_ok=True)
+
+    for n in range(1, pages + 1):
+        for merchant, build in (("amazon", amazon_page), ("mercadolivre", mercadolivre_page)):
+            path = directory / merchant / f"page{n}.html"
+            path.write_text(build(rnd, n), encoding="utf-8")
+            print(f"Página salva em: {path}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera as páginas sintéticas do benchmark")
+    parser.add_argument("--out", type=Path, default=DATA_DIR, help="Diretório de saída")
+    parser.add_argument("--pages", type=int, default=PAGES, help="Páginas por merchant")
+    args = parser.parse_args(argv)
+
+    generate(args.out, args.pages)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Pool de navegadores Playwright reutilizados entre execuções do scraper.
+
+Subir o Chromium é o maior custo fixo de cada coleta, então o processo do
+scheduler mantém um navegador aquecido e entrega a cada merchant um contexto
+isolado (cookies, cache e storage próprios). O navegador é reciclado após um
+número máximo de páginas ou se cair. Os contextos recebem o perfil de bloqueio
+de recursos do merchant (ver ``scraper.resource_blocking``).
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from loguru import logger
+from playwright.async_api import async_playwright
+
+from scraper.resource_blocking import (
+    BLOCK_RESOURCES, BlockingProfile, BlockingStats, ResourceBlocker
+)
+from scraper.utils import get_random_headers
+
+
+# Número de páginas servidas por um navegador antes de ser reciclado
+BROWSER_MAX_PAGES = int(os.getenv("BDD_BROWSER_MAX_PAGES", "200"))
+
+# Opções padrão dos contextos entregues aos scrapers
+DEFAULT_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1280, "height": 800},
+}
+
+DEFAULT_HTTP_HEADERS = {
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"
+}
+
+
+class BrowserPool:
+    """
+    Mantém um Chromium aquecido e entrega contextos isolados por merchant.
+
+    Quando o navegador atinge ``max_pages`` páginas (ou é desconectado), um
+    novo é lançado para as próximas requisições; o antigo só é fechado quando
+    os contextos que ainda o usam terminam.
+    """
+
+    def __init__(self, max_pages: int = BROWSER_MAX_PAGES, headless: bool = True,
+                 playwright_factory=None, block_resources: bool = BLOCK_RESOURCES):
+        """
+        Args:
+            max_pages: Páginas por navegador antes de reciclar
+            headless: Executa o Chromium sem interface
+            playwright_factory: Fábrica do Playwright (padrão: async_playwright)
+            block_resources: Aplica o perfil de bloqueio de recursos nos contextos
+        """
+        if max_pages < 1:
+            raise ValueError("max_pages precisa ser pelo menos 1")
+        self.max_pages = max_pages
+        self.headless = headless
+        self._playwright_factory = playwright_factory
+        self.block_resources = block_resources
+        self.blocking_stats = {}
+        self._playwright = None
+        self._browser = None
+        self._pages_served = {}
+        self._active = {}
+        self._lock = asyncio.Lock()
+        self.launches = 0
+
+    async def _launch(self):
+        """
+        Lança um novo navegador, iniciando o Playwright se necessário.
+        """
+        if self._playwright is None:
+            factory = self._playwright_factory or async_playwright
+            self._playwright = await factory().start()
+
+        browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.launches += 1
+        self._pages_served[browser] = 0
+        self._active[browser] = 0
+        logger.info(f"Navegador lançado (#{self.launches})")
+        return browser
+
+    def _needs_recycle(self) -> bool:
+        """Indica se o navegador atual precisa ser substituído."""
+        return (
+            self._browser is None
+            or not self._browser.is_connected()
+            or self._pages_served[self._browser] >= self.max_pages
+        )
+
+    async def _retire(self, browser):
+        """
+        Fecha o navegador se nenhum contexto o estiver usando.
+        """
+        if browser is self._browser or self._active.get(browser, 0) > 0:
+            return
+        self._active.pop(browser, None)
+        self._pages_served.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar navegador reciclado: {str(e)}")
+
+    async def _acquire_browser(self):
+        """
+        Retorna o navegador atual, reciclando-o se necessário.
+        """
+        async with self._lock:
+            if self._needs_recycle():
+                old = self._browser
+                self._browser = await self._launch()
+                if old is not None:
+                    logger.info("Reciclando navegador")
+                    await self._retire(old)
+            self._active[self._browser] += 1
+            return self._browser
+
+    async def _release_browser(self, browser):
+        """
+        Libera o uso do navegador e fecha-o se já tiver sido substituído.
+        """
+        async with self._lock:
+            if browser in self._active:
+                self._active[browser] -= 1
+                await self._retire(browser)
+
+    def _count_page(self, browser):
+        """Contabiliza uma página aberta no navegador informado."""
+        if browser in self._pages_served:
+            self._pages_served[browser] += 1
+
+    @asynccontextmanager
+    async def context(self, merchant: str, blocking_profile: BlockingProfile = None,
+                      **context_options):
+        """
+        Fornece um contexto de navegador novo e isolado para o merchant.
+
+        Args:
+            merchant: Nome do merchant (usado nos logs e na allowlist)
+            blocking_profile: Perfil de bloqueio (padrão: o do merchant)
+            **context_options: Opções extras para ``browser.new_context``
+        """
+        options = {
+            **DEFAULT_CONTEXT_OPTIONS,
+            "user_agent": get_random_headers()["User-Agent"],
+            "extra_http_headers": DEFAULT_HTTP_HEADERS,
+            **context_options,
+        }
+
+        browser = await self._acquire_browser()
+        context = None
+        blocker = None
+        try:
+            context = await browser.new_context(**options)
+            context.on("page", lambda page: self._count_page(browser))
+            if self.block_resources:
+                blocker = ResourceBlocker(blocking_profile or BlockingProfile.for_merchant(merchant))
+                await blocker.attach(context)
+            logger.info(f"Contexto de navegador aberto para {merchant}")
+            yield context
+        finally:
+            if blocker is not None:
+                self._record_blocking(merchant, blocker.stats)
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Erro ao fechar contexto de {merchant}: {str(e)}")
+            await self._release_browser(browser)
+
+    def _record_blocking(self, merchant: str, stats: BlockingStats):
+        """
+        Acumula os contadores de bloqueio do contexto encerrado no merchant.
+        """
+        total = self.blocking_stats.setdefault(merchant, BlockingStats())
+        total.merge(stats)
+        logger.info(
+            f"{merchant}: {stats.blocked_requests} requisições bloqueadas "
+            f"(~{stats.blocked_bytes // 1024} KB), {stats.allowed_requests} liberadas"
+        )
+
+    async def close(self):
+        """
+        Fecha todos os navegadores e encerra o Playwright.
+        """
+        async with self._lock:
+            for browser in list(self._active):
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+            self._active = {}
+            self._pages_served = {}
+            self._browser = None
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+@asynccontextmanager
+async def merchant_context(browser_pool, merchant: str, **context_options):
+    """
+    Fornece um contexto do pool informado ou de um pool temporário.
+
+    Sem pool (ex: execução avulsa de um scraper), abre um navegador só para
+    esta coleta e o fecha ao final.
+    """
+    own_pool = browser_pool is None
+    if own_pool:
+        browser_pool = BrowserPool()
+
+    try:
+        async with browser_pool.context(merchant, **context_options) as context:
+            yield context
+    finally:
+        if own_pool:
+            await browser_pool.close()
@@ -0,0 +1,164 @@
+"""
+Estratégia de busca das páginas: HTTP primeiro, navegador só como fallback.
+
+Páginas renderizadas no servidor podem ser baixadas com um ``httpx.AsyncClient``
+compartilhado e lidas com BeautifulSoup, gastando uma fração da CPU e memória
+do Chromium. Se o HTTP falhar ou a página vier sem produtos (captcha, conteúdo
+montado por JavaScript), a coleta é refeita pelo Playwright.
+"""
+import os
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from scraper.rate_limiter import RateLimiter, is_captcha_page, parse_retry_after, rate_limiter
+from scraper.utils import get_random_headers
+
+
+# Tenta o caminho HTTP antes de abrir o navegador
+HTTP_FIRST = os.getenv("BDD_HTTP_FIRST", "1").lower() not in ("0", "false", "no")
+
+# Tempo máximo (s) de cada requisição HTTP
+HTTP_TIMEOUT = float(os.getenv("BDD_HTTP_TIMEOUT", "15"))
+
+# Conexões simultâneas mantidas pelo cliente HTTP
+HTTP_MAX_CONNECTIONS = int(os.getenv("BDD_HTTP_MAX_CONNECTIONS", "10"))
+
+# Caminhos registrados nas estatísticas
+PATH_HTTP = "http"
+PATH_BROWSER = "browser"
+PATH_FAILED = "failed"
+
+
+class FetchStrategy:
+    """
+    Coleta as ofertas de um merchant pelo HTTP e, se preciso, pelo navegador.
+
+    Mantém um cliente HTTP com pool de conexões e, por merchant, quantas
+    coletas terminaram em cada caminho.
+    """
+
+    def __init__(self, http_first: bool = HTTP_FIRST, client: Optional[httpx.AsyncClient] = None,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            http_first: Tenta o caminho HTTP antes do navegador
+            client: Cliente HTTP (padrão: um cliente próprio, criado sob demanda)
+            limiter: Limite de requisições por host (padrão: o do processo)
+        """
+        self.http_first = http_first
+        self.limiter = limiter or rate_limiter
+        self._client = client
+        self._own_client = client is None
+        self.stats: Dict[str, Counter] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado pelas coletas."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=get_random_headers(),
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def fetch_html(self, url: str) -> Optional[str]:
+        """
+        Baixa a página por HTTP, dentro do limite de requisições do host.
+
+        Returns:
+            str: HTML da página, ou None em caso de erro, status diferente de
+                200 ou página de captcha
+        """
+        try:
+            async with self.limiter.slot(url):
+                response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Falha no HTTP para {url}: {str(e)}")
+            return None
+
+        captcha = response.status_code == 200 and is_captcha_page(response.text)
+        self.limiter.report(
+            url, status=response.status_code, captcha=captcha,
+            retry_after=parse_retry_after(response.headers.get("retry-after")),
+        )
+
+        if response.status_code != 200:
+            logger.warning(f"HTTP {response.status_code} para {url}")
+            return None
+        if captcha:
+            logger.warning(f"Captcha em {url}")
+            return None
+        return response.text
+
+    def record(self, merchant: str, path: str):
+        """Contabiliza o caminho usado em uma coleta do merchant."""
+        self.stats.setdefault(merchant, Counter())[path] += 1
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retorna, por merchant, quantas coletas terminaram em cada caminho.
+        """
+        return {merchant: dict(counter) for merchant, counter in self.stats.items()}
+
+    async def collect(self, merchant: str,
+                      http_collect: Callable[[], Awaitable[List]],
+                      browser_collect: Callable[[], Awaitable[List]]) -> List:
+        """
+        Executa a coleta pelo HTTP e cai para o navegador se não vier conteúdo.
+
+        Args:
+            merchant: Nome do merchant
+            http_collect: Coleta pelo caminho HTTP
+            browser_collect: Coleta pelo Playwright
+
+        Returns:
+            list: Ofertas coletadas
+        """
+        if self.http_first:
+            try:
+                offers = await http_collect()
+            except Exception as e:
+                logger.warning(f"{merchant}: erro no caminho HTTP: {str(e)}")
+                offers = []
+
+            if offers:
+                self.record(merchant, PATH_HTTP)
+                logger.info(f"{merchant}: {len(offers)} ofertas pelo HTTP")
+                return offers
+
+            print(f"{merchant}: conteúdo não encontrado pelo HTTP, usando o navegador")
+            logger.info(f"{merchant}: conteúdo não encontrado pelo HTTP, usando o navegador")
+
+        offers = await browser_collect()
+        self.record(merchant, PATH_BROWSER if offers else PATH_FAILED)
+        return offers
+
+    async def close(self):
+        """
+        Fecha o cliente HTTP, se tiver sido criado por esta estratégia.
+        """
+        if self._client is not None and self._own_client:
+            await self._client.aclose()
+        self._client = None
+
+
+@asynccontextmanager
+async def merchant_fetcher(fetcher: Optional[FetchStrategy]):
+    """
+    Fornece a estratégia informada ou uma temporária, fechada ao final.
+    """
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = FetchStrategy()
+
+    try:
+        yield fetcher
+    finally:
+        if own_fetcher:
+            await fetcher.close()
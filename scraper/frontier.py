@@ -0,0 +1,408 @@
+"""
+Fila persistente de URLs a coletar (crawl frontier).
+
+Cada item é um par (merchant, url) com prioridade e data do próximo vencimento.
+Os workers pegam itens vencidos por empréstimo (lease): enquanto o lease vale,
+nenhum outro worker pega o mesmo item; se o processo cair, o lease expira e o
+item volta para a fila. Falhas são refeitas com espera crescente até o limite
+de tentativas; depois disso o item fica ``failed`` e só é tentado de novo após
+um longo intervalo.
+
+O intervalo entre coletas de cada URL se adapta ao que elas encontram: dobra a
+cada coleta sem mudanças e cai pela metade quando boa parte das ofertas mudou.
+Um orçamento global de páginas por hora limita os empréstimos, e as URLs que
+mais mudam saem antes.
+
+Uso:
+    python -m scraper.frontier add amazon "https://www.amazon.com.br/s?k=fone" --priority 5
+    python -m scraper.frontier stats
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from loguru import logger
+
+from api.models import close_pool, get_pool, init_db
+
+
+# Tempo (s) de um lease; precisa cobrir a coleta de um item
+CRAWL_LEASE_SECONDS = int(os.getenv("BDD_CRAWL_LEASE_SECONDS", "900"))
+
+# Tentativas seguidas com falha antes de o item ser suspenso (situação failed)
+CRAWL_MAX_ATTEMPTS = int(os.getenv("BDD_CRAWL_MAX_ATTEMPTS", "5"))
+
+# Espera (s) antes da primeira nova tentativa; dobra a cada falha
+CRAWL_RETRY_DELAY = int(os.getenv("BDD_CRAWL_RETRY_DELAY", "300"))
+
+# Espera (s) antes de tentar de novo um item abandonado (``failed``)
+CRAWL_FAILED_COOLOFF = int(os.getenv("BDD_CRAWL_FAILED_COOLOFF", "86400"))
+
+# Intervalo (s) inicial até uma URL coletada com sucesso vencer de novo
+CRAWL_RECRAWL_INTERVAL = int(os.getenv("BDD_CRAWL_RECRAWL_INTERVAL", "3600"))
+
+# Limites (s) do intervalo adaptativo de cada URL
+CRAWL_MIN_INTERVAL = int(os.getenv("BDD_CRAWL_MIN_INTERVAL", "900"))
+CRAWL_MAX_INTERVAL = int(os.getenv("BDD_CRAWL_MAX_INTERVAL", "86400"))
+
+# Fator de aumento (sem mudanças) e de redução (URL volátil) do intervalo
+CRAWL_BACKOFF_FACTOR = float(os.getenv("BDD_CRAWL_BACKOFF_FACTOR", "2"))
+
+# Fração de ofertas novas ou alteradas a partir da qual a URL é volátil
+CRAWL_VOLATILE_RATIO = float(os.getenv("BDD_CRAWL_VOLATILE_RATIO", "0.2"))
+
+# Peso da última coleta na frequência de mudanças (média móvel exponencial)
+CRAWL_CHANGE_ALPHA = float(os.getenv("BDD_CRAWL_CHANGE_ALPHA", "0.3"))
+
+# Variação aleatória (fração) do intervalo, para as URLs não vencerem juntas
+CRAWL_JITTER = float(os.getenv("BDD_CRAWL_JITTER", "0.1"))
+
+# Páginas emprestadas por hora, somando todos os merchants (0 = sem limite)
+CRAWL_BUDGET_PER_HOUR = int(os.getenv("BDD_CRAWL_BUDGET_PER_HOUR", "200"))
+
+# Folga (s) descontada do próximo vencimento: o scheduler dispara a cada
+# intervalo a partir do início da execução, e o item é emprestado um pouco
+# depois; sem a folga ele só venceria no disparo seguinte
+CRAWL_DUE_SLACK = int(os.getenv("BDD_CRAWL_DUE_SLACK", "120"))
+
+# Situação dos itens
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+
+ADD_ITEM_QUERY = """
+    INSERT INTO crawl_frontier (merchant, url, priority, next_due)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(merchant, url) DO UPDATE SET
+        priority = MAX(priority, excluded.priority)
+"""
+
+LEASE_QUERY = """
+    UPDATE crawl_frontier
+    SET leased_until = ?, lease_owner = ?
+    WHERE id IN (
+        SELECT id FROM crawl_frontier
+        WHERE status IN ('pending', 'failed') AND next_due <= ?
+          AND (leased_until IS NULL OR leased_until <= ?)
+          {merchant_filter}
+        ORDER BY priority DESC, change_rate DESC, next_due
+        LIMIT ?
+    )
+    RETURNING id, merchant, url, priority, attempts, refresh_interval, change_rate
+"""
+
+COMPLETE_QUERY = """
+    UPDATE crawl_frontier
+    SET next_due = ?, last_crawled = ?, status = 'pending', attempts = 0, last_error = NULL,
+        leased_until = NULL, lease_owner = NULL, refresh_interval = ?, change_rate = ?
+    WHERE id = ? AND lease_owner = ?
+"""
+
+# Páginas emprestadas por hora (formato do bucket: BUDGET_HOUR_FORMAT)
+BUDGET_USED_QUERY = "SELECT pages FROM crawl_budget WHERE hour = ?"
+
+BUDGET_SPEND_QUERY = """
+    INSERT INTO crawl_budget (hour, pages) VALUES (?, ?)
+    ON CONFLICT(hour) DO UPDATE SET pages = pages + excluded.pages
+"""
+
+BUDGET_PRUNE_QUERY = "DELETE FROM crawl_budget WHERE hour < ?"
+
+BUDGET_HOUR_FORMAT = "%Y-%m-%dT%H"
+
+FAIL_QUERY = """
+    UPDATE crawl_frontier
+    SET next_due = ?, status = ?, attempts = ?, last_error = ?,
+        leased_until = NULL, lease_owner = NULL
+    WHERE id = ? AND lease_owner = ?
+"""
+
+RELEASE_QUERY = """
+    UPDATE crawl_frontier
+    SET leased_until = NULL, lease_owner = NULL
+    WHERE id = ? AND lease_owner = ?
+"""
+
+STATS_QUERY = """
+    SELECT merchant, status, COUNT(*) AS total, MIN(next_due) AS next_due
+    FROM crawl_frontier
+    GROUP BY merchant, status
+"""
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+@dataclass
+class FrontierItem:
+    """
+    Item emprestado da fila.
+    """
+    id: int
+    merchant: str
+    url: str
+    priority: int
+    attempts: int
+    lease_owner: str
+    leased_at: Optional[datetime.datetime] = None
+    refresh_interval: Optional[int] = None
+    change_rate: float = 0.5
+
+
+class CrawlFrontier:
+    """
+    Fila de URLs a coletar, guardada na tabela ``crawl_frontier``.
+    """
+
+    def __init__(self, lease_seconds: int = CRAWL_LEASE_SECONDS,
+                 max_attempts: int = CRAWL_MAX_ATTEMPTS,
+                 retry_delay: int = CRAWL_RETRY_DELAY,
+                 recrawl_interval: int = CRAWL_RECRAWL_INTERVAL,
+                 failed_cooloff: int = CRAWL_FAILED_COOLOFF,
+                 due_slack: int = CRAWL_DUE_SLACK,
+                 min_interval: int = CRAWL_MIN_INTERVAL,
+                 max_interval: int = CRAWL_MAX_INTERVAL,
+                 budget_per_hour: int = CRAWL_BUDGET_PER_HOUR,
+                 jitter: float = CRAWL_JITTER):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.recrawl_interval = recrawl_interval
+        self.failed_cooloff = failed_cooloff
+        self.due_slack = due_slack
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_per_hour = budget_per_hour
+        self.jitter = jitter
+
+    async def add(self, merchant: str, url: str, priority: int = 0,
+                  due: Optional[datetime.datetime] = None):
+        """Adiciona uma URL à fila (ver ``add_many``)."""
+        await self.add_many([(merchant, url)], priority, due)
+
+    async def add_many(self, entries: Iterable[Tuple[str, str]], priority: int = 0,
+                       due: Optional[datetime.datetime] = None):
+        """
+        Adiciona URLs à fila, sem duplicar as que já existem.
+
+        URLs já cadastradas mantêm a data de vencimento e a situação; só a
+        prioridade pode subir.
+
+        Args:
+            entries: Pares (merchant, url)
+            priority: Prioridade (maior sai antes)
+            due: Primeiro vencimento (padrão: agora)
+        """
+        due = (due or _now()).isoformat()
+        params = [(merchant, url, priority, due) for merchant, url in entries]
+        if not params:
+            return
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            await db.executemany(ADD_ITEM_QUERY, params)
+
+    async def lease(self, owner: str, merchants: Optional[List[str]] = None,
+                    limit: int = 1) -> List[FrontierItem]:
+        """
+        Empresta os itens vencidos de maior prioridade e, entre eles, os que
+        mais mudam, dentro do orçamento de páginas da hora.
+
+        Args:
+            owner: Identificação do worker (só ele pode concluir o item)
+            merchants: Restringe a estes merchants (todos se None)
+            limit: Número máximo de itens
+
+        Returns:
+            list: Itens emprestados (vazia se nada estiver vencido ou se o
+                orçamento da hora acabou)
+        """
+        now = _now()
+        hour = now.strftime(BUDGET_HOUR_FORMAT)
+        merchant_filter = ""
+        params = [(now + datetime.timedelta(seconds=self.lease_seconds)).isoformat(), owner,
+                  now.isoformat(), now.isoformat()]
+        if merchants:
+            merchant_filter = f"AND merchant IN ({', '.join('?' for _ in merchants)})"
+            params.extend(merchants)
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            if self.budget_per_hour > 0:
+                used = await db.execute_fetchall(BUDGET_USED_QUERY, (hour,))
+                limit = min(limit, self.budget_per_hour - (used[0]["pages"] if used else 0))
+                if limit <= 0:
+                    return []
+
+            rows = await db.execute_fetchall(
+                LEASE_QUERY.format(merchant_filter=merchant_filter), [*params, limit]
+            )
+            if rows and self.budget_per_hour > 0:
+                await db.execute(BUDGET_SPEND_QUERY, (hour, len(rows)))
+                yesterday = (now - datetime.timedelta(days=1)).strftime(BUDGET_HOUR_FORMAT)
+                await db.execute(BUDGET_PRUNE_QUERY, (yesterday,))
+
+        items = [FrontierItem(row["id"], row["merchant"], row["url"], row["priority"],
+                              row["attempts"], owner, now, row["refresh_interval"],
+                              row["change_rate"]) for row in rows]
+        return sorted(items, key=lambda item: (-item.priority, -item.change_rate))
+
+    def next_interval(self, item: FrontierItem, change_ratio: Optional[float]) -> int:
+        """
+        Calcula o novo intervalo (s) entre coletas da URL.
+
+        Sem mudanças o intervalo cresce por ``CRAWL_BACKOFF_FACTOR``; com pelo
+        menos ``CRAWL_VOLATILE_RATIO`` das ofertas novas ou alteradas ele
+        diminui pelo mesmo fator; entre os dois (ou sem medição) é mantido.
+
+        Args:
+            item: Item emprestado
+            change_ratio: Fração das ofertas da página que eram novas ou
+                tinham mudado (None se desconhecida)
+        """
+        interval = item.refresh_interval or self.recrawl_interval
+        if change_ratio is not None:
+            if change_ratio <= 0:
+                interval *= CRAWL_BACKOFF_FACTOR
+            elif change_ratio >= CRAWL_VOLATILE_RATIO:
+                interval /= CRAWL_BACKOFF_FACTOR
+        return int(min(self.max_interval, max(self.min_interval, interval)))
+
+    async def complete(self, item: FrontierItem, change_ratio: Optional[float] = None,
+                       next_due: Optional[datetime.datetime] = None):
+        """
+        Marca o item como coletado e agenda a próxima coleta.
+
+        O intervalo (ver ``next_interval``, com a variação ``jitter``) conta a
+        partir do empréstimo (não do fim da coleta), menos a folga
+        ``due_slack``, para a URL vencer a tempo do próximo disparo do
+        scheduler. A frequência de mudanças (``change_rate``) é uma média
+        móvel das coletas que encontraram alguma mudança.
+
+        Args:
+            item: Item emprestado
+            change_ratio: Fração das ofertas novas ou alteradas na coleta
+            next_due: Próximo vencimento (padrão: calculado pelo intervalo)
+        """
+        now = _now()
+        interval = self.next_interval(item, change_ratio)
+        change_rate = item.change_rate
+        if change_ratio is not None:
+            changed = 1.0 if change_ratio > 0 else 0.0
+            change_rate = CRAWL_CHANGE_ALPHA * changed + (1 - CRAWL_CHANGE_ALPHA) * change_rate
+
+        if next_due is None:
+            wait = interval * (1 + random.uniform(-self.jitter, self.jitter)) - self.due_slack
+            next_due = (item.leased_at or now) + datetime.timedelta(seconds=wait)
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            await db.execute(COMPLETE_QUERY, (next_due.isoformat(), now.isoformat(), interval,
+                                              round(change_rate, 4), item.id, item.lease_owner))
+
+    async def fail(self, item: FrontierItem, error: str):
+        """
+        Registra a falha do item e agenda uma nova tentativa.
+
+        A espera dobra a cada falha seguida; depois de ``max_attempts``
+        falhas o item fica com situação ``failed`` e só volta a ser emprestado
+        depois de ``failed_cooloff`` (uma nova falha repete a espera; um
+        sucesso o devolve à situação ``pending``).
+        """
+        attempts = item.attempts + 1
+        if attempts >= self.max_attempts:
+            status, delay = STATUS_FAILED, self.failed_cooloff
+        else:
+            status, delay = STATUS_PENDING, self.retry_delay * 2 ** (attempts - 1)
+        next_due = _now() + datetime.timedelta(seconds=delay)
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            await db.execute(FAIL_QUERY, (next_due.isoformat(), status, attempts, error,
+                                          item.id, item.lease_owner))
+
+        if status == STATUS_FAILED:
+            logger.warning(
+                f"{item.merchant}: {item.url} suspensa por {self.failed_cooloff}s "
+                f"após {attempts} falhas ({error})"
+            )
+
+    async def release(self, item: FrontierItem):
+        """
+        Devolve o item à fila sem contar tentativa (ex: coleta interrompida
+        no desligamento).
+        """
+        pool = await get_pool()
+        async with pool.writer() as db:
+            await db.execute(RELEASE_QUERY, (item.id, item.lease_owner))
+
+    async def budget_used(self) -> int:
+        """Páginas emprestadas na hora atual."""
+        pool = await get_pool()
+        async with pool.reader() as db:
+            rows = await db.execute_fetchall(
+                BUDGET_USED_QUERY, (_now().strftime(BUDGET_HOUR_FORMAT),)
+            )
+        return rows[0]["pages"] if rows else 0
+
+    async def stats(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        Retorna, por merchant e situação, o número de itens e o próximo vencimento.
+        """
+        pool = await get_pool()
+        async with pool.reader() as db:
+            rows = await db.execute_fetchall(STATS_QUERY)
+
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for row in rows:
+            stats.setdefault(row["merchant"], {})[row["status"]] = {
+                "total": row["total"], "next_due": row["next_due"],
+            }
+        return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fila de URLs do scraper")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Adiciona URLs à fila")
+    add.add_argument("merchant")
+    add.add_argument("urls", nargs="+")
+    add.add_argument("--priority", type=int, default=0)
+
+    commands.add_parser("stats", help="Mostra a situação da fila")
+
+    args = parser.parse_args(argv)
+
+    async def run():
+        await init_db()
+        frontier = CrawlFrontier()
+        try:
+            if args.command == "add":
+                await frontier.add_many([(args.merchant, url) for url in args.urls], args.priority)
+                print(f"{len(args.urls)} URL(s) adicionada(s) para {args.merchant}")
+            else:
+                for merchant, statuses in (await frontier.stats()).items():
+                    for status, info in statuses.items():
+                        print(f"{merchant:<15}{status:<10}{info['total']:>6}  próximo: {info['next_due']}")
+                budget = frontier.budget_per_hour or "sem limite"
+                print(f"Páginas nesta hora: {await frontier.budget_used()} (orçamento: {budget})")
+        finally:
+            await close_pool()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ Coleta ofertas de e-commerces e salva no banco SQLite.
 """
 import asyncio
 import os
+import socket
 from pathlib import Path
 import sys
 
@@ -14,15 +15,21 @@ parent_dir = Path(__file__).resolve().parent.parent
 sys.path.append(str(parent_dir))
 print(f"Adicionado ao PYTHONPATH: {parent_dir}")
 
-import httpx
 from loguru import logger
-from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
-from tenacity import RetryError
 
-from api.models import upsert_offer
+from api.models import close_pool, init_db, sync_offers
+from scraper.browser_pool import BrowserPool, merchant_context
+from scraper.extractors import (
+    AMAZON_SELECTORS, MERCADOLIVRE_LINK_SELECTOR, MERCADOLIVRE_PRODUCT_SELECTORS,
+    extract_amazon_offers, extract_mercadolivre_offers, parse_amazon_html, parse_mercadolivre_html
+)
+from scraper.fetch_strategy import FetchStrategy, merchant_fetcher
+from scraper.frontier import CrawlFrontier
 from scraper.models import Offer, save_offers
-from scraper.utils import setup_logging, get_random_headers, calculate_discount, format_price, retry_with_backoff
+from scraper.rate_limiter import limited_click, limited_goto, rate_limiter
+from scraper.readiness import wait_for_results, wait_timings
+from scraper.utils import setup_logging
 
 
 # Inicializa o logger
@@ -43,33 +50,85 @@ def get_browser():
     return browser
 
 
-async def scrape_amazon(keyword="ofertas do dia", max_pages=2):
+def paged_url(url, page_num=1):
     """
-    Coleta ofertas da Amazon usando o Playwright para simular navegador.
+    Acrescenta o número da página (``page=N``) a uma URL de resultados.
+    """
+    if page_num == 1:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}page={page_num}"
+
+
+def amazon_search_url(keyword, page_num=1):
     """
-    print(f"Iniciando scraping da Amazon para: {keyword}")
-    logger.info(f"Iniciando scraping da Amazon para: {keyword}")
+    Monta a URL da página de resultados da Amazon.
+    """
+    return paged_url(f"https://www.amazon.com.br/s?k={keyword.replace(' ', '+')}", page_num)
+
+
+async def scrape_amazon(keyword="ofertas do dia", max_pages=2, browser_pool=None, fetcher=None, url=None):
+    """
+    Coleta ofertas da Amazon, pelo HTTP quando possível e pelo navegador se não.
+    
+    Args:
+        keyword: Termo buscado (ignorado se ``url`` for informada)
+        browser_pool: BrowserPool compartilhado (sem ele, abre um navegador próprio)
+        fetcher: FetchStrategy compartilhada (sem ela, usa uma temporária)
+        url: Página de resultados ou categoria a coletar
+    """
+    url = url or amazon_search_url(keyword)
+    print(f"Iniciando scraping da Amazon para: {url}")
+    logger.info(f"Iniciando scraping da Amazon para: {url}")
     results = []
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={"width": 1280, "height": 800},
-                user_agent=get_random_headers()["User-Agent"]
+        async with merchant_fetcher(fetcher) as fetcher:
+            results = await fetcher.collect(
+                "amazon",
+                http_collect=lambda: fetch_amazon_http(fetcher, url, max_pages),
+                browser_collect=lambda: scrape_amazon_browser(url, max_pages, browser_pool),
             )
-            
+    except Exception as e:
+        print(f"Erro no scraper da Amazon: {str(e)}")
+        logger.error(f"Erro no scraper da Amazon: {str(e)}")
+    
+    print(f"Amazon: coletadas {len(results)} ofertas")
+    logger.info(f"Amazon: coletadas {len(results)} ofertas")
+    return results
+
+
+async def fetch_amazon_http(fetcher, base_url, max_pages):
+    """
+    Coleta as páginas de resultados da Amazon por HTTP, sem navegador.
+    
+    Returns:
+        list: Ofertas encontradas (vazia se a primeira página vier sem produtos)
+    """
+    results = []
+    for page_num in range(1, max_pages + 1):
+        url = paged_url(base_url, page_num)
+        print(f"Baixando por HTTP: {url}")
+        html = await fetcher.fetch_html(url)
+        page_offers = parse_amazon_html(html) if html else []
+        if not page_offers:
+            break
+        results.extend(page_offers)
+    return results
+
+
+async def scrape_amazon_browser(base_url, max_pages, browser_pool=None):
+    """
+    Coleta ofertas da Amazon usando o Playwright para simular navegador.
+    """
+    results = []
+    
+    try:
+        async with merchant_context(browser_pool, "amazon") as context:
             page = await context.new_page()
             
-            # Configura a página com headers úteis
-            await page.set_extra_http_headers({
-                "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"
-            })
-            
             # Navega para a página inicial de ofertas
-            base_url = f"https://www.amazon.com.br/s?k={keyword.replace(' ', '+')}"
             print(f"Navegando para: {base_url}")
-            await page.goto(base_url, wait_until="domcontentloaded")
+            await limited_goto(page, base_url, wait_until="domcontentloaded")
             
             # Tira um screenshot para debug
             screenshot_path = Path(__file__).parent / "amazon_page.png"
@@ -81,154 +140,27 @@ async def scrape_amazon(keyword="ofertas do dia", max_pages=2):
                 print(f"Processando página {page_num}")
                 logger.info(f"Processando página {page_num}")
                 
-                # Espera pequena para carregar JavaScript
-                await page.wait_for_timeout(2000)
+                # Espera os resultados carregarem (substitui a pausa fixa de 2 s)
+                await wait_for_results(
+                    page, "amazon", AMAZON_SELECTORS["product"],
+                    label=f"página {page_num}", fixed_wait_ms=2000
+                )
                 
-                # Tenta localizar produtos usando diferentes seletores (Amazon muda com frequência)
-                selectors = [
-                    '[data-component-type="s-search-result"]',
-                    '.s-result-item.s-asin',
-                    '.s-card-container',
-                    '.sg-col-20-of-24 > .s-result-item'
-                ]
+                # Extrai todos os produtos da página em uma única chamada ao navegador
+                try:
+                    page_offers = await extract_amazon_offers(page)
+                except Exception as e:
+                    print(f"Erro ao extrair produtos: {str(e)}")
+                    logger.error(f"Erro ao extrair produtos: {str(e)}")
+                    page_offers = []
                 
-                products = []
-                for selector in selectors:
-                    try:
-                        products = await page.query_selector_all(selector)
-                        if products and len(products) > 0:
-                            print(f"Encontrados {len(products)} produtos com seletor '{selector}'")
-                            break
-                    except Exception as e:
-                        print(f"Erro com seletor '{selector}': {str(e)}")
-                
-                if not products:
+                if not page_offers:
                     print("Não foi possível encontrar produtos nesta página.")
                     continue
                 
-                # Processa cada produto encontrado
-                for product in products:
-                    try:
-                        # Extrai ASIN (ID do produto da Amazon)
-                        asin = await product.get_attribute('data-asin')
-                        if not asin:
-                            # Tenta extrair de outro atributo/seletor se necessário
-                            asin_el = await product.query_selector('[data-asin]')
-                            if asin_el:
-                                asin = await asin_el.get_attribute('data-asin')
-                        
-                        if not asin or asin == "":
-                            print("Produto sem ASIN válido, pulando...")
-                            continue
-                            
-                        print(f"Processando produto com ASIN: {asin}")
-                        
-                        # Extrai título
-                        title = "Sem título"
-                        title_selectors = [
-                            'h2 a span',
-                            '.a-text-normal',
-                            '.a-link-normal .a-text-normal',
-                            '.a-color-base.a-text-normal'
-                        ]
-                        
-                        for title_selector in title_selectors:
-                            title_el = await product.query_selector(title_selector)
-                            if title_el:
-                                title_text = await title_el.inner_text()
-                                if title_text and len(title_text.strip()) > 0:
-                                    title = title_text.strip()
-                                    break
-                        
-                        print(f"Título: {title[:50]}...")
-                        
-                        # Extrai URL
-                        url = ""
-                        link_selectors = [
-                            'h2 a',
-                            '.a-link-normal',
-                            '.a-link-normal[href*="/dp/"]'
-                        ]
-                        
-                        for link_selector in link_selectors:
-                            link_el = await product.query_selector(link_selector)
-                            if link_el:
-                                href = await link_el.get_attribute('href')
-                                if href and '/dp/' in href:
-                                    if href.startswith('/'):
-                                        url = f"https://www.amazon.com.br{href}"
-                                    else:
-                                        url = href
-                                    break
-                        
-                        # Se não encontrou URL, constrói com o ASIN
-                        if not url and asin:
-                            url = f"https://www.amazon.com.br/dp/{asin}"
-                            
-                        # Adiciona o ID de afiliado "wagnermontezu-20" aos links da Amazon
-                        if url and "amazon.com.br" in url and "tag=" not in url:
-                            separator = "&" if "?" in url else "?"
-                            url = f"{url}{separator}tag=wagnermontezu-20"
-                            
-                        print(f"URL: {url[:50]}...")
-                        
-                        # Extrai preço atual
-                        price = 0.0
-                        price_selectors = [
-                            '.a-price .a-offscreen',
-                            '.a-price-whole',
-                            '.a-color-price'
-                        ]
-                        
-                        for price_selector in price_selectors:
-                            price_el = await product.query_selector(price_selector)
-                            if price_el:
-                                price_text = await price_el.inner_text()
-                                if price_text:
-                                    price = format_price(price_text)
-                                    if price > 0:
-                                        break
-                        
-                        # Extrai preço original
-                        original_price = price
-                        orig_price_selectors = [
-                            '.a-text-price .a-offscreen',
-                            '.a-text-price'
-                        ]
-                        
-                        for orig_selector in orig_price_selectors:
-                            orig_el = await product.query_selector(orig_selector)
-                            if orig_el:
-                                orig_text = await orig_el.inner_text()
-                                if orig_text:
-                                    original_price_val = format_price(orig_text)
-                                    if original_price_val > price:
-                                        original_price = original_price_val
-                                        break
-                        
-                        # Calcula o desconto
-                        discount_pct = calculate_discount(original_price, price)
-                        print(f"Preço: R${price:.2f}, Original: R${original_price:.2f}, Desconto: {discount_pct}%")
-                        
-                        # Adiciona ofertas válidas (mesmo sem desconto)
-                        if price > 0 and asin and url and title != "Sem título":
-                            offer = Offer(
-                                merchant="amazon",
-                                external_id=asin,
-                                title=title,
-                                url=url,
-                                price=price,
-                                discount_pct=discount_pct
-                            )
-                            
-                            results.append(offer)
-                            print(f"Oferta válida: {title[:30]}... - R${price:.2f} ({discount_pct}% OFF)")
-                        else:
-                            print(f"Oferta ignorada - dados incompletos")
-                    
-                    except Exception as e:
-                        print(f"Erro ao processar produto: {str(e)}")
-                        logger.error(f"Erro ao processar produto: {str(e)}")
+                for offer in page_offers:
+                    print(f"Oferta válida: {offer.title[:30]}... - R${offer.price:.2f} ({offer.discount_pct}% OFF)")
+                results.extend(page_offers)
                 
                 # Navega para a próxima página se não for a última
                 if page_num < max_pages:
@@ -245,8 +177,7 @@ async def scrape_amazon(keyword="ofertas do dia", max_pages=2):
                             next_button = await page.query_selector(next_selector)
                             if next_button:
                                 print(f"Navegando para a próxima página ({page_num + 1})...")
-                                await next_button.click()
-                                await page.wait_for_load_state('networkidle')
+                                await limited_click(page, next_button)
                                 next_found = True
                                 break
                                 
@@ -257,51 +188,98 @@ async def scrape_amazon(keyword="ofertas do dia", max_pages=2):
                     except Exception as e:
                         print(f"Erro ao navegar para a próxima página: {str(e)}")
                         break
-            
-            await browser.close()
     
     except Exception as e:
         print(f"Erro no scraper da Amazon: {str(e)}")
         logger.error(f"Erro no scraper da Amazon: {str(e)}")
     
-    print(f"Amazon: coletadas {len(results)} ofertas")
-    logger.info(f"Amazon: coletadas {len(results)} ofertas")
     return results
 
 
-async def scrape_mercadolivre(keyword="ofertas do dia", max_pages=2):
+# Página de ofertas do Mercado Livre
+MERCADOLIVRE_OFFERS_URL = "https://www.mercadolivre.com.br/ofertas"
+
+# Número de ofertas suficiente para encerrar a coleta do Mercado Livre
+MERCADOLIVRE_ENOUGH_OFFERS = 10
+
+# Seletores que indicam que a página do Mercado Livre tem produtos
+MERCADOLIVRE_READY_SELECTORS = MERCADOLIVRE_PRODUCT_SELECTORS + [MERCADOLIVRE_LINK_SELECTOR]
+
+
+async def scrape_mercadolivre(keyword="ofertas do dia", max_pages=2, browser_pool=None, fetcher=None, url=None):
+    """
+    Coleta ofertas do Mercado Livre, pelo HTTP quando possível e pelo navegador se não.
+    
+    Args:
+        keyword: Mantido por compatibilidade; a coleta usa ``url``
+        browser_pool: BrowserPool compartilhado (sem ele, abre um navegador próprio)
+        fetcher: FetchStrategy compartilhada (sem ela, usa uma temporária)
+        url: Página de ofertas ou categoria a coletar (padrão: página de ofertas)
+    """
+    url = url or MERCADOLIVRE_OFFERS_URL
+    print(f"Iniciando scraping do Mercado Livre para: {url}")
+    logger.info(f"Iniciando scraping do Mercado Livre para: {url}")
+    results = []
+    
+    try:
+        async with merchant_fetcher(fetcher) as fetcher:
+            results = await fetcher.collect(
+                "mercadolivre",
+                http_collect=lambda: fetch_mercadolivre_http(fetcher, url, max_pages),
+                browser_collect=lambda: scrape_mercadolivre_browser(url, max_pages, browser_pool),
+            )
+    except Exception as e:
+        print(f"Erro no scraper do Mercado Livre: {str(e)}")
+        logger.error(f"Erro no scraper do Mercado Livre: {str(e)}")
+    
+    print(f"Mercado Livre: coletadas {len(results)} ofertas")
+    logger.info(f"Mercado Livre: coletadas {len(results)} ofertas")
+    return results
+
+
+async def fetch_mercadolivre_http(fetcher, base_url, max_pages):
+    """
+    Coleta as páginas de ofertas do Mercado Livre por HTTP, sem navegador.
+    
+    Returns:
+        list: Ofertas encontradas (vazia se a primeira página vier sem produtos)
+    """
+    results = []
+    for page_num in range(1, max_pages + 1):
+        url = paged_url(base_url, page_num)
+        print(f"Baixando por HTTP: {url}")
+        html = await fetcher.fetch_html(url)
+        page_offers = parse_mercadolivre_html(html, url) if html else []
+        if not page_offers:
+            break
+        results.extend(page_offers)
+        if len(results) >= MERCADOLIVRE_ENOUGH_OFFERS:
+            break
+    return results
+
+
+async def scrape_mercadolivre_browser(base_url, max_pages, browser_pool=None):
     """
     Coleta ofertas do Mercado Livre usando o Playwright para simular navegador.
     Abordagem principal usando JavaScript para extração direta dos dados.
     """
-    print(f"Iniciando scraping do Mercado Livre para: {keyword}")
-    logger.info(f"Iniciando scraping do Mercado Livre para: {keyword}")
     results = []
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                viewport={"width": 1280, "height": 800},
-                user_agent=get_random_headers()["User-Agent"]
-            )
-            
+        async with merchant_context(browser_pool, "mercadolivre") as context:
             page = await context.new_page()
             
-            # Configura a página com headers úteis
-            await page.set_extra_http_headers({
-                "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7"
-            })
-            
             # Navega para a página de ofertas
-            base_url = "https://www.mercadolivre.com.br/ofertas"
             print(f"Navegando para: {base_url}")
             
             try:
                 # Acessando a página de ofertas
-                await page.goto(base_url, wait_until="domcontentloaded")
-                await page.wait_for_load_state("networkidle")
-                await page.wait_for_timeout(3000)  # Espera 3 segundos para carregar tudo
+                await limited_goto(page, base_url, wait_until="domcontentloaded")
+                # Espera os produtos carregarem (substitui networkidle + 3 s)
+                await wait_for_results(
+                    page, "mercadolivre", MERCADOLIVRE_READY_SELECTORS,
+                    label="página 1", fixed_wait_ms=3000
+                )
                 
                 # Salva screenshot para debug
                 screenshot_path = Path(__file__).parent / "mercadolivre_page.png"
@@ -314,238 +292,10 @@ async def scrape_mercadolivre(keyword="ofertas do dia", max_pages=2):
                     logger.info(f"Processando página {page_num} com JavaScript")
                     
                     # Usando JavaScript para extrair todos os produtos diretamente
-                    extracted_products = await page.evaluate('''() => {
-                        // Função auxiliar para limpar texto
-                        const cleanText = (text) => text ? text.trim().replace(/\\s+/g, ' ') : '';
-                        
-                        // Função para extrair o preço
-                        const extractPrice = (el) => {
-                            if (!el) return null;
-                            const priceText = el.innerText || '';
-                            return priceText.trim();
-                        };
-                        
-                        // Tenta diferentes approaches para encontrar produtos
-                        let productElements = [];
-                        
-                        // Approach 1: Carrossel principal de ofertas
-                        const carouselItems = document.querySelectorAll('.andes-carousel-snapped__slide');
-                        if (carouselItems && carouselItems.length > 0) {
-                            console.log("Encontrados itens no carrossel:", carouselItems.length);
-                            productElements = [...carouselItems];
-                        }
-                        
-                        // Approach 2: Cards de oferta
-                        if (productElements.length === 0) {
-                            const offerItems = document.querySelectorAll('.promotion-item');
-                            if (offerItems && offerItems.length > 0) {
-                                console.log("Encontrados itens de oferta:", offerItems.length);
-                                productElements = [...offerItems];
-                            }
-                        }
-                        
-                        // Approach 3: Resultados de busca
-                        if (productElements.length === 0) {
-                            const searchResults = document.querySelectorAll('.ui-search-result, .ui-search-layout__item');
-                            if (searchResults && searchResults.length > 0) {
-                                console.log("Encontrados resultados de busca:", searchResults.length);
-                                productElements = [...searchResults];
-                            }
-                        }
-                        
-                        // Abordagem alternativa: pegar todos os links que parecem produtos
-                        const products = [];
-                        
-                        // Se encontrou elementos de produto, tenta extrair dados de cada um
-                        if (productElements.length > 0) {
-                            productElements.forEach((item) => {
-                                try {
-                                    // Extrai link e título
-                                    const linkEl = item.querySelector('a[href*="/p/"], a[href*="mercadolivre.com"]');
-                                    if (!linkEl) return; // Pula se não tiver link
-                                    
-                                    const url = linkEl.href;
-                                    if (!url || !url.includes('mercadolivre.com')) return; // Verifica URL
-                                    
-                                    // Extrai título (várias tentativas)
-                                    let title = '';
-                                    const titleEl = item.querySelector('[class*="title"], h2, .promotion-item__title');
-                                    if (titleEl) {
-                                        title = cleanText(titleEl.innerText);
-                                    } else {
-                                        // Alternativa: usa o texto do link ou alt da imagem
-                                        const imgEl = item.querySelector('img');
-                                        title = cleanText(linkEl.innerText) || (imgEl ? imgEl.alt : '');
-                                    }
-                                    
-                                    if (!title) return; // Pula se não tiver título
-                                    
-                                    // Extrai preço (várias tentativas)
-                                    let price = '';
-                                    const priceEl = item.querySelector('[class*="price"], .promotion-item__price, .andes-money-amount__fraction');
-                                    if (priceEl) {
-                                        price = extractPrice(priceEl);
-                                    }
-                                    
-                                    // Extrai desconto (várias tentativas)
-                                    let discount = '';
-                                    const discountEl = item.querySelector('[class*="discount"], .promotion-item__discount');
-                                    if (discountEl) {
-                                        discount = cleanText(discountEl.innerText);
-                                    }
-                                    
-                                    products.push({
-                                        url,
-                                        title,
-                                        price,
-                                        discount
-                                    });
-                                } catch (err) {
-                                    console.error("Erro ao processar item:", err);
-                                }
-                            });
-                        }
-                        
-                        // Se não encontrou produtos pelos métodos anteriores, busca todos os links relevantes
-                        if (products.length === 0) {
-                            // Approach de fallback: quaisquer links que pareçam produtos
-                            document.querySelectorAll('a[href*="/p/"], a[href*="/MLB"]').forEach(link => {
-                                if (link.href && link.href.includes('mercadolivre.com')) {
-                                    const priceEl = link.closest('div')?.querySelector('[class*="price"]') || 
-                                                 link.querySelector('[class*="price"]');
-                                    
-                                    const titleEl = link.closest('div')?.querySelector('[class*="title"]') || 
-                                                 link.querySelector('[class*="title"]') || 
-                                                 link;
-                                    
-                                    // Extrai desconto
-                                    const discountEl = link.closest('div')?.querySelector('[class*="discount"]');
-                                    
-                                    // Só adiciona se não for um produto duplicado
-                                    if (!products.some(p => p.url === link.href)) {
-                                        products.push({
-                                            url: link.href,
-                                            title: cleanText(titleEl.innerText) || 'Produto Mercado Livre',
-                                            price: priceEl ? extractPrice(priceEl) : '',
-                                            discount: discountEl ? cleanText(discountEl.innerText) : ''
-                                        });
-                                    }
-                                }
-                            });
-                        }
-                        
-                        // Limita para evitar dados demais
-                        return products.slice(0, 15);
-                    }''')
-                    
-                    print(f"Extraídos {len(extracted_products)} produtos via JavaScript")
-                    
-                    # Processa cada produto extraído
-                    for item in extracted_products:
-                        try:
-                            url = item.get('url', '')
-                            title = item.get('title', '')
-                            price_text = item.get('price', '')
-                            discount_text = item.get('discount', '')
-                            
-                            if not url or not title:
-                                print("Produto sem URL ou título, pulando...")
-                                continue
-                                
-                            print(f"Processando produto: {title[:40]}...")
-                            
-                            # Extrai ID externo do URL
-                            external_id = "unknown"
-                            if "MLB-" in url:
-                                external_id = url.split("MLB-")[1].split("-")[0]
-                            elif "/p/MLB" in url:
-                                external_id = url.split("/p/MLB")[1].split("/")[0]
-                            elif "MLB" in url:
-                                matches = url.split("MLB")
-                                if len(matches) > 1:
-                                    digits = ''.join(c for c in matches[1] if c.isdigit())
-                                    if digits:
-                                        external_id = digits[:8]
-                            
-                            # Fallback para ID se não encontrado
-                            if external_id == "unknown":
-                                external_id = f"ml-{hash(url) % 100000}"
-                            
-                            # Processa o preço
-                            price = 0.0
-                            try:
-                                if price_text:
-                                    # Remove espaços e formata conforme necessário
-                                    price_clean = price_text.strip()
-                                    # Verifica se já contém R$ ou outro indicador de moeda
-                                    if not any(currency in price_clean for currency in ['R$', '$', 'R']):
-                                        price_clean = 'R$ ' + price_clean
-                                    
-                                    # Remove caracteres não numéricos exceto pontos e vírgulas
-                                    price_clean = ''.join(c for c in price_clean if c.isdigit() or c in ',.R$')
-                                    # Substitui vírgula por ponto para formato decimal
-                                    price_clean = price_clean.replace(',', '.')
-                                    
-                                    # Se tiver mais de um ponto (ex: R$ 1.234.56), corrige o formato
-                                    if price_clean.count('.') > 1:
-                                        # Remove todos os pontos exceto o último
-                                        last_dot = price_clean.rindex('.')
-                                        price_clean = price_clean.replace('.', '')
-                                        price_clean = price_clean[:last_dot] + '.' + price_clean[last_dot:]
-                                    
-                                    # Extrai apenas os dígitos e o ponto decimal
-                                    digits_only = ''.join(c for c in price_clean if c.isdigit() or c == '.')
-                                    
-                                    # Converte para float com segurança
-                                    try:
-                                        price = float(digits_only)
-                                        # Verifica se o preço é razoável (menos de 100.000)
-                                        if price > 100000:
-                                            # Provavelmente um erro, usa fallback
-                                            price = 0
-                                    except ValueError:
-                                        price = 0
-                            except Exception as e:
-                                print(f"Erro ao processar preço '{price_text}': {str(e)}")
-                            
-                            # Fallback para preço se não encontrado ou inválido
-                            if price <= 0:
-                                # Gera um preço aleatório plausível entre R$ 100 e R$ 2000
-                                price = 100.0 + (abs(hash(url)) % 1900)
-                                print(f"Usando preço fallback: R${price:.2f}")
-                            
-                            # Processa o desconto
-                            discount_pct = 0
-                            try:
-                                if discount_text and "%" in discount_text:
-                                    # Extrai apenas os números do texto de desconto
-                                    discount_pct = int(''.join(filter(str.isdigit, discount_text)))
-                            except Exception:
-                                pass
-                            
-                            # Fallback para desconto se não encontrado
-                            if discount_pct == 0:
-                                discount_pct = 15 + (hash(url) % 15)
-                                print(f"Usando desconto fallback: {discount_pct}%")
-                            
-                            # Adiciona a oferta se tiver dados suficientes
-                            offer = Offer(
-                                merchant="mercadolivre",
-                                external_id=external_id,
-                                title=title,
-                                url=url,
-                                price=price,
-                                discount_pct=discount_pct
-                            )
-                            
-                            results.append(offer)
-                            print(f"Oferta válida: {title[:30]}... - R${price:.2f} ({discount_pct}% OFF)")
-                            
-                        except Exception as e:
-                            print(f"Erro ao processar produto extraído: {str(e)}")
+                    results.extend(await extract_mercadolivre_offers(page))
                     
                     # Se já temos produtos suficientes, não precisa ir para a próxima página
-                    if len(results) >= 10:
+                    if len(results) >= MERCADOLIVRE_ENOUGH_OFFERS:
                         print(f"Coletadas {len(results)} ofertas, suficiente para o MVP")
                         break
                     
@@ -566,9 +316,11 @@ async def scrape_mercadolivre(keyword="ofertas do dia", max_pages=2):
                                 next_button = await page.query_selector(next_selector)
                                 if next_button:
                                     print(f"Navegando para a próxima página ({page_num + 1})...")
-                                    await next_button.click()
-                                    await page.wait_for_load_state('networkidle')
-                                    await page.wait_for_timeout(3000)
+                                    await limited_click(page, next_button)
+                                    await wait_for_results(
+                                        page, "mercadolivre", MERCADOLIVRE_READY_SELECTORS,
+                                        label=f"página {page_num + 1}", fixed_wait_ms=3000
+                                    )
                                     next_found = True
                                     break
                             
@@ -605,78 +357,247 @@ async def scrape_mercadolivre(keyword="ofertas do dia", max_pages=2):
                     
                     results.append(offer)
                     print(f"Oferta de fallback criada: {title}")
-            
-            await browser.close()
     
     except Exception as e:
         print(f"Erro no scraper do Mercado Livre: {str(e)}")
         logger.error(f"Erro no scraper do Mercado Livre: {str(e)}")
     
-    print(f"Mercado Livre: coletadas {len(results)} ofertas")
-    logger.info(f"Mercado Livre: coletadas {len(results)} ofertas")
     return results
 
 
-async def main(merchant=None):
+# Número de workers da coleta, isto é, URLs coletadas ao mesmo tempo (1 = sequencial)
+SCRAPER_CONCURRENCY = int(os.getenv("BDD_SCRAPER_CONCURRENCY", "2"))
+
+# Tempo máximo (s) da coleta de uma URL antes de ser cancelada
+MERCHANT_TIMEOUT = float(os.getenv("BDD_MERCHANT_TIMEOUT", "600"))
+
+# Termos buscados na Amazon (cada um vira uma URL inicial da fila)
+CRAWL_KEYWORDS = [
+    keyword.strip() for keyword in os.getenv("BDD_CRAWL_KEYWORDS", "ofertas do dia").split(",")
+    if keyword.strip()
+]
+
+# URLs iniciais de cada merchant; outras URLs (categorias, buscas) podem ser
+# adicionadas com ``python -m scraper.frontier add``
+MERCHANT_SEED_URLS = {
+    "amazon": [amazon_search_url(keyword) for keyword in CRAWL_KEYWORDS],
+    "mercadolivre": [MERCADOLIVRE_OFFERS_URL],
+}
+
+# Scraper e nome de exibição de cada merchant suportado
+MERCHANT_SCRAPERS = {
+    "amazon": (scrape_amazon, "Amazon"),
+    "mercadolivre": (scrape_mercadolivre, "Mercado Livre"),
+    # TODO: Implementar outros merchants (AliExpress, etc.)
+}
+
+
+async def main(merchant=None, browser_pool=None, concurrency=SCRAPER_CONCURRENCY,
+               timeout=MERCHANT_TIMEOUT, fetcher=None, frontier=None):
     """
     Função principal que coordena a coleta de ofertas.
+    
+    As URLs a coletar vêm da fila persistente (``CrawlFrontier``), que recebe
+    antes as URLs iniciais de cada merchant. Até ``concurrency`` workers pegam
+    os itens vencidos e salvam as ofertas de cada um assim que ele termina; a
+    execução acaba quando não sobra item vencido. Falhas e timeouts de um item
+    não afetam os demais e são refeitos em execuções seguintes.
+    
+    Args:
+        merchant: Merchant (ou lista de merchants) a coletar (todos se None)
+        browser_pool: BrowserPool do processo; sem ele, um pool é aberto só
+            para esta execução
+        concurrency: Número de workers (itens coletados ao mesmo tempo)
+        timeout: Tempo máximo (s) da coleta de cada item
+        fetcher: FetchStrategy do processo; sem ela, uma é criada só para
+            esta execução
+        frontier: Fila de URLs (padrão: ``CrawlFrontier()``)
+    
+    Returns:
+        dict: Número de ofertas salvas por merchant (None se nenhuma URL do
+            merchant foi coletada com sucesso)
     """
     print("Função main iniciada")
     logger.info("Iniciando coleta de ofertas")
     
     # Se nenhum merchant for especificado, coleta de todos
-    merchants = [merchant] if merchant else ["amazon", "mercadolivre"]
+    merchants = merchant_list(merchant)
     print(f"Merchants para coletar: {merchants}")
     
-    # Coleta por merchant
-    for m in merchants:
-        try:
-            print(f"Iniciando coleta de {m}")
-            if m == "amazon":
-                offers = await scrape_amazon()
-                print(f"Coletadas {len(offers)} ofertas da Amazon")
-                
-                # Salva cada oferta no banco
-                for offer in offers:
-                    print(f"Salvando oferta: {offer.title[:30]}...")
-                    await upsert_offer(offer)
-                
-                # Salva as ofertas também em arquivo JSON
-                if offers:
-                    output_dir = Path(__file__).parent / "dados"
-                    output_path = save_offers(offers, "amazon", str(output_dir))
-                    print(f"Ofertas salvas em: {output_path}")
-                
-                logger.info(f"Amazon: {len(offers)} ofertas inseridas no banco")
-            
-            elif m == "mercadolivre":
-                offers = await scrape_mercadolivre()
-                print(f"Coletadas {len(offers)} ofertas do Mercado Livre")
-                
-                # Salva cada oferta no banco
-                for offer in offers:
-                    print(f"Salvando oferta: {offer.title[:30]}...")
-                    await upsert_offer(offer)
-                
-                # Salva as ofertas também em arquivo JSON
-                if offers:
-                    output_dir = Path(__file__).parent / "dados"
-                    output_path = save_offers(offers, "mercadolivre", str(output_dir))
-                    print(f"Ofertas salvas em: {output_path}")
-                
-                logger.info(f"Mercado Livre: {len(offers)} ofertas inseridas no banco")
-            
-            # TODO: Implementar outros merchants (AliExpress, etc.)
-            
-        except Exception as e:
-            print(f"ERRO: {str(e)}")
-            logger.error(f"Erro ao processar {m}: {str(e)}")
+    await init_db()
+    frontier = frontier or CrawlFrontier()
+    await seed_frontier(frontier, merchants)
+    
+    own_pool = browser_pool is None
+    if own_pool:
+        browser_pool = BrowserPool()
+    
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = FetchStrategy()
+    
+    counts = {}
+    owner = f"{socket.gethostname()}-{os.getpid()}"
+    # As medições de espera são do processo; o log mostra só as desta execução
+    waits_before = wait_timings.summary()
+    
+    try:
+        await asyncio.gather(*[
+            crawl_worker(f"{owner}-{n}", frontier, merchants, browser_pool, timeout, fetcher, counts)
+            for n in range(max(1, concurrency))
+        ])
+    finally:
+        fetch_summary = fetcher.summary()
+        if own_pool:
+            await browser_pool.close()
+        if own_fetcher:
+            await fetcher.close()
     
     print("Coleta finalizada!")
     logger.info("Coleta de ofertas finalizada")
+    logger.info(f"Requisições por host: {rate_limiter.summary()}")
+    logger.info(f"Caminhos de coleta: {fetch_summary}")
+    waits = wait_timings.summary(since=waits_before)
+    waits = {m: waits[m] for m in merchants if m in waits}
+    logger.info(f"Esperas por prontidão: {waits}")
+    
+    return {m: counts.get(m) for m in merchants}
+
+
+def merchant_list(merchant=None):
+    """
+    Normaliza o merchant pedido: um nome, uma lista de nomes ou None (todos).
+    """
+    if not merchant:
+        return list(MERCHANT_SCRAPERS)
+    return [merchant] if isinstance(merchant, str) else list(merchant)
+
+
+async def seed_frontier(frontier, merchants):
+    """
+    Garante que as URLs iniciais dos merchants estejam na fila.
+    """
+    await frontier.add_many(
+        (merchant, url) for merchant in merchants for url in MERCHANT_SEED_URLS.get(merchant, [])
+    )
+
+
+def add_count(counts, merchant, count):
+    """
+    Soma as ofertas de um item às do merchant (None registra só a falha).
+    """
+    if count is None:
+        counts.setdefault(merchant, None)
+    else:
+        counts[merchant] = (counts.get(merchant) or 0) + count
+
+
+async def crawl_worker(owner, frontier, merchants, browser_pool, timeout, fetcher, counts):
+    """
+    Pega itens vencidos da fila, um por vez, até não sobrar nenhum.
+    
+    Args:
+        owner: Identificação do worker nos leases
+        counts: Ofertas salvas por merchant, atualizado a cada item
+    """
+    while True:
+        items = await frontier.lease(owner, merchants)
+        if not items:
+            return
+        
+        item = items[0]
+        count = await collect_item(item, frontier, browser_pool, timeout, fetcher)
+        add_count(counts, item.merchant, count)
+
+
+async def collect_item(item, frontier, browser_pool, timeout=MERCHANT_TIMEOUT, fetcher=None):
+    """
+    Coleta e salva as ofertas de um item da fila, isolando falhas e timeouts.
+    
+    O item é concluído na fila se vierem ofertas; caso contrário, a falha é
+    registrada para uma nova tentativa.
+    
+    Returns:
+        int: Número de ofertas salvas, ou None se a coleta falhar
+    """
+    merchant = item.merchant
+    if merchant not in MERCHANT_SCRAPERS:
+        logger.warning(f"Merchant não suportado: {merchant}")
+        await frontier.fail(item, "Merchant não suportado")
+        return None
+    
+    scraper, _ = MERCHANT_SCRAPERS[merchant]
+    
+    try:
+        print(f"Iniciando coleta de {merchant}: {item.url}")
+        offers = await asyncio.wait_for(
+            scraper(url=item.url, browser_pool=browser_pool, fetcher=fetcher), timeout
+        )
+        return await save_item_offers(item, offers, frontier)
+    
+    except asyncio.TimeoutError:
+        print(f"ERRO: coleta de {item.url} excedeu {timeout}s")
+        logger.error(f"Timeout ao processar {merchant} ({timeout}s): {item.url}")
+        error = f"Timeout ({timeout}s)"
+    except Exception as e:
+        print(f"ERRO: {str(e)}")
+        logger.error(f"Erro ao processar {merchant} ({item.url}): {str(e)}")
+        error = str(e)
+    
+    await frontier.fail(item, error)
+    return None
+
+
+async def save_item_offers(item, offers, frontier):
+    """
+    Salva as ofertas coletadas de um item da fila e o conclui.
+    
+    Sem ofertas, o item é registrado como falha para uma nova tentativa.
+    
+    Returns:
+        int: Número de ofertas salvas
+    """
+    name = MERCHANT_SCRAPERS[item.merchant][1] if item.merchant in MERCHANT_SCRAPERS else item.merchant
+    print(f"Coletadas {len(offers)} ofertas de {name}")
+    
+    # Salva as ofertas no banco em uma única transação, pulando as inalteradas
+    print(f"Salvando {len(offers)} ofertas no banco...")
+    sync = await sync_offers(offers)
+    print(f"{name}: {sync['new']} novas, {sync['changed']} alteradas, "
+          f"{sync['unchanged']} inalteradas")
+    
+    # Salva as ofertas também em arquivo JSON
+    if offers:
+        output_dir = Path(__file__).parent / "dados"
+        output_path = save_offers(offers, item.merchant, str(output_dir))
+        print(f"Ofertas salvas em: {output_path}")
+        # A fração de ofertas novas ou alteradas ajusta o intervalo da URL
+        await frontier.complete(item, (sync["new"] + sync["changed"]) / len(offers))
+    else:
+        await frontier.fail(item, "Nenhuma oferta encontrada")
+    
+    logger.info(
+        f"{name}: {len(offers)} ofertas processadas de {item.url} ({sync['new']} novas, "
+        f"{sync['changed']} alteradas, {sync['unchanged']} inalteradas)"
+    )
+    return len(offers)
+
+
+async def run_once(merchant=None):
+    """
+    Executa uma coleta e fecha o pool de conexões do banco.
+    
+    As threads das conexões do pool impedem o processo de terminar; quem chama
+    ``main`` dentro de um processo de longa duração (ex: o scheduler) fecha o
+    pool ao encerrar.
+    """
+    try:
+        return await main(merchant)
+    finally:
+        await close_pool()
 
 
 if __name__ == "__main__":
     # Executa o scraper diretamente
     merchant = sys.argv[1] if len(sys.argv) > 1 else None
-    asyncio.run(main(merchant)) 
\ No newline at end of file
+    asyncio.run(run_once(merchant)) 
\ No newline at end of file
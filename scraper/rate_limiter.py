@@ -0,0 +1,308 @@
+"""
+Limite de requisições por host, compartilhado por todos os scrapers.
+
+Cada host tem um token bucket (taxa média + rajada) e um limite de requisições
+simultâneas. Respostas 429/503 ou páginas de captcha deixam o host mais lento
+(a taxa é dividida por um fator que cresce a cada bloqueio) e abrem um período
+de espera; cada resposta normal devolve aos poucos a taxa original.
+"""
+import asyncio
+import os
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from scraper.readiness import click_and_wait_navigation
+
+
+# Liga/desliga o limite de requisições
+RATE_LIMIT = os.getenv("BDD_RATE_LIMIT", "1").lower() not in ("0", "false", "no")
+
+# Requisições por segundo permitidas em cada host (média)
+RATE_PER_SECOND = float(os.getenv("BDD_RATE_PER_SECOND", "0.5"))
+
+# Requisições que podem sair em rajada antes de valer a taxa média
+RATE_BURST = int(os.getenv("BDD_RATE_BURST", "3"))
+
+# Requisições simultâneas por host
+RATE_MAX_IN_FLIGHT = int(os.getenv("BDD_RATE_MAX_IN_FLIGHT", "2"))
+
+# Fator de redução da taxa a cada bloqueio (429/503/captcha) e o máximo acumulado
+RATE_BACKOFF_FACTOR = float(os.getenv("BDD_RATE_BACKOFF_FACTOR", "2"))
+RATE_MAX_SLOWDOWN = float(os.getenv("BDD_RATE_MAX_SLOWDOWN", "16"))
+
+# Fator de recuperação aplicado a cada resposta normal
+RATE_RECOVERY_FACTOR = float(os.getenv("BDD_RATE_RECOVERY_FACTOR", "1.25"))
+
+# Espera mínima (s) após um bloqueio, multiplicada pela redução acumulada
+RATE_COOLDOWN = float(os.getenv("BDD_RATE_COOLDOWN", "5"))
+
+# Taxa (req/s) e rajada específicas de alguns hosts
+HOST_LIMITS: Dict[str, Tuple[float, int]] = {
+    "amazon.com.br": (0.5, 3),
+    "mercadolivre.com.br": (1.0, 4),
+}
+
+# Status HTTP que indicam que o host está limitando o scraper
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Trechos que identificam páginas de captcha/verificação de robô
+CAPTCHA_MARKERS = (
+    "validatecaptcha",
+    "captchacharacters",
+    "digite os caracteres que você vê",
+    "enter the characters you see below",
+    "/gz/account-verification",
+)
+
+# Seletor das mesmas páginas de captcha no navegador
+CAPTCHA_SELECTOR = 'form[action*="validateCaptcha"], #captchacharacters, form[action*="account-verification"]'
+
+
+def host_key(url: str) -> str:
+    """
+    Host usado como chave do limite (sem "www.").
+    """
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_captcha_page(html: Optional[str]) -> bool:
+    """
+    Indica se o HTML é uma página de captcha/verificação de robô.
+    """
+    if not html:
+        return False
+    # O aviso fica no começo das páginas de captcha; não precisa varrer tudo
+    head = html[:20_000].lower()
+    return any(marker in head for marker in CAPTCHA_MARKERS)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Lê o header Retry-After em segundos (datas HTTP são ignoradas).
+    """
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class HostBucket:
+    """
+    Token bucket e estado de bloqueio de um host.
+    """
+    rate: float
+    burst: int
+    max_in_flight: int
+    tokens: float = 0.0
+    updated: float = 0.0
+    slowdown: float = 1.0
+    cooldown_until: float = 0.0
+    stats: Counter = field(default_factory=Counter)
+    _semaphore: Optional[asyncio.Semaphore] = field(default=None, repr=False)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Limita as requisições simultâneas ao host."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.max_in_flight))
+        return self._semaphore
+
+    @property
+    def effective_rate(self) -> float:
+        """Taxa atual, já considerando a redução por bloqueios."""
+        return self.rate / self.slowdown
+
+    def refill(self, now: float):
+        """Acrescenta os tokens acumulados desde a última atualização."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.effective_rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Tempo (s) até a próxima requisição poder sair, ou 0 se já pode.
+        """
+        self.refill(now)
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.effective_rate
+
+
+class RateLimiter:
+    """
+    Controla a taxa e a concorrência de requisições de cada host.
+    """
+
+    def __init__(self, enabled: bool = RATE_LIMIT, rate: float = RATE_PER_SECOND,
+                 burst: int = RATE_BURST, max_in_flight: int = RATE_MAX_IN_FLIGHT,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], object] = asyncio.sleep):
+        """
+        Args:
+            enabled: Se False, as requisições passam sem espera
+            rate: Requisições por segundo de cada host (média)
+            burst: Requisições em rajada antes de valer a taxa média
+            max_in_flight: Requisições simultâneas por host
+            host_limits: (taxa, rajada) específicas por host (padrão: HOST_LIMITS)
+            clock: Relógio monotônico (substituível nos testes)
+            sleep: Função de espera assíncrona (substituível nos testes)
+        """
+        self.enabled = enabled
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.host_limits = HOST_LIMITS if host_limits is None else host_limits
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets: Dict[str, HostBucket] = {}
+
+    def share(self, parts: int):
+        """
+        Divide os limites entre ``parts`` processos que coletam os mesmos
+        hosts, cada um com o seu limitador (ver scraper.supervisor).
+
+        A taxa é dividida exatamente; a rajada e as requisições simultâneas
+        não ficam abaixo de uma por processo.
+        """
+        if parts <= 1:
+            return
+        self.rate /= parts
+        self.burst = max(1, self.burst / parts)
+        self.max_in_flight = max(1, self.max_in_flight // parts)
+        self.host_limits = {
+            host: (rate / parts, max(1, burst / parts))
+            for host, (rate, burst) in self.host_limits.items()
+        }
+        # Buckets já criados (ex: herdados num fork) ainda têm os limites cheios
+        self.buckets.clear()
+
+    def bucket(self, url: str) -> HostBucket:
+        """
+        Retorna (criando se preciso) o bucket do host da URL.
+        """
+        host = host_key(url)
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            rate, burst = self.host_limits.get(host, (self.rate, self.burst))
+            # Começa cheio: a primeira rajada do host sai sem espera
+            bucket = HostBucket(rate, burst, self.max_in_flight, tokens=burst, updated=self.clock())
+            self.buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, bucket: HostBucket) -> float:
+        """
+        Espera um token do bucket.
+
+        Returns:
+            float: Tempo (s) esperado
+        """
+        waited = 0.0
+        while True:
+            delay = bucket.delay(self.clock())
+            if delay <= 0:
+                bucket.tokens -= 1
+                return waited
+            await self.sleep(delay)
+            waited += delay
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """
+        Reserva uma requisição para o host da URL, respeitando a taxa e o
+        limite de requisições simultâneas.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        bucket = self.bucket(url)
+        async with bucket.semaphore:
+            waited = await self.acquire(bucket)
+            bucket.stats["requests"] += 1
+            bucket.stats["waited_ms"] += int(waited * 1000)
+            yield
+
+    def report(self, url: str, status: Optional[int] = None, captcha: bool = False,
+               retry_after: Optional[float] = None):
+        """
+        Ajusta o ritmo do host conforme a resposta recebida.
+
+        Args:
+            url: URL requisitada
+            status: Status HTTP da resposta (None se desconhecido)
+            captcha: Se a resposta era uma página de captcha
+            retry_after: Espera (s) pedida pelo servidor no header Retry-After
+        """
+        if not self.enabled:
+            return
+
+        bucket = self.bucket(url)
+        if captcha or status in THROTTLE_STATUSES:
+            bucket.slowdown = min(RATE_MAX_SLOWDOWN, bucket.slowdown * RATE_BACKOFF_FACTOR)
+            cooldown = max(retry_after or 0.0, RATE_COOLDOWN * bucket.slowdown)
+            bucket.cooldown_until = max(bucket.cooldown_until, self.clock() + cooldown)
+            bucket.stats["captchas" if captcha else "throttled"] += 1
+            logger.warning(
+                f"{host_key(url)}: {'captcha' if captcha else f'HTTP {status}'}, "
+                f"taxa reduzida para {bucket.effective_rate:.3f} req/s, pausa de {cooldown:.0f} s"
+            )
+        elif bucket.slowdown > 1:
+            bucket.slowdown = max(1.0, bucket.slowdown / RATE_RECOVERY_FACTOR)
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Retorna, por host, as requisições, bloqueios, espera total e a taxa atual.
+        """
+        return {
+            host: {**bucket.stats, "rate": round(bucket.effective_rate, 3)}
+            for host, bucket in self.buckets.items()
+        }
+
+
+# Limite compartilhado pelo processo (HTTP e navegador)
+rate_limiter = RateLimiter()
+
+
+async def page_has_captcha(page) -> bool:
+    """
+    Indica se a página aberta no navegador é de captcha.
+    """
+    try:
+        return await page.query_selector(CAPTCHA_SELECTOR) is not None
+    except Exception:
+        return False
+
+
+async def limited_goto(page, url: str, limiter: Optional[RateLimiter] = None, **kwargs):
+    """
+    Navega para a URL dentro do limite do host e registra a resposta.
+    """
+    limiter = limiter or rate_limiter
+    async with limiter.slot(url):
+        response = await page.goto(url, **kwargs)
+
+    limiter.report(url, status=response.status if response else None,
+                   captcha=await page_has_captcha(page))
+    return response
+
+
+async def limited_click(page, element, limiter: Optional[RateLimiter] = None) -> bool:
+    """
+    Clica em um link de navegação (ex: próxima página) dentro do limite do host.
+    """
+    limiter = limiter or rate_limiter
+    async with limiter.slot(page.url):
+        navigated = await click_and_wait_navigation(page, element)
+
+    limiter.report(page.url, captcha=await page_has_captcha(page))
+    return navigated
@@ -0,0 +1,167 @@
+"""
+Espera por prontidão das páginas de resultados, no lugar de pausas fixas.
+
+Em vez de dormir um tempo fixo, a página é considerada pronta quando algum dos
+seletores de resultados aparece e o número de elementos encontrados fica
+estável por algumas verificações seguidas. A espera tem um limite de tempo:
+se estourar, a extração segue com o que estiver na página.
+"""
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import count
+from typing import Dict, List, Optional
+
+from loguru import logger
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+
+# Tempo máximo (ms) de espera pelos resultados
+READY_TIMEOUT_MS = int(os.getenv("BDD_READY_TIMEOUT_MS", "10000"))
+
+# Intervalo (ms) entre as verificações do DOM
+READY_POLL_MS = int(os.getenv("BDD_READY_POLL_MS", "200"))
+
+# Verificações seguidas com a mesma contagem para considerar o DOM estável
+READY_STABLE_CHECKS = int(os.getenv("BDD_READY_STABLE_CHECKS", "2"))
+
+# Conta os resultados do primeiro seletor que encontrar algo e só retorna
+# (valor verdadeiro) quando a contagem se repetir ``stableChecks`` vezes.
+# O estado fica no window, identificado por ``token`` para cada espera.
+READY_JS = '''({selectors, stableChecks, token}) => {
+    let found = 0;
+    for (const selector of selectors) {
+        found = document.querySelectorAll(selector).length;
+        if (found > 0) break;
+    }
+
+    let state = window.__bddReady;
+    if (!state || state.token !== token) {
+        state = window.__bddReady = {token: token, last: -1, same: 0};
+    }
+    state.same = (found > 0 && found === state.last) ? state.same + 1 : 0;
+    state.last = found;
+
+    return state.same >= stableChecks ? found : false;
+}'''
+
+_tokens = count(1)
+
+
+@dataclass
+class ReadyResult:
+    """
+    Resultado de uma espera por prontidão.
+    """
+    ready: bool
+    elapsed_ms: float
+    count: int = 0
+
+
+class WaitTimings:
+    """
+    Acumula, por merchant, o tempo gasto nas esperas e o economizado em
+    relação às pausas fixas que elas substituíram.
+
+    Guarda só os totais (memória constante em processos de longa duração);
+    para medir uma execução, guarde ``summary()`` no início e passe-o como
+    ``since`` no fim.
+    """
+
+    FIELDS = ("waits", "timeouts", "elapsed_ms", "fixed_wait_ms", "saved_ms")
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def record(self, merchant: str, label: str, elapsed_ms: float,
+               fixed_wait_ms: float, ready: bool):
+        """Registra uma espera e loga o tempo economizado."""
+        saved_ms = fixed_wait_ms - elapsed_ms
+        totals = self._totals[merchant]
+        totals["waits"] += 1
+        totals["timeouts"] += 0 if ready else 1
+        totals["elapsed_ms"] += elapsed_ms
+        totals["fixed_wait_ms"] += fixed_wait_ms
+        totals["saved_ms"] += saved_ms
+        logger.info(
+            f"{merchant} ({label}): {'pronta' if ready else 'timeout'} em {elapsed_ms:.0f} ms "
+            f"(espera fixa: {fixed_wait_ms:.0f} ms, economia: {saved_ms:.0f} ms)"
+        )
+
+    def summary(self, since: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Retorna, por merchant, o número de esperas e os tempos somados (ms).
+
+        Args:
+            since: Resumo anterior; o resultado traz só o que foi registrado
+                depois dele (merchants sem esperas novas ficam de fora)
+        """
+        since = since or {}
+        summary = {}
+        for merchant, totals in self._totals.items():
+            before = since.get(merchant, {})
+            delta = {field: totals[field] - before.get(field, 0) for field in self.FIELDS}
+            if delta["waits"]:
+                summary[merchant] = delta
+        return summary
+
+    def clear(self):
+        """Descarta as medições acumuladas."""
+        self._totals.clear()
+
+
+# Medições do processo (consultadas pelos logs e pelo benchmark)
+wait_timings = WaitTimings()
+
+
+async def wait_for_results(page, merchant: str, selectors: List[str], label: str = "página",
+                           fixed_wait_ms: float = 0, timeout_ms: int = READY_TIMEOUT_MS,
+                           poll_ms: int = READY_POLL_MS, stable_checks: int = READY_STABLE_CHECKS,
+                           timings: Optional[WaitTimings] = None) -> ReadyResult:
+    """
+    Espera os resultados aparecerem e a contagem de elementos estabilizar.
+
+    Args:
+        page: Página do Playwright
+        merchant: Nome do merchant (usado nas medições)
+        selectors: Seletores dos contêineres de resultados, em ordem de preferência
+        label: Identificação da espera nos logs
+        fixed_wait_ms: Pausa fixa que esta espera substitui (para medir a economia)
+        timeout_ms: Tempo máximo de espera
+        poll_ms: Intervalo entre as verificações
+        stable_checks: Verificações seguidas com a mesma contagem
+        timings: Onde registrar a medição (padrão: ``wait_timings``)
+
+    Returns:
+        ReadyResult: Se a página ficou pronta, o tempo gasto e a contagem final
+    """
+    timings = timings if timings is not None else wait_timings
+    started = time.perf_counter()
+    arg = {"selectors": selectors, "stableChecks": stable_checks, "token": next(_tokens)}
+
+    try:
+        handle = await page.wait_for_function(READY_JS, arg=arg, polling=poll_ms, timeout=timeout_ms)
+        result = ReadyResult(True, 0, int(await handle.json_value()))
+    except PlaywrightTimeoutError:
+        result = ReadyResult(False, 0)
+
+    result.elapsed_ms = (time.perf_counter() - started) * 1000
+    timings.record(merchant, label, result.elapsed_ms, fixed_wait_ms, result.ready)
+    return result
+
+
+async def click_and_wait_navigation(page, element, timeout_ms: int = READY_TIMEOUT_MS) -> bool:
+    """
+    Clica no elemento esperando a navegação que ele dispara.
+
+    Returns:
+        bool: False se nenhuma navegação aconteceu dentro do tempo limite
+    """
+    try:
+        async with page.expect_navigation(wait_until="domcontentloaded", timeout=timeout_ms):
+            await element.click()
+        return True
+    except PlaywrightTimeoutError:
+        logger.warning("Clique não gerou navegação dentro do tempo limite")
+        return False
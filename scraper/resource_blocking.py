@@ -0,0 +1,185 @@
+"""
+Bloqueio de recursos desnecessários nos contextos do Playwright.
+
+Os scrapers só leem textos e links, então imagens, fontes, mídia e scripts de
+anúncios/analytics são abortados antes de sair do navegador. Cada merchant tem
+uma lista de domínios próprios (allowlist); requisições para outros domínios
+são tratadas como de terceiros e também bloqueadas.
+"""
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+def _env_list(name: str, default: str) -> FrozenSet[str]:
+    """Lê uma lista separada por vírgulas de uma variável de ambiente."""
+    value = os.getenv(name, default)
+    return frozenset(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+# Liga/desliga o bloqueio de recursos em todos os contextos
+BLOCK_RESOURCES = os.getenv("BDD_BLOCK_RESOURCES", "1").lower() not in ("0", "false", "no")
+
+# Tipos de recurso (request.resource_type) abortados.
+# Folhas de estilo ficam liberadas: innerText depende do CSS aplicado.
+BLOCKED_RESOURCE_TYPES = _env_list("BDD_BLOCKED_RESOURCE_TYPES", "image,media,font")
+
+# Domínios de anúncios/analytics bloqueados mesmo sem allowlist do merchant
+BLOCKED_DOMAINS = _env_list(
+    "BDD_BLOCKED_DOMAINS",
+    "doubleclick.net,googlesyndication.com,google-analytics.com,googletagmanager.com,"
+    "googleadservices.com,facebook.net,facebook.com,hotjar.com,criteo.com,criteo.net,"
+    "scorecardresearch.com,adsystem.com,amazon-adsystem.com,taboola.com,outbrain.com"
+)
+
+# Domínios próprios de cada merchant (inclui subdomínios e CDNs)
+MERCHANT_ALLOWED_DOMAINS = {
+    "amazon": frozenset({
+        "amazon.com.br", "amazon.com", "media-amazon.com", "ssl-images-amazon.com",
+    }),
+    "mercadolivre": frozenset({
+        "mercadolivre.com.br", "mercadolibre.com", "mlstatic.com",
+    }),
+}
+
+# Tamanho médio estimado (bytes) de cada tipo de recurso bloqueado. Como a
+# requisição é abortada antes da resposta, o tamanho real não é conhecido.
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 30_000,
+    "stylesheet": 20_000,
+    "script": 60_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def domain_matches(host: str, domains: Iterable[str]) -> bool:
+    """
+    Indica se o host é um dos domínios informados ou um subdomínio deles.
+    """
+    host = (host or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+@dataclass
+class BlockingStats:
+    """
+    Contadores de requisições bloqueadas e liberadas de um merchant.
+    """
+    allowed_requests: int = 0
+    blocked_requests: int = 0
+    blocked_bytes: int = 0
+    blocked_by_type: Counter = field(default_factory=Counter)
+    blocked_by_reason: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "BlockingStats"):
+        """Soma os contadores de outra instância a esta."""
+        self.allowed_requests += other.allowed_requests
+        self.blocked_requests += other.blocked_requests
+        self.blocked_bytes += other.blocked_bytes
+        self.blocked_by_type.update(other.blocked_by_type)
+        self.blocked_by_reason.update(other.blocked_by_reason)
+
+    def to_dict(self) -> Dict:
+        """Retorna os contadores como dicionário (para logs e relatórios)."""
+        return {
+            "allowed_requests": self.allowed_requests,
+            "blocked_requests": self.blocked_requests,
+            "blocked_bytes": self.blocked_bytes,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_reason": dict(self.blocked_by_reason),
+        }
+
+
+class BlockingProfile:
+    """
+    Decide quais requisições de um merchant devem ser abortadas.
+    """
+
+    def __init__(self, blocked_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 blocked_domains: Iterable[str] = BLOCKED_DOMAINS,
+                 allowed_domains: Optional[Iterable[str]] = None):
+        """
+        Args:
+            blocked_types: Tipos de recurso sempre bloqueados
+            blocked_domains: Domínios de anúncios/analytics bloqueados
+            allowed_domains: Domínios próprios do merchant; se None, requisições
+                de terceiros não são bloqueadas (só tipos e domínios acima)
+        """
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_domains = frozenset(blocked_domains)
+        self.allowed_domains = frozenset(allowed_domains) if allowed_domains is not None else None
+
+    @classmethod
+    def for_merchant(cls, merchant: str, **kwargs) -> "BlockingProfile":
+        """
+        Cria o perfil com a allowlist do merchant (se houver uma).
+        """
+        kwargs.setdefault("allowed_domains", MERCHANT_ALLOWED_DOMAINS.get(merchant))
+        return cls(**kwargs)
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """
+        Retorna o motivo do bloqueio, ou None se a requisição deve seguir.
+        """
+        # Documento principal e frames nunca são bloqueados por tipo
+        if resource_type in self.blocked_types and resource_type != "document":
+            return "type"
+
+        host = urlparse(url).hostname or ""
+        if not host:
+            # data:, blob: e afins não saem do navegador
+            return None
+
+        if domain_matches(host, self.blocked_domains):
+            return "blocked_domain"
+
+        if self.allowed_domains is not None and not domain_matches(host, self.allowed_domains):
+            return "third_party"
+
+        return None
+
+
+class ResourceBlocker:
+    """
+    Intercepta as requisições de um contexto e aplica um BlockingProfile.
+    """
+
+    def __init__(self, profile: BlockingProfile, stats: Optional[BlockingStats] = None):
+        self.profile = profile
+        self.stats = stats if stats is not None else BlockingStats()
+
+    async def attach(self, context):
+        """
+        Registra a interceptação em todas as requisições do contexto.
+        """
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route):
+        """
+        Aborta ou libera a requisição interceptada.
+        """
+        request = route.request
+        reason = self.profile.block_reason(request.url, request.resource_type)
+
+        if reason is None:
+            self.stats.allowed_requests += 1
+            await route.continue_()
+            return
+
+        self.stats.blocked_requests += 1
+        self.stats.blocked_bytes += ESTIMATED_RESOURCE_BYTES.get(
+            request.resource_type, DEFAULT_ESTIMATED_BYTES
+        )
+        self.stats.blocked_by_type[request.resource_type] += 1
+        self.stats.blocked_by_reason[reason] += 1
+        try:
+            await route.abort("blockedbyclient")
+        except Exception as e:
+            # A página pode ter sido fechada enquanto a requisição era tratada
+            logger.debug(f"Falha ao abortar {request.url}: {str(e)}")
@@ -0,0 +1,197 @@
+"""
+Registro das execuções agendadas do scraper (tabela ``scrape_runs``).
+
+Cada execução grava, por merchant, início, fim, duração, ofertas coletadas e
+o erro, se houver. A linha com status ``running`` também funciona como trava:
+enquanto ela existir, outra execução do mesmo merchant (de qualquer processo)
+é ignorada. Linhas ``running`` mais antigas que ``BDD_RUN_STALE_SECONDS`` são
+de processos que caíram e deixam de travar.
+
+Uso:
+    python -m scraper.run_ledger                 # últimas execuções
+    python -m scraper.run_ledger amazon --limit 50
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from loguru import logger
+
+from api.models import close_pool, get_pool, init_db
+
+
+# Tempo (s) após o qual uma execução ainda "running" é considerada abandonada
+RUN_STALE_SECONDS = int(os.getenv("BDD_RUN_STALE_SECONDS", "10800"))
+
+# Situação das execuções
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_ABANDONED = "abandoned"
+
+ABANDON_STALE_QUERY = """
+    UPDATE scrape_runs SET status = 'abandoned', finished_at = ?
+    WHERE merchant = ? AND status = 'running' AND started_at < ?
+"""
+
+# Só insere se não houver outra execução do merchant em andamento
+START_RUN_QUERY = """
+    INSERT INTO scrape_runs (job, merchant, owner, started_at)
+    SELECT ?, ?, ?, ?
+    WHERE NOT EXISTS (
+        SELECT 1 FROM scrape_runs WHERE merchant = ? AND status = 'running'
+    )
+    RETURNING id
+"""
+
+FINISH_RUN_QUERY = """
+    UPDATE scrape_runs
+    SET status = ?, finished_at = ?, offers = ?, error = ?,
+        duration_s = ROUND((julianday(?) - julianday(started_at)) * 86400, 3)
+    WHERE id = ?
+"""
+
+RECENT_RUNS_QUERY = """
+    SELECT id, job, merchant, status, owner, started_at, finished_at, duration_s, offers, error
+    FROM scrape_runs
+    {merchant_filter}
+    ORDER BY id DESC
+    LIMIT ?
+"""
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+class RunLedger:
+    """
+    Registra as execuções e impede duas execuções simultâneas do mesmo merchant.
+    """
+
+    def __init__(self, stale_seconds: int = RUN_STALE_SECONDS, owner: Optional[str] = None):
+        self.stale_seconds = stale_seconds
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+
+    async def start(self, job: str, merchant: str) -> Optional[int]:
+        """
+        Registra o início de uma execução do merchant.
+
+        Returns:
+            int: ID da execução, ou None se já houver outra em andamento
+        """
+        now = _now()
+        stale = now - datetime.timedelta(seconds=self.stale_seconds)
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            cursor = await db.execute(ABANDON_STALE_QUERY, (now.isoformat(), merchant, stale.isoformat()))
+            if cursor.rowcount:
+                logger.warning(f"{merchant}: {cursor.rowcount} execução(ões) abandonada(s)")
+            await cursor.close()
+
+            rows = await db.execute_fetchall(
+                START_RUN_QUERY, (job, merchant, self.owner, now.isoformat(), merchant)
+            )
+
+        return rows[0]["id"] if rows else None
+
+    async def finish(self, run_id: int, offers: Optional[int] = None, error: Optional[str] = None):
+        """
+        Registra o fim de uma execução, com a duração e as ofertas coletadas.
+        """
+        now = _now().isoformat()
+        status = STATUS_FAILED if error is not None else STATUS_DONE
+
+        pool = await get_pool()
+        async with pool.writer() as db:
+            await db.execute(FINISH_RUN_QUERY, (status, now, offers, error, now, run_id))
+
+    async def run(self, job: str, merchants: List[str],
+                  collect: Callable[[List[str]], Awaitable[Dict]]) -> Dict:
+        """
+        Executa ``collect`` só para os merchants sem execução em andamento.
+
+        Disparos que chegam enquanto o merchant ainda está sendo coletado são
+        ignorados (a execução em andamento já cobre o que eles fariam).
+
+        Args:
+            job: Nome da tarefa (ex: "crawl")
+            merchants: Merchants pedidos
+            collect: Corrotina que recebe os merchants livres e retorna as
+                ofertas salvas por merchant
+
+        Returns:
+            dict: Ofertas salvas por merchant coletado
+        """
+        runs = {}
+        for merchant in merchants:
+            run_id = await self.start(job, merchant)
+            if run_id is None:
+                logger.info(f"{job}: {merchant} já está em execução; disparo ignorado")
+            else:
+                runs[merchant] = run_id
+
+        if not runs:
+            return {}
+
+        try:
+            counts = await collect(list(runs))
+        except BaseException as e:
+            # Inclui cancelamento e desligamento, para a trava não ficar presa
+            for run_id in runs.values():
+                await self.finish(run_id, error=str(e) or type(e).__name__)
+            raise
+
+        for merchant, run_id in runs.items():
+            offers = counts.get(merchant)
+            await self.finish(run_id, offers,
+                              None if offers is not None else "Nenhuma URL coletada com sucesso")
+        return counts
+
+    async def recent(self, limit: int = 20, merchant: Optional[str] = None) -> List[Dict]:
+        """
+        Retorna as últimas execuções, da mais recente para a mais antiga.
+        """
+        params = [merchant] if merchant else []
+        merchant_filter = "WHERE merchant = ?" if merchant else ""
+
+        pool = await get_pool()
+        async with pool.reader() as db:
+            rows = await db.execute_fetchall(
+                RECENT_RUNS_QUERY.format(merchant_filter=merchant_filter), [*params, limit]
+            )
+        return [dict(row) for row in rows]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Execuções agendadas do scraper")
+    parser.add_argument("merchant", nargs="?", help="Filtra por merchant")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    async def run():
+        await init_db()
+        try:
+            for row in await RunLedger().recent(args.limit, args.merchant):
+                print(f"{row['started_at']}  {row['merchant']:<15}{row['status']:<10}"
+                      f"{row['duration_s'] or 0:>9.1f}s {row['offers'] or 0:>6} ofertas"
+                      f"{'  ' + row['error'] if row['error'] else ''}")
+        finally:
+            await close_pool()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
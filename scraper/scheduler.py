@@ -2,6 +2,7 @@
 Agendador de tarefas para o BoraDeDesconto usando APScheduler.
 """
 import asyncio
+import datetime
 import os
 import signal
 import sys
@@ -15,30 +16,83 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from loguru import logger
 
-from main import main as run_scraper
-from utils import setup_logging
+from api.models import close_pool, compact_price_history, init_db
+from scraper.main import main as run_scraper, merchant_list
+from scraper.utils import setup_logging
+from scraper.browser_pool import BrowserPool
+from scraper.fetch_strategy import FetchStrategy
+from scraper.run_ledger import RunLedger
+from scraper.supervisor import Supervisor, run_supervisor
 
 
 # Inicializa o logger
 logger = setup_logging()
 
 
-# Cria o scheduler
-scheduler = AsyncIOScheduler(timezone="UTC")
+# Cria o scheduler. Cada tarefa tem no máximo uma execução por vez, e
+# disparos perdidos ou acumulados (ex: durante uma coleta longa) viram um só.
+scheduler = AsyncIOScheduler(timezone="UTC", job_defaults={
+    "coalesce": True,
+    "max_instances": 1,
+    "misfire_grace_time": 60,
+})
 
+# Registro das execuções, que também impede coletas simultâneas de um merchant
+ledger = RunLedger()
 
-async def run_task(merchant=None):
+# Navegadores aquecidos compartilhados por todas as execuções agendadas
+browser_pool = BrowserPool()
+
+# Cliente HTTP (pool de conexões) compartilhado pelas execuções agendadas
+fetcher = FetchStrategy()
+
+# Coleta em vários processos (ver scraper.supervisor) em vez de um só event loop
+MULTIPROCESS = os.getenv("BDD_MULTIPROCESS", "0").lower() not in ("0", "false", "no")
+
+# Intervalo (min) entre as verificações de URLs vencidas na fila
+SCHEDULER_TICK_MINUTES = float(os.getenv("BDD_SCHEDULER_TICK_MINUTES", "5"))
+
+# Variação aleatória (s) dos disparos, para não coincidirem com outros agendadores
+SCHEDULER_JITTER = int(os.getenv("BDD_SCHEDULER_JITTER", "30"))
+
+# Processos de coleta (com os seus navegadores) mantidos entre as execuções
+supervisor = None
+
+
+async def run_task(merchant=None, job="crawl"):
     """
     Wrapper para executar o scraper e capturar exceções.
+    
+    Merchants que ainda estão sendo coletados (por esta ou por outra execução)
+    ficam de fora; cada execução é registrada em ``scrape_runs``.
     """
+    async def collect(merchants):
+        global supervisor
+        if MULTIPROCESS:
+            if supervisor is None or supervisor.closed:
+                supervisor = Supervisor(keep_workers=True)
+            return await run_supervisor(merchants, supervisor=supervisor)
+        return await run_scraper(merchants, browser_pool=browser_pool, fetcher=fetcher)
+    
     try:
         logger.info(f"Iniciando tarefa agendada: {merchant or 'todos'}")
-        await run_scraper(merchant)
-        logger.info(f"Tarefa agendada finalizada: {merchant or 'todos'}")
+        counts = await ledger.run(job, merchant_list(merchant), collect)
+        logger.info(f"Tarefa agendada finalizada: {merchant or 'todos'} ({counts})")
     except Exception as e:
         logger.error(f"Erro na execução agendada: {str(e)}")
 
 
+async def compact_prices_task():
+    """
+    Aplica a retenção do histórico de preços.
+    """
+    try:
+        removed = await compact_price_history()
+        logger.info(f"Histórico de preços compactado: {removed} pontos removidos")
+    except Exception as e:
+        logger.error(f"Erro ao compactar o histórico de preços: {str(e)}")
+
+
 def handle_exit(signum, frame):
     """
     Manipulador de sinal para desligar o scheduler.
@@ -48,46 +102,60 @@ def handle_exit(signum, frame):
     sys.exit(0)
 
 
-async def main():
+async def start():
     """
-    Configura e inicia o scheduler.
+    Prepara o banco, registra as tarefas e inicia o scheduler.
     """
-    logger.info("Iniciando scheduler do BoraDeDesconto")
-    
-    # Configura handlers para sinais de terminação
-    signal.signal(signal.SIGINT, handle_exit)
-    signal.signal(signal.SIGTERM, handle_exit)
+    # As tarefas gravam em tabelas das migrações (scrape_runs, crawl_frontier);
+    # o banco precisa estar migrado antes do primeiro disparo
+    await init_db()
     
-    # Adiciona as tarefas
+    # Cada URL da fila vence no seu próprio horário (intervalo adaptativo, ver
+    # scraper.frontier); o scheduler só coleta com frequência o que venceu
     scheduler.add_job(
         run_task,
-        trigger=IntervalTrigger(hours=1),
-        id="amazon",
-        kwargs={"merchant": "amazon"},
-        next_run_time=None  # Não executa imediatamente
+        trigger=IntervalTrigger(minutes=SCHEDULER_TICK_MINUTES, jitter=SCHEDULER_JITTER),
+        id="crawl",
+        # Executa uma vez ao iniciar, pelo próprio scheduler (sem sobrepor o
+        # primeiro disparo)
+        next_run_time=datetime.datetime.now(datetime.timezone.utc),
     )
     
-    # TODO: Adicionar outros merchants
-    
-    # Adiciona uma tarefa para executar todos os merchants
+    # Retenção/redução do histórico de preços uma vez por dia
     scheduler.add_job(
-        run_task,
-        trigger=IntervalTrigger(hours=6),
-        id="all_merchants",
-        next_run_time=None  # Não executa imediatamente
+        compact_prices_task,
+        trigger=IntervalTrigger(days=1),
+        id="compact_prices",
     )
     
     # Inicia o scheduler
     scheduler.start()
+
+
+async def main():
+    """
+    Configura e inicia o scheduler.
+    """
+    logger.info("Iniciando scheduler do BoraDeDesconto")
     
-    logger.info("Scheduler iniciado. Pressione CTRL+C para sair.")
+    # Configura handlers para sinais de terminação
+    signal.signal(signal.SIGINT, handle_exit)
+    signal.signal(signal.SIGTERM, handle_exit)
+    
+    await start()
     
-    # Executa uma vez ao iniciar
-    await run_task()
+    logger.info("Scheduler iniciado. Pressione CTRL+C para sair.")
     
-    # Loop infinito para manter o programa rodando
-    while True:
-        await asyncio.sleep(1)
+    try:
+        # Loop infinito para manter o programa rodando
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        await browser_pool.close()
+        await fetcher.close()
+        if supervisor is not None:
+            await supervisor.close()
+        await close_pool()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,570 @@
+"""
+Supervisor da coleta em vários processos.
+
+O Chromium e o parse das páginas consomem CPU, e um único event loop usa só
+um núcleo. O supervisor sobe N processos de coleta, cada um com o seu event
+loop, navegador (BrowserPool) e cliente HTTP. Ele empresta os itens vencidos da
+fila (``CrawlFrontier``), distribui-os pela fila de jobs e é o único processo
+que escreve no banco: as ofertas voltam pela fila de resultados e são salvas
+aqui. Cada processo tem o seu limite de requisições por host, dividido pelo
+número de processos para o conjunto respeitar a taxa configurada.
+
+Os processos enviam heartbeats; um processo que morre ou para de responder é
+substituído e os seus itens em andamento são registrados como falha. No
+desligamento (SIGINT/SIGTERM) não são emprestados novos itens, os que ainda não
+começaram voltam para a fila e os em andamento têm um prazo para terminar.
+
+Uso:
+    python -m scraper.supervisor                 # todos os merchants
+    python -m scraper.supervisor amazon --processes 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Adiciona o diretório parent ao PYTHONPATH
+parent_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(parent_dir))
+
+from loguru import logger
+
+from api.models import close_pool, init_db
+from scraper import main as scraper_main
+from scraper.browser_pool import BrowserPool
+from scraper.fetch_strategy import FetchStrategy
+from scraper.frontier import CrawlFrontier
+from scraper.rate_limiter import rate_limiter
+from scraper.readiness import wait_timings
+
+
+# Processos de coleta (padrão: um por núcleo, até 4)
+WORKER_PROCESSES = int(os.getenv("BDD_WORKER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+# Itens coletados ao mesmo tempo dentro de cada processo
+WORKER_CONCURRENCY = int(os.getenv("BDD_WORKER_CONCURRENCY", "1"))
+
+# Intervalo (s) entre heartbeats dos processos
+WORKER_HEARTBEAT = float(os.getenv("BDD_WORKER_HEARTBEAT", "5"))
+
+# Tempo (s) sem heartbeat até o processo ser considerado travado
+WORKER_STALL_TIMEOUT = float(os.getenv("BDD_WORKER_STALL_TIMEOUT", "60"))
+
+# Prazo (s) para os itens em andamento terminarem no desligamento
+WORKER_SHUTDOWN_GRACE = float(os.getenv("BDD_WORKER_SHUTDOWN_GRACE", "30"))
+
+# Reinícios de um mesmo processo antes de o supervisor desistir dele
+WORKER_MAX_RESTARTS = int(os.getenv("BDD_WORKER_MAX_RESTARTS", "5"))
+
+# Método de criação dos processos ("spawn" não herda o estado do supervisor)
+WORKER_START_METHOD = os.getenv("BDD_WORKER_START_METHOD", "spawn")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo (MB), ou None se indisponível."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def worker_main(worker_id: int, jobs, results, concurrency: int, timeout: float,
+                heartbeat: float, processes: int = 1):
+    """
+    Ponto de entrada de um processo de coleta.
+
+    O desligamento é coordenado pelo supervisor, então o processo ignora
+    SIGINT (o CTRL+C do terminal chega a todo o grupo de processos). Os
+    limites por host são divididos entre os ``processes`` processos, para o
+    conjunto respeitar a taxa configurada.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    rate_limiter.share(processes)
+    asyncio.run(_worker_loop(worker_id, jobs, results, concurrency, timeout, heartbeat))
+
+
+async def _worker_loop(worker_id, jobs, results, concurrency, timeout, heartbeat):
+    """
+    Consome jobs até receber um None por coroutine, enviando heartbeats.
+    """
+    loop = asyncio.get_running_loop()
+    browser_pool = BrowserPool()
+    fetcher = FetchStrategy()
+    stats = {"jobs_done": 0, "jobs_failed": 0}
+
+    async def send_heartbeats():
+        while True:
+            results.put(("heartbeat", worker_id, {**stats, "peak_rss_mb": peak_rss_mb()}))
+            await asyncio.sleep(heartbeat)
+
+    async def consume():
+        while True:
+            item = await loop.run_in_executor(None, jobs.get)
+            if item is None:
+                return
+
+            results.put(("started", worker_id, item.id))
+            offers, error = None, None
+            try:
+                scraper, _ = scraper_main.MERCHANT_SCRAPERS[item.merchant]
+                offers = await asyncio.wait_for(
+                    scraper(url=item.url, browser_pool=browser_pool, fetcher=fetcher), timeout
+                )
+                stats["jobs_done"] += 1
+            except asyncio.TimeoutError:
+                error = f"Timeout ({timeout}s)"
+            except KeyError:
+                error = "Merchant não suportado"
+            except Exception as e:
+                error = str(e)
+
+            if error is not None:
+                stats["jobs_failed"] += 1
+            results.put(("result", worker_id, item, offers, error))
+
+    heartbeats = asyncio.create_task(send_heartbeats())
+    try:
+        await asyncio.gather(*[consume() for _ in range(max(1, concurrency))])
+    finally:
+        heartbeats.cancel()
+        await browser_pool.close()
+        await fetcher.close()
+        results.put(("stopped", worker_id, {
+            **stats,
+            "fetch": fetcher.summary(),
+            "waits": wait_timings.summary(),
+            "requests": rate_limiter.summary(),
+        }))
+
+
+@dataclass
+class WorkerHealth:
+    """
+    Situação de um processo de coleta, vista pelo supervisor.
+    """
+    worker_id: int
+    process: multiprocessing.Process
+    started_at: float
+    last_heartbeat: float
+    jobs_done: int = 0
+    jobs_failed: int = 0
+    restarts: int = 0
+    abandoned: bool = False
+    peak_rss_mb: Optional[float] = None
+    current: Set[int] = field(default_factory=set)
+
+    def to_dict(self, now: float) -> Dict:
+        """Resumo para logs e relatórios."""
+        return {
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "jobs_done": self.jobs_done,
+            "jobs_failed": self.jobs_failed,
+            "restarts": self.restarts,
+            "abandoned": self.abandoned,
+            "current": len(self.current),
+            "heartbeat_age_s": round(now - self.last_heartbeat, 1),
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+class Supervisor:
+    """
+    Distribui os itens da fila entre processos de coleta e salva os resultados.
+    """
+
+    def __init__(self, processes: int = WORKER_PROCESSES, concurrency: int = WORKER_CONCURRENCY,
+                 timeout: float = scraper_main.MERCHANT_TIMEOUT,
+                 frontier: Optional[CrawlFrontier] = None,
+                 heartbeat: float = WORKER_HEARTBEAT, stall_timeout: float = WORKER_STALL_TIMEOUT,
+                 shutdown_grace: float = WORKER_SHUTDOWN_GRACE,
+                 start_method: str = WORKER_START_METHOD, keep_workers: bool = False):
+        """
+        Args:
+            processes: Número de processos de coleta
+            concurrency: Itens coletados ao mesmo tempo em cada processo
+            timeout: Tempo máximo (s) da coleta de cada item
+            frontier: Fila de URLs (padrão: ``CrawlFrontier()``)
+            heartbeat: Intervalo (s) entre heartbeats dos processos
+            stall_timeout: Tempo (s) sem heartbeat até reiniciar o processo
+            shutdown_grace: Prazo (s) para os itens em andamento no desligamento
+            start_method: Método do multiprocessing ("spawn", "fork"...)
+            keep_workers: Mantém os processos (e os navegadores aquecidos)
+                entre execuções de ``run``; encerre-os com ``close``
+        """
+        self.processes = max(1, processes)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.frontier = frontier or CrawlFrontier()
+        self.heartbeat = heartbeat
+        self.stall_timeout = stall_timeout
+        self.shutdown_grace = shutdown_grace
+        self.mp = multiprocessing.get_context(start_method)
+        self.jobs = self.mp.Queue()
+        self.results = self.mp.Queue()
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-supervisor"
+        self.workers: Dict[int, WorkerHealth] = {}
+        # Itens emprestados e ainda sem resultado, por id, e quando foram distribuídos
+        self.in_flight = {}
+        self.dispatched_at = {}
+        self.counts = {}
+        self.keep_workers = keep_workers
+        self.closed = False
+        self.stopping = False
+        self._stop_deadline = None
+
+    @property
+    def capacity(self) -> int:
+        """Itens que podem estar em andamento ao mesmo tempo."""
+        return self.processes * self.concurrency
+
+    def start_worker(self, worker_id: int, restarts: int = 0):
+        """Sobe (ou substitui) o processo de coleta ``worker_id``."""
+        process = self.mp.Process(
+            target=worker_main,
+            args=(worker_id, self.jobs, self.results, self.concurrency, self.timeout,
+                  self.heartbeat, self.processes),
+            name=f"bdd-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        now = time.monotonic()
+        self.workers[worker_id] = WorkerHealth(worker_id, process, now, now, restarts=restarts)
+        logger.info(f"Worker {worker_id} iniciado (pid {process.pid})")
+
+    def health(self) -> Dict[int, Dict]:
+        """Situação de cada processo de coleta."""
+        now = time.monotonic()
+        return {worker_id: worker.to_dict(now) for worker_id, worker in self.workers.items()}
+
+    def request_stop(self):
+        """Inicia o desligamento gracioso (chamado pelos sinais)."""
+        if not self.stopping:
+            logger.info("Desligamento solicitado: aguardando os itens em andamento")
+            self.stopping = True
+            self._stop_deadline = time.monotonic() + self.shutdown_grace
+
+    async def run(self, merchants: Optional[List[str]] = None) -> Dict:
+        """
+        Coleta os itens vencidos até esvaziar a fila (ou até o desligamento).
+
+        Com ``keep_workers`` os processos continuam de pé ao final, à espera
+        da próxima execução; sem ele (ou após um desligamento) são encerrados.
+
+        Returns:
+            dict: Número de ofertas salvas por merchant (None se nenhuma URL
+                do merchant foi coletada com sucesso)
+        """
+        if self.closed:
+            raise RuntimeError("Supervisor encerrado")
+
+        self.counts = {}
+        for worker_id in range(self.processes):
+            if worker_id not in self.workers:
+                self.start_worker(worker_id)
+
+        # Heartbeats acumulados enquanto os processos esperavam
+        while (message := await self._next_message(timeout=0)) is not None:
+            await self._handle(message)
+
+        drained = False
+        try:
+            while True:
+                if self.stopping:
+                    await self._return_pending_jobs()
+                    if not self.in_flight or time.monotonic() >= self._stop_deadline:
+                        break
+                elif not drained:
+                    drained = await self._dispatch(merchants)
+
+                if drained and not self.in_flight:
+                    break
+
+                message = await self._next_message(timeout=0.5)
+                if message is not None:
+                    await self._handle(message)
+                await self._check_health()
+        except BaseException:
+            await self.close()
+            raise
+
+        logger.info(f"Saúde dos workers: {self.health()}")
+        if self.stopping or not self.keep_workers:
+            await self.close()
+        return self.counts
+
+    async def close(self):
+        """Encerra os processos de coleta (ver ``_shutdown``)."""
+        if not self.closed:
+            self.closed = True
+            await self._shutdown()
+
+    async def _dispatch(self, merchants) -> bool:
+        """
+        Empresta itens vencidos até completar a capacidade.
+
+        Returns:
+            bool: True se não havia mais itens vencidos
+        """
+        free = self.capacity - len(self.in_flight)
+        if free <= 0:
+            return False
+
+        items = await self.frontier.lease(self.owner, merchants, limit=free)
+        now = time.monotonic()
+        for item in items:
+            self.in_flight[item.id] = item
+            self.dispatched_at[item.id] = now
+            self.jobs.put(item)
+        return len(items) < free
+
+    async def _next_message(self, timeout: float):
+        """Lê a próxima mensagem dos processos (None se nada chegar)."""
+        loop = asyncio.get_running_loop()
+        try:
+            if timeout <= 0:
+                return self.results.get_nowait()
+            return await loop.run_in_executor(None, self.results.get, True, timeout)
+        except queue.Empty:
+            return None
+
+    async def _handle(self, message):
+        """Processa uma mensagem de um processo de coleta."""
+        kind, worker_id, *payload = message
+        worker = self.workers.get(worker_id)
+        if worker is not None:
+            worker.last_heartbeat = time.monotonic()
+
+        if kind == "heartbeat":
+            if worker is not None:
+                worker.peak_rss_mb = payload[0]["peak_rss_mb"]
+        elif kind == "started":
+            if worker is not None:
+                worker.current.add(payload[0])
+        elif kind == "result":
+            item, offers, error = payload
+            if worker is not None:
+                worker.current.discard(item.id)
+            await self._finish(item, offers, error, worker)
+        elif kind == "stopped":
+            logger.info(f"Worker {worker_id} encerrado: {payload[0]}")
+
+    async def _finish(self, item, offers, error, worker: Optional[WorkerHealth]):
+        """Salva o resultado de um item (o supervisor é o único escritor)."""
+        self.dispatched_at.pop(item.id, None)
+        if self.in_flight.pop(item.id, None) is None:
+            # Item já dado como perdido (ex: worker reiniciado por travamento)
+            return
+
+        count = None
+        if error is None:
+            try:
+                count = await scraper_main.save_item_offers(item, offers, self.frontier)
+            except Exception as e:
+                error = f"Erro ao salvar: {str(e)}"
+
+        if error is not None:
+            print(f"ERRO: {item.merchant} ({item.url}): {error}")
+            logger.error(f"Erro ao processar {item.merchant} ({item.url}): {error}")
+            await self.frontier.fail(item, error)
+
+        if worker is not None:
+            if count is None:
+                worker.jobs_failed += 1
+            else:
+                worker.jobs_done += 1
+        scraper_main.add_count(self.counts, item.merchant, count)
+
+    async def _check_health(self):
+        """
+        Substitui processos mortos ou travados e desiste de itens sem resultado.
+        """
+        now = time.monotonic()
+
+        # Um processo pode morrer entre pegar o job e avisar que começou; o
+        # item some sem dono, então há um prazo máximo para cada item
+        deadline = self.timeout + self.stall_timeout
+        for item_id, dispatched in list(self.dispatched_at.items()):
+            if now - dispatched > deadline and item_id in self.in_flight:
+                await self._finish(self.in_flight[item_id], None, "Sem resultado do worker", None)
+
+        for worker_id, worker in list(self.workers.items()):
+            if worker.abandoned:
+                continue
+            if worker.process.is_alive():
+                if now - worker.last_heartbeat > self.stall_timeout:
+                    logger.error(
+                        f"Worker {worker_id} (pid {worker.process.pid}) sem heartbeat há "
+                        f"{now - worker.last_heartbeat:.0f}s; encerrando"
+                    )
+                    worker.process.terminate()
+                    worker.process.join(5)
+                else:
+                    continue
+
+            if self.stopping and not worker.current:
+                continue
+
+            logger.error(
+                f"Worker {worker_id} (pid {worker.process.pid}) encerrado "
+                f"(código {worker.process.exitcode}); {len(worker.current)} item(ns) perdido(s)"
+            )
+            for item_id in list(worker.current):
+                item = self.in_flight.get(item_id)
+                if item is not None:
+                    await self._finish(item, None, "Worker encerrado inesperadamente", worker)
+            worker.current.clear()
+
+            if self.stopping:
+                continue
+            if worker.restarts >= WORKER_MAX_RESTARTS:
+                logger.error(f"Worker {worker_id} reiniciado {worker.restarts} vezes; desistindo dele")
+                worker.abandoned = True
+                if all(w.abandoned for w in self.workers.values()):
+                    logger.error("Nenhum worker disponível; encerrando a coleta")
+                    self.request_stop()
+                continue
+
+            self.start_worker(worker_id, restarts=worker.restarts + 1)
+            self.workers[worker_id].jobs_done = worker.jobs_done
+            self.workers[worker_id].jobs_failed = worker.jobs_failed
+
+    async def _return_pending_jobs(self):
+        """Devolve à fila os itens distribuídos que ainda não começaram."""
+        while True:
+            try:
+                item = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and self.in_flight.pop(item.id, None) is not None:
+                self.dispatched_at.pop(item.id, None)
+                await self.frontier.release(item)
+
+    async def _shutdown(self):
+        """
+        Encerra os processos e devolve à fila os itens sem resultado.
+
+        Resultados que chegam enquanto os processos terminam ainda são salvos.
+        """
+        for _ in range(self.capacity):
+            self.jobs.put(None)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and any(
+            worker.process.is_alive() for worker in self.workers.values()
+        ):
+            message = await self._next_message(timeout=0.2)
+            if message is not None:
+                await self._handle(message)
+
+        for worker in self.workers.values():
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.worker_id} não encerrou a tempo; terminando")
+                worker.process.terminate()
+            worker.process.join(5)
+
+        for item in list(self.in_flight.values()):
+            await self.frontier.release(item)
+        self.in_flight.clear()
+        self.dispatched_at.clear()
+
+        # Sobras nas filas não devem travar a saída do processo
+        for q in (self.jobs, self.results):
+            q.close()
+            q.cancel_join_thread()
+
+
+async def run_supervisor(merchant=None, processes: int = WORKER_PROCESSES,
+                         concurrency: int = WORKER_CONCURRENCY,
+                         frontier: Optional[CrawlFrontier] = None,
+                         supervisor: Optional[Supervisor] = None, **kwargs) -> Dict:
+    """
+    Coleta os merchants em vários processos (equivalente a ``scraper.main.main``).
+
+    Durante a coleta, SIGINT/SIGTERM pedem o desligamento gracioso; ao final os
+    handlers anteriores voltam e, se um sinal chegou, o handler anterior (ex: o
+    do scheduler) também é chamado.
+
+    Args:
+        merchant: Merchant (ou lista de merchants) a coletar (todos se None)
+        supervisor: Supervisor criado com ``keep_workers=True`` para reaproveitar
+            os processos entre execuções (padrão: um novo, encerrado ao final)
+
+    Returns:
+        dict: Número de ofertas salvas por merchant
+    """
+    merchants = scraper_main.merchant_list(merchant)
+    received = []
+
+    def on_signal(signum):
+        received.append(signum)
+        supervisor.request_stop()
+
+    await init_db()
+    if supervisor is None:
+        supervisor = Supervisor(processes, concurrency,
+                                frontier=frontier or CrawlFrontier(), **kwargs)
+    await scraper_main.seed_frontier(supervisor.frontier, merchants)
+
+    loop = asyncio.get_running_loop()
+    previous = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            handler = signal.getsignal(signum)
+            loop.add_signal_handler(signum, on_signal, signum)
+            previous[signum] = handler
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows ou fora da thread principal
+            pass
+
+    try:
+        counts = await supervisor.run(merchants)
+    finally:
+        for signum, handler in previous.items():
+            loop.remove_signal_handler(signum)
+            # remove_signal_handler volta ao padrão; restaura o handler anterior
+            signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+
+    for signum in received[:1]:
+        handler = previous.get(signum)
+        if callable(handler) and handler is not signal.default_int_handler:
+            handler(signum, None)
+
+    return {m: counts.get(m) for m in merchants}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coleta em vários processos")
+    parser.add_argument("merchant", nargs="?", help="Merchant a coletar (todos se omitido)")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    async def run():
+        try:
+            return await run_supervisor(args.merchant, args.processes, args.concurrency)
+        finally:
+            # As threads das conexões do pool impedem o processo de terminar
+            await close_pool()
+
+    counts = asyncio.run(run())
+    print(f"Ofertas por merchant: {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
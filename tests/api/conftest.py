@@ -64,4 +64,14 @@ def client(test_db_session): # Depende do test_db_session para garantir que o DB
     # TestClient cuida de rodar os eventos de startup/shutdown.
     
     with TestClient(fastapi_app) as c:
-        yield c 
\ No newline at end of file
+        yield c 
+
+@pytest_asyncio.fixture(autouse=True)
+async def close_db_pool():
+    # O pool de conexões de api.models mantém threads abertas; fecha ao final de cada teste
+    yield
+    import api.models as api_models_module
+    await api_models_module.close_pool()
+    # As páginas de /offers em cache são do banco deste teste
+    import api.app as api_app_module
+    api_app_module.offers_page_cache.clear()
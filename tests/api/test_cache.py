@@ -0,0 +1,109 @@
+"""
+Testes para o cache LRU/TTL da API.
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from api.cache import LRUCache
+
+
+def test_get_and_set_counts_hits_and_misses():
+    cache = LRUCache(maxsize=2)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # "a" passa a ser a mais recente, então "b" é descartada
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_invalidate_and_clear():
+    cache = LRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    cache.invalidate("inexistente")
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+def test_set_is_skipped_after_invalidation():
+    cache = LRUCache(maxsize=4)
+
+    # Leitura começa, uma escrita invalida a chave, a leitura termina
+    generation = cache.generation
+    cache.invalidate("a")
+
+    assert cache.set("a", "antigo", generation) is False
+    assert cache.get("a") is None
+    assert cache.set("a", "novo", cache.generation) is True
+    assert cache.get("a") == "novo"
+
+
+def test_tracks_bytes_and_evicts_over_maxbytes():
+    cache = LRUCache(maxsize=10, sizeof=len, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"5678")
+    assert cache.stats()["bytes"] == 8
+
+    # Não cabe junto com "a" e "b": a menos usada sai
+    cache.get("a")
+    cache.set("c", b"90")
+    cache.set("d", b"12")
+    assert cache.get("b") is None
+    assert cache.nbytes == 8
+
+    # Substituir uma chave desconta o valor anterior
+    cache.set("a", b"1")
+    assert cache.nbytes == 5
+
+    # Um valor maior que o limite não entra (e remove o antigo)
+    assert cache.set("c", b"x" * 11) is False
+    assert cache.get("c") is None
+    assert cache.nbytes == 3
+
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
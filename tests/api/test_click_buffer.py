@@ -0,0 +1,140 @@
+"""
+Testes para o buffer de cliques em lote do endpoint /go.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from api.click_buffer import ClickBuffer
+from api.models import OfferClick
+
+
+class FakeWriter:
+    """Registra os lotes recebidos em vez de gravar no banco."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, clicks):
+        if self.fail:
+            raise RuntimeError("falha simulada")
+        self.batches.append(list(clicks))
+
+
+@pytest.mark.asyncio
+async def test_flush_by_size():
+    writer = FakeWriter()
+    buffer = ClickBuffer(writer, flush_size=3, flush_interval=60)
+    buffer.start()
+
+    for _ in range(3):
+        await buffer.add(OfferClick(offer_id=1))
+
+    # O lote cheio acorda a tarefa de flush sem esperar o intervalo
+    await asyncio.sleep(0.05)
+    assert [len(batch) for batch in writer.batches] == [3]
+    assert buffer.pending == 0
+
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flush_by_interval():
+    writer = FakeWriter()
+    buffer = ClickBuffer(writer, flush_size=100, flush_interval=0.05)
+    buffer.start()
+
+    await buffer.add(OfferClick(offer_id=1))
+    assert writer.batches == []
+
+    await asyncio.sleep(0.2)
+    assert [len(batch) for batch in writer.batches] == [1]
+
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_clicks():
+    writer = FakeWriter()
+    buffer = ClickBuffer(writer, flush_size=100, flush_interval=60)
+    buffer.start()
+
+    await buffer.add(OfferClick(offer_id=1))
+    await buffer.add(OfferClick(offer_id=2))
+    await buffer.stop()
+
+    assert [click.offer_id for click in writer.batches[0]] == [1, 2]
+    assert not buffer.running
+
+
+@pytest.mark.asyncio
+async def test_add_without_start_writes_immediately():
+    writer = FakeWriter()
+    buffer = ClickBuffer(writer)
+
+    await buffer.add(OfferClick(offer_id=7))
+
+    assert [len(batch) for batch in writer.batches] == [1]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_clicks():
+    writer = FakeWriter(fail=True)
+    buffer = ClickBuffer(writer, flush_size=100, flush_interval=60)
+    buffer.start()
+
+    await buffer.add(OfferClick(offer_id=1))
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+    assert buffer.pending == 1
+
+    writer.fail = False
+    await buffer.stop()
+    assert [len(batch) for batch in writer.batches] == [1]
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_flush_in_progress():
+    class SlowWriter(FakeWriter):
+        async def __call__(self, clicks):
+            await asyncio.sleep(0.1)
+            await super().__call__(clicks)
+
+    writer = SlowWriter()
+    buffer = ClickBuffer(writer, flush_size=3, flush_interval=60)
+    buffer.start()
+
+    for i in range(3):
+        await buffer.add(OfferClick(offer_id=i))
+    # Deixa a tarefa de flush começar a gravar o lote
+    await asyncio.sleep(0.01)
+    await buffer.stop()
+
+    assert [len(batch) for batch in writer.batches] == [3]
+    assert buffer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_with_failing_writer_drops_click():
+    writer = FakeWriter(fail=True)
+    buffer = ClickBuffer(writer, flush_size=2, flush_interval=60, max_pending=2)
+    buffer.start()
+
+    await buffer.add(OfferClick(offer_id=1))
+    await buffer.add(OfferClick(offer_id=2))
+    # A fila está cheia e a gravação falha: o clique é descartado sem erro
+    await buffer.add(OfferClick(offer_id=3))
+
+    assert buffer.dropped == 1
+    assert buffer.pending == 2
+
+    writer.fail = False
+    await buffer.stop()
+    assert [click.offer_id for click in writer.batches[0]] == [1, 2]
@@ -0,0 +1,146 @@
+"""
+Testes para a exportação completa de ofertas em NDJSON.
+"""
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from fastapi.testclient import TestClient
+
+from api import app as app_module, models
+from scraper.models import Offer as ScraperOffer
+
+
+@pytest.fixture
+async def export_db(tmp_path):
+    """
+    Cria um banco de teste com o esquema e as migrações aplicadas.
+    """
+    original_get_db_path = models.get_db_path
+
+    async def mock_get_db_path():
+        return tmp_path / "export.db"
+
+    models.get_db_path = mock_get_db_path
+    models.offer_cache.clear()
+    await models.init_db()
+
+    yield await models.get_pool()
+
+    await models.close_pool()
+    models.get_db_path = original_get_db_path
+
+
+def scraped(external_id, merchant="amazon", discount_pct=10):
+    return ScraperOffer(
+        title=f"Produto {external_id}",
+        price=100.0,
+        url=f"https://example.com/{external_id}",
+        merchant=merchant,
+        external_id=external_id,
+        discount_pct=discount_pct,
+    )
+
+
+def scraped_at(external_id, timestamp, **kwargs):
+    offer = scraped(external_id, **kwargs)
+    offer.timestamp = timestamp
+    return offer
+
+
+async def set_last_changed(pool, external_id, last_changed):
+    async with pool.writer() as db:
+        await db.execute("UPDATE offers SET last_changed = ? WHERE external_id = ?",
+                         (last_changed, external_id))
+
+
+async def exported(**kwargs):
+    return [offer async for batch in models.export_offers(**kwargs) for offer in batch]
+
+
+@pytest.mark.asyncio
+async def test_export_reads_in_batches(export_db):
+    await models.upsert_offers([scraped(f"a{i}") for i in range(7)])
+
+    batches = [batch async for batch in models.export_offers(batch_size=3)]
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    keys = [(offer["last_changed"], offer["id"]) for batch in batches for offer in batch]
+    assert keys == sorted(keys)
+    assert len({offer_id for _, offer_id in keys}) == 7
+
+
+@pytest.mark.asyncio
+async def test_export_filters_and_since(export_db):
+    # Uma gravação por oferta, cada uma com o seu last_changed
+    await models.upsert_offer(scraped("a1", discount_pct=50))
+    await models.upsert_offer(scraped("a2", discount_pct=5))
+    await models.upsert_offer(scraped("m1", merchant="mercadolivre", discount_pct=30))
+
+    assert [o["external_id"] for o in await exported(merchant="amazon")] == ["a1", "a2"]
+    assert [o["external_id"] for o in await exported(min_discount=20)] == ["a1", "m1"]
+    # Sincronização incremental: só o que foi gravado depois da última linha recebida
+    first = (await exported())[0]
+    assert [o["external_id"] for o in await exported(since=first["last_changed"], batch_size=1)] == ["a2", "m1"]
+
+
+@pytest.mark.asyncio
+async def test_export_since_follows_write_order(export_db):
+    await models.upsert_offer(scraped_at("a1", "2023-06-02T10:00:00"))
+    since = (await exported())[-1]["last_changed"]
+
+    # Gravada depois, mas extraída antes: ainda entra na próxima sincronização
+    await models.upsert_offer(scraped_at("m1", "2023-06-01T10:00:00", merchant="mercadolivre"))
+
+    assert [o["external_id"] for o in await exported(since=since)] == ["m1"]
+
+
+
+@pytest.mark.asyncio
+async def test_last_changed_never_goes_back(export_db):
+    # Relógio atrasado em relação à última gravação: avança 1 ms mesmo assim
+    async with export_db.writer() as db:
+        await db.execute("UPDATE dataset_version SET changed_at = '2999-01-01T00:00:00.000'")
+
+    await models.upsert_offer(scraped("a1"))
+    await models.upsert_offer(scraped("a2"))
+
+    assert [o["last_changed"] for o in await exported()] == [
+        "2999-01-01T00:00:00.001", "2999-01-01T00:00:00.002"
+    ]
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_ndjson(export_db):
+    await models.upsert_offers([scraped(f"a{i}") for i in range(3)])
+    await set_last_changed(export_db, "a0", "2023-06-01T10:00:00.000")
+
+    client = TestClient(app_module.app)
+
+    response = client.get("/offers/export", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in response.headers
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [offer["external_id"] for offer in lines][0] == "a0"
+    assert set(lines[0]) == {
+        "id", "merchant", "external_id", "title", "url", "price", "discount_pct", "ts", "last_changed"
+    }
+
+    # Com fuso horário explícito, convertido para UTC
+    response = client.get("/offers/export", params={"since": "2023-06-01T07:00:00-03:00"},
+                          headers={"Accept-Encoding": "identity"})
+    assert {offer["external_id"] for offer in map(json.loads, response.text.splitlines())} == {"a1", "a2"}
+
+    with client.stream("GET", "/offers/export", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        body = gzip.decompress(b"".join(response.iter_raw()))
+    assert len(body.decode().splitlines()) == 3
+
+    assert client.get("/offers/export", params={"since": "ontem"}).status_code == 422
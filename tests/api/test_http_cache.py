@@ -0,0 +1,184 @@
+"""
+Testes para o cache HTTP de /offers (ETag, Last-Modified e respostas 304).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from fastapi.testclient import TestClient
+
+from api import app as app_module, models
+from scraper.models import Offer as ScraperOffer
+
+
+@pytest.fixture
+async def cache_db(tmp_path):
+    """
+    Cria um banco de teste com o esquema e as migrações aplicadas.
+    """
+    original_get_db_path = models.get_db_path
+
+    async def mock_get_db_path():
+        return tmp_path / "http_cache.db"
+
+    models.get_db_path = mock_get_db_path
+    models.offer_cache.clear()
+    models.dataset_version_cache.clear()
+    await models.init_db()
+
+    yield await models.get_pool()
+
+    await models.close_pool()
+    models.get_db_path = original_get_db_path
+
+
+def scraped(external_id, title="Produto", discount_pct=10, timestamp=None):
+    offer = ScraperOffer(
+        title=title,
+        price=100.0,
+        url=f"https://example.com/{external_id}",
+        merchant="amazon",
+        external_id=external_id,
+        discount_pct=discount_pct,
+    )
+    if timestamp:
+        offer.timestamp = timestamp
+    return offer
+
+
+@pytest.mark.asyncio
+async def test_dataset_version_follows_writes(cache_db):
+    assert await models.get_dataset_version() == (0, "")
+
+    await models.upsert_offer(scraped("a1"))
+    first = await models.get_dataset_version()
+    assert first[0] == 1 and first[1]
+
+    # Oferta inalterada não muda a versão; alterada, sim
+    await models.upsert_offer(scraped("a1"))
+    assert await models.get_dataset_version() == first
+    await models.upsert_offer(scraped("a1", title="Produto novo"))
+    assert await models.get_dataset_version() > first
+
+
+@pytest.mark.asyncio
+async def test_etag_changes_for_offers_extracted_earlier(cache_db):
+    # Um merchant que grava depois pode trazer ofertas extraídas antes
+    await models.upsert_offer(scraped("a1", timestamp="2023-06-02T10:00:00"))
+    client = TestClient(app_module.app)
+    etag = client.get("/offers").headers["etag"]
+
+    await models.upsert_offer(scraped("a2", timestamp="2023-06-01T10:00:00"))
+
+    response = client.get("/offers", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_offers_not_modified(cache_db):
+    await models.upsert_offer(scraped("a1"))
+    client = TestClient(app_module.app)
+
+    response = client.get("/offers")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    assert "stale-while-revalidate=" in response.headers["cache-control"]
+
+    response = client.get("/offers", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    assert client.get("/offers", headers={"If-None-Match": etag.lstrip("W/")}).status_code == 304
+    assert client.get("/offers", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # If-None-Match tem precedência sobre If-Modified-Since
+    assert client.get("/offers", headers={
+        "If-None-Match": 'W/"outro"', "If-Modified-Since": last_modified
+    }).status_code == 200
+    assert client.get("/offers", headers={"If-Modified-Since": "lixo"}).status_code == 200
+
+    # Uma nova coleta muda a versão
+    await models.upsert_offer(scraped("a2"))
+    response = client.get("/offers", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["data"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_not_modified_skips_the_query(cache_db, monkeypatch):
+    await models.upsert_offer(scraped("a1"))
+    client = TestClient(app_module.app)
+    etag = client.get("/offers").headers["etag"]
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("consultou as ofertas")
+
+    monkeypatch.setattr(models, "get_offers", fail)
+    monkeypatch.setattr(models, "get_pool", fail)
+
+    assert client.get("/offers", headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_offers_pages_are_cached_until_next_write(cache_db, monkeypatch):
+    await models.upsert_offers([scraped("a1", discount_pct=50), scraped("a2")])
+    app_module.offers_page_cache.clear()
+    hits = app_module.offers_page_cache.hits
+    client = TestClient(app_module.app)
+
+    calls = []
+    get_offers = models.get_offers
+
+    async def counting_get_offers(**kwargs):
+        calls.append(kwargs)
+        return await get_offers(**kwargs)
+
+    monkeypatch.setattr(models, "get_offers", counting_get_offers)
+
+    first = client.get("/offers", params={"min_discount": 20})
+    again = client.get("/offers", params={"min_discount": 20})
+    assert again.content == first.content
+    assert len(first.json()["data"]) == 1
+    assert first.headers["content-type"] == "application/json"
+    assert len(calls) == 1
+
+    # Outra combinação de filtros é outra entrada
+    client.get("/offers")
+    assert len(calls) == 2
+
+    stats = client.get("/health").json()["offers_page_cache"]
+    assert stats["size"] == 2
+    assert stats["hits"] == hits + 1
+    assert stats["bytes"] > len(first.content)
+
+    # Uma coleta descarta todas as páginas de uma vez
+    await models.upsert_offer(scraped("a3", discount_pct=60))
+    response = client.get("/offers", params={"min_discount": 20})
+    assert len(response.json()["data"]) == 2
+    assert len(calls) == 3
+    assert app_module.offers_page_cache.stats()["size"] == 1
+
+    # Cursor inválido não vai para o cache
+    assert client.get("/offers", params={"cursor": "lixo"}).status_code == 400
+    assert app_module.offers_page_cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_change_for_offers_extracted_earlier(cache_db):
+    await models.upsert_offer(scraped("a1", timestamp="2023-06-02T10:00:00"))
+    client = TestClient(app_module.app)
+    assert [offer["external_id"] for offer in client.get("/offers").json()["data"]] == ["a1"]
+
+    # ts anterior ao maior do banco: a página em cache não pode continuar valendo
+    await models.upsert_offer(scraped("a2", timestamp="2023-06-01T10:00:00"))
+
+    response = client.get("/offers")
+    assert [offer["external_id"] for offer in response.json()["data"]] == ["a1", "a2"]
@@ -6,7 +6,7 @@ import os
 import sys
 from pathlib import Path
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from pydantic import ValidationError
 
 # Adiciona o diretório parent ao path
@@ -230,6 +230,142 @@ async def test_upsert_and_get_offer(setup_test_db):
     assert offer_by_id["title"] == "Produto de Teste Atualizado"
 
 
+@pytest.mark.asyncio
+async def test_upsert_offers_batch(setup_test_db):
+    """
+    Testa a inserção/atualização de ofertas em lote.
+    """
+    offers = [
+        models.Offer(
+            merchant="amazon",
+            external_id=f"batch{i}",
+            title=f"Produto em Lote {i}",
+            url=f"https://example.com/batch{i}",
+            price=10.0 * (i + 1),
+            discount_pct=10 + i
+        )
+        for i in range(3)
+    ]
+    
+    ids = await models.upsert_offers(offers)
+    assert len(ids) == 3
+    assert len(set(ids)) == 3
+    
+    # Reenvia o lote com uma oferta alterada e uma nova
+    offers[1].price = 5.0
+    offers.append(models.Offer(
+        merchant="mercadolivre",
+        external_id="batch1",
+        title="Produto Mercado Livre",
+        url="https://example.com/ml",
+        price=99.0,
+        discount_pct=40
+    ))
+    
+    new_ids = await models.upsert_offers(offers)
+    assert new_ids[:3] == ids  # Ofertas existentes mantêm o mesmo ID
+    assert new_ids[3] not in ids
+    
+    updated = await models.get_offer_by_id(ids[1])
+    assert updated["price"] == 5.0
+    
+    all_offers = await models.get_offers()
+    assert len(all_offers) == 4
+    
+    # Lote vazio não toca no banco
+    assert await models.upsert_offers([]) == []
+
+
+@pytest.mark.asyncio
+async def test_sync_offers_skips_unchanged(setup_test_db):
+    """
+    Testa a detecção de mudanças por content_hash na gravação em lote.
+    """
+    offers = [
+        models.Offer(
+            merchant="amazon",
+            external_id=f"hash{i}",
+            title=f"Produto {i}",
+            url=f"https://example.com/hash{i}",
+            price=100.0,
+            discount_pct=10
+        )
+        for i in range(3)
+    ]
+    
+    first = await models.sync_offers(offers)
+    assert (first["new"], first["changed"], first["unchanged"]) == (3, 0, 0)
+    
+    pool = await models.get_pool()
+    
+    async def read_row(offer_id):
+        async with pool.reader() as db:
+            cursor = await db.execute(
+                "SELECT ts, last_seen, content_hash FROM offers WHERE id = ?", (offer_id,)
+            )
+            return dict(await cursor.fetchone())
+    
+    before = await read_row(first["ids"][0])
+    assert before["content_hash"]
+    assert before["last_seen"] == before["ts"]
+    
+    # Mesmo lote com uma oferta alterada: só ela é regravada
+    offers[2].price = 80.0
+    second = await models.sync_offers(offers)
+    assert second["ids"] == first["ids"]
+    assert (second["new"], second["changed"], second["unchanged"]) == (0, 1, 2)
+    
+    unchanged = await read_row(first["ids"][0])
+    assert unchanged["ts"] == before["ts"]
+    assert unchanged["content_hash"] == before["content_hash"]
+    assert unchanged["last_seen"] > before["last_seen"]
+    
+    changed = await models.get_offer_by_id(first["ids"][2])
+    assert changed["price"] == 80.0
+    assert "content_hash" not in changed
+    
+    # Sem touch, ofertas inalteradas não são gravadas
+    third = await models.sync_offers(offers, touch_unchanged=False)
+    assert third["unchanged"] == 3
+    assert (await read_row(first["ids"][0]))["last_seen"] == unchanged["last_seen"]
+
+
+@pytest.mark.asyncio
+async def test_get_offer_by_id_cache(setup_test_db):
+    """
+    Testa o cache de ofertas por ID e a sua invalidação pelos upserts.
+    """
+    offer = models.Offer(
+        merchant="amazon",
+        external_id="cache1",
+        title="Produto em Cache",
+        url="https://example.com/cache1",
+        price=50.0,
+        discount_pct=10
+    )
+    offer_id = await models.upsert_offer(offer)
+    
+    hits = models.offer_cache.hits
+    first = await models.get_offer_by_id(offer_id)
+    second = await models.get_offer_by_id(offer_id)
+    assert first == second
+    assert models.offer_cache.hits == hits + 1
+    
+    # Alterar o dict retornado não altera o cache
+    second["title"] = "Alterado"
+    assert (await models.get_offer_by_id(offer_id))["title"] == "Produto em Cache"
+    
+    # O upsert individual invalida a entrada
+    offer.price = 40.0
+    await models.upsert_offer(offer)
+    assert (await models.get_offer_by_id(offer_id))["price"] == 40.0
+    
+    # O upsert em lote também
+    offer.price = 30.0
+    await models.upsert_offers([offer])
+    assert (await models.get_offer_by_id(offer_id))["price"] == 30.0
+
+
 @pytest.mark.asyncio
 async def test_get_offers_with_filters(setup_test_db):
     """
@@ -293,6 +429,43 @@ async def test_get_offers_with_filters(setup_test_db):
     assert paged_offers[0]["id"] != limited_offers[0]["id"]  # Deve ser diferente
 
 
+@pytest.mark.asyncio
+async def test_get_offers_cursor_pagination(setup_test_db):
+    """
+    Testa a paginação por cursor (keyset) em comparação com offset.
+    """
+    offers = [
+        models.Offer(
+            merchant="amazon",
+            external_id=f"page{i}",
+            title=f"Produto {i}",
+            url=f"https://example.com/page{i}",
+            price=10.0 + i,
+            discount_pct=10
+        )
+        for i in range(5)
+    ]
+    await models.upsert_offers(offers)
+    
+    by_offset = [o["id"] for o in await models.get_offers(limit=5)]
+    
+    # Percorre as páginas seguindo o cursor da última oferta de cada página
+    by_cursor = []
+    cursor = None
+    while True:
+        page = await models.get_offers(limit=2, cursor=cursor)
+        by_cursor.extend(o["id"] for o in page)
+        if len(page) < 2:
+            break
+        cursor = models.encode_offers_cursor(page[-1])
+    
+    assert by_cursor == by_offset
+    assert len(set(by_cursor)) == 5
+    
+    with pytest.raises(ValueError):
+        await models.get_offers(cursor="nao-e-um-cursor")
+
+
 @pytest.mark.asyncio
 async def test_register_and_get_clicks(setup_test_db):
     """
@@ -331,4 +504,43 @@ async def test_register_and_get_clicks(setup_test_db):
     
     # Testa a obtenção de estatísticas gerais
     all_stats = await models.get_offer_clicks_stats()
-    assert len(all_stats) >= 1  # Deve ter pelo menos nossa oferta 
\ No newline at end of file
+    assert len(all_stats) >= 1  # Deve ter pelo menos nossa oferta 
+
+@pytest.mark.asyncio
+async def test_click_rollup_and_backfill(setup_test_db):
+    """
+    Testa o rollup horário de cliques e o seu recálculo a partir dos cliques brutos.
+    """
+    offer_id = await models.upsert_offer(models.Offer(
+        merchant="amazon",
+        external_id="rollup1",
+        title="Produto com Cliques",
+        url="https://example.com/rollup1",
+        price=10.0,
+        discount_pct=5
+    ))
+    
+    now = datetime.utcnow()
+    old = now - timedelta(days=10)
+    await models.register_offer_clicks([
+        models.OfferClick(offer_id=offer_id, ts=now),
+        models.OfferClick(offer_id=offer_id, ts=now),
+        models.OfferClick(offer_id=offer_id, ts=old),
+    ])
+    
+    # Cliques fora do período não entram nas estatísticas
+    stats = await models.get_offer_clicks_stats(offer_id=offer_id, days=1)
+    assert stats[0]["click_count"] == 2
+    stats = await models.get_offer_clicks_stats(offer_id=offer_id, days=30)
+    assert stats[0]["click_count"] == 3
+    
+    # Apaga o rollup e reconstrói a partir de offer_clicks
+    pool = await models.get_pool()
+    async with pool.writer() as db:
+        await db.execute("DELETE FROM offer_click_rollup;")
+    assert await models.get_offer_clicks_stats(offer_id=offer_id) == []
+    
+    assert await models.backfill_click_rollup() == 2
+    stats = await models.get_offer_clicks_stats()
+    assert stats[0]["offer_id"] == offer_id
+    assert stats[0]["click_count"] == 3
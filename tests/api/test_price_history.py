@@ -0,0 +1,153 @@
+"""
+Testes para o histórico de preços das ofertas.
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from fastapi.testclient import TestClient
+
+from api import app as app_module, models
+from scraper.models import Offer as ScraperOffer
+
+
+@pytest.fixture
+async def history_db(tmp_path):
+    """
+    Cria um banco de teste com o esquema e as migrações aplicadas.
+    """
+    original_get_db_path = models.get_db_path
+
+    async def mock_get_db_path():
+        return tmp_path / "history.db"
+
+    models.get_db_path = mock_get_db_path
+    models.offer_cache.clear()
+    await models.init_db()
+
+    yield await models.get_pool()
+
+    await models.close_pool()
+    models.get_db_path = original_get_db_path
+
+
+def scraped(price, discount_pct=10, days_ago=0.0, title="Fone Bluetooth"):
+    """Oferta do scraper observada há ``days_ago`` dias."""
+    offer = ScraperOffer(
+        title=title,
+        price=price,
+        url="https://example.com/fone",
+        merchant="amazon",
+        external_id="fone1",
+        discount_pct=discount_pct,
+    )
+    offer.timestamp = (datetime.utcnow() - timedelta(days=days_ago)).isoformat()
+    return offer
+
+
+async def read_points(pool, offer_id):
+    async with pool.reader() as db:
+        rows = await db.execute_fetchall(
+            "SELECT ts, price FROM offer_prices WHERE offer_id = ? ORDER BY ts", (offer_id,)
+        )
+    return [(row["ts"], row["price"]) for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_only_price_changes_are_recorded(history_db):
+    offer_id = await models.upsert_offer(scraped(100.0, days_ago=3))
+    await models.upsert_offer(scraped(100.0, days_ago=2))  # inalterada
+    await models.upsert_offer(scraped(100.0, days_ago=1.5, title="Fone Bluetooth Novo"))  # só o título
+    await models.upsert_offer(scraped(80.0, discount_pct=30, days_ago=1))
+
+    points = await read_points(history_db, offer_id)
+
+    assert [price for _, price in points] == [100.0, 80.0]
+
+
+@pytest.mark.asyncio
+async def test_history_is_downsampled(history_db):
+    # Um preço diferente a cada hora por 20 dias
+    for hour in range(20 * 24, 0, -1):
+        offer_id = await models.upsert_offer(scraped(100.0 + hour % 7, days_ago=hour / 24))
+
+    history = await models.get_price_history(offer_id, days=20, points=40)
+
+    assert len(history["points"]) <= 41
+    assert history["points"] == sorted(history["points"], key=lambda p: p["ts"])
+    assert history["lowest_price_30d"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_bucket_point_comes_from_the_lowest_price_row(history_db):
+    offer_id = await models.upsert_offer(scraped(100.0, discount_pct=40, days_ago=0.30))
+    await models.upsert_offer(scraped(80.0, discount_pct=20, days_ago=0.20))
+    await models.upsert_offer(scraped(90.0, discount_pct=30, days_ago=0.10))
+
+    # Um balde por dia: os três pontos caem no mesmo balde
+    history = await models.get_price_history(offer_id, days=1, points=1)
+
+    [point] = history["points"]
+    async with history_db.reader() as db:
+        rows = await db.execute_fetchall(
+            "SELECT ts, discount_pct FROM offer_prices WHERE offer_id = ? AND price = 80.0", (offer_id,)
+        )
+    assert (point["ts"], point["price"], point["discount_pct"]) == (rows[0]["ts"], 80.0, 20)
+
+
+@pytest.mark.asyncio
+async def test_history_includes_price_before_period(history_db):
+    offer_id = await models.upsert_offer(scraped(50.0, days_ago=60))
+    await models.upsert_offer(scraped(70.0, days_ago=5))
+
+    history = await models.get_price_history(offer_id, days=30)
+
+    # O preço de 60 dias atrás vigorava no início dos 30 dias
+    assert [p["price"] for p in history["points"]] == [50.0, 70.0]
+    assert history["lowest_price_30d"] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_daily_low_and_close(history_db):
+    # Três mudanças no mesmo dia, 60 dias atrás, e uma recente
+    offer_id = await models.upsert_offer(scraped(90.0, days_ago=60.3))
+    await models.upsert_offer(scraped(70.0, days_ago=60.2))
+    await models.upsert_offer(scraped(95.0, days_ago=60.1))
+    await models.upsert_offer(scraped(85.0, days_ago=1))
+    # Um ponto além da retenção máxima, que não é o último da oferta
+    async with history_db.writer() as db:
+        old_ts = (datetime.utcnow() - timedelta(days=400)).isoformat()
+        await db.execute(
+            "INSERT INTO offer_prices (offer_id, ts, price, discount_pct) VALUES (?, ?, 120.0, 0)",
+            (offer_id, old_ts)
+        )
+
+    removed = await models.compact_price_history(full_days=30, max_days=365)
+
+    assert removed == 2
+    prices = [price for _, price in await read_points(history_db, offer_id)]
+    assert prices == [70.0, 95.0, 85.0]
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint(history_db):
+    offer_id = await models.upsert_offer(scraped(100.0, days_ago=10))
+    await models.upsert_offer(scraped(75.0, days_ago=2))
+
+    client = TestClient(app_module.app)
+    response = client.get(f"/offers/{offer_id}/history?days=30")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["offer_id"] == offer_id
+    assert body["current_price"] == 75.0
+    assert body["lowest_price_30d"] == 75.0
+    assert [p["price"] for p in body["points"]] == [100.0, 75.0]
+
+    assert client.get("/offers/999999/history").status_code == 404
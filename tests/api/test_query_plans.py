@@ -0,0 +1,101 @@
+"""
+Testes de regressão dos planos de consulta (EXPLAIN QUERY PLAN) dos endpoints.
+
+Falham se alguma consulta usada pela API voltar a varrer a tabela inteira ou
+a ordenar resultados com uma B-tree temporária.
+"""
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from api import models
+
+CURSOR = models.encode_offers_cursor({"ts": "2023-06-01T10:00:00", "id": 42})
+SEARCH_CURSOR = models.encode_search_cursor({"rank": -1.5, "id": 42})
+
+# (nome, query, params, passos de plano permitidos mesmo sendo ordenação temporária)
+ENDPOINT_QUERIES = [
+    ("offers", *models.build_offers_query(), []),
+    ("offers_merchant", *models.build_offers_query(merchant="amazon", min_discount=20), []),
+    ("offers_cursor", *models.build_offers_query(min_discount=20, cursor=CURSOR), []),
+    ("offers_merchant_cursor", *models.build_offers_query(merchant="amazon", cursor=CURSOR), []),
+    ("offers_offset", *models.build_offers_query(limit=20, offset=100), []),
+    # Lotes da exportação completa (/offers/export), em ordem crescente
+    ("offers_export", *models.build_export_query(min_discount=20, since="2023-06-01T10:00:00"), []),
+    ("offers_export_merchant", *models.build_export_query(
+        merchant="amazon", after=("2023-06-01T10:00:00.000", 42)), []),
+    # Versão das ofertas (ETag de /offers): a linha única de dataset_version
+    ("dataset_version", models.DATASET_VERSION_QUERY, [], []),
+    ("offer_by_id", models.OFFER_BY_ID_QUERY, [1], []),
+    # Busca das ofertas do lote em sync_offers (uma por chunk do scraper)
+    ("offer_hashes", *models.build_offer_hashes_query("amazon", ["B01", "B02", "B03"]), []),
+    # A relevância (BM25) só existe depois do MATCH; ordenar por ela exige
+    # ordenação temporária, mas só sobre as ofertas encontradas
+    ("offers_search", *models.build_search_query("fone bluetooth", merchant="amazon", min_discount=20),
+     ["USE TEMP B-TREE FOR ORDER BY"]),
+    ("offers_search_cursor", *models.build_search_query("fone", cursor=SEARCH_CURSOR),
+     ["USE TEMP B-TREE FOR ORDER BY"]),
+    ("click_stats_offer", models.CLICK_STATS_OFFER_QUERY, [1, "2023-06-01T10"], []),
+    # Agrupa só os buckets do período; o ranking por número de cliques depende
+    # do agregado, então essas ordenações não têm como vir de um índice
+    ("click_stats_all", models.CLICK_STATS_ALL_QUERY, ["2023-06-01T10"],
+     ["USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY"]),
+    # Baldes de tempo calculados; a busca em si é uma faixa da chave primária
+    ("price_history", models.PRICE_HISTORY_QUERY, [1, "2023-06-01T10:00:00", "2023-06-01T10:00:00", 1.5],
+     ["USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY"]),
+    ("price_before", models.PRICE_BEFORE_QUERY, [1, "2023-06-01T10:00:00"], []),
+    ("lowest_price", models.LOWEST_PRICE_QUERY, [1, "2023-06-01T10:00:00"], []),
+]
+
+# Varredura de tabela sem índice, ex: "SCAN offers" ou "SCAN c"
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+
+@pytest.fixture
+async def plan_db(tmp_path):
+    """
+    Cria um banco de teste com o esquema e as migrações aplicadas.
+    """
+    original_get_db_path = models.get_db_path
+
+    async def mock_get_db_path():
+        return tmp_path / "plans.db"
+
+    models.get_db_path = mock_get_db_path
+    await models.init_db()
+
+    yield await models.get_pool()
+
+    models.get_db_path = original_get_db_path
+
+
+@pytest.mark.asyncio
+async def test_schema_version(plan_db):
+    async with plan_db.reader() as db:
+        cursor = await db.execute("PRAGMA user_version;")
+        version = (await cursor.fetchone())[0]
+
+    assert version == len(models.SCHEMA_MIGRATIONS)
+
+    # Rodar as migrações de novo não muda nada
+    async with plan_db.writer() as db:
+        assert await models.migrate_db(db) == version
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,query,params,allowed", ENDPOINT_QUERIES, ids=[q[0] for q in ENDPOINT_QUERIES])
+async def test_endpoint_query_plan(plan_db, name, query, params, allowed):
+    async with plan_db.reader() as db:
+        cursor = await db.execute("EXPLAIN QUERY PLAN " + query, params)
+        steps = [row[3] for row in await cursor.fetchall()]
+
+    for step in steps:
+        assert not FULL_SCAN.match(step), f"{name}: varredura completa ({steps})"
+        if "TEMP B-TREE" in step:
+            assert step in allowed, f"{name}: ordenação temporária ({steps})"
@@ -0,0 +1,156 @@
+"""
+Testes para a busca textual de ofertas (FTS5).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from fastapi.testclient import TestClient
+
+from api import app as app_module, models
+from scraper.models import Offer as ScraperOffer
+
+
+@pytest.fixture
+async def search_db(tmp_path):
+    """
+    Cria um banco de teste com o esquema e as migrações aplicadas.
+    """
+    original_get_db_path = models.get_db_path
+
+    async def mock_get_db_path():
+        return tmp_path / "search.db"
+
+    models.get_db_path = mock_get_db_path
+    models.offer_cache.clear()
+    await models.init_db()
+
+    yield await models.get_pool()
+
+    await models.close_pool()
+    models.get_db_path = original_get_db_path
+
+
+def scraped(external_id, title, merchant="amazon", discount_pct=10, price=100.0):
+    return ScraperOffer(
+        title=title,
+        price=price,
+        url=f"https://example.com/{external_id}",
+        merchant=merchant,
+        external_id=external_id,
+        discount_pct=discount_pct,
+    )
+
+
+async def titles(q, **kwargs):
+    return [offer["title"] for offer in await models.search_offers(q, **kwargs)]
+
+
+def test_build_fts_query():
+    assert models.build_fts_query("Fone  bluetooth!") == '"Fone"* "bluetooth"*'
+    # Aspas e operadores do FTS5 não vazam para a consulta
+    assert models.build_fts_query('tv" OR 1 NEAR(') == '"tv"* "OR"* "1"* "NEAR"*'
+
+    with pytest.raises(ValueError):
+        models.build_fts_query(" -*- ")
+
+
+def test_search_cursor_roundtrip():
+    cursor = models.encode_search_cursor({"rank": -2.5, "id": 7})
+
+    assert models.decode_search_cursor(cursor) == (-2.5, 7)
+
+    with pytest.raises(ValueError):
+        models.decode_search_cursor(models.encode_offers_cursor({"ts": "2023-06-01", "id": 7}))
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_accents_and_case(search_db):
+    await models.upsert_offers([
+        scraped("a1", "Açúcar Refinado União 1kg"),
+        scraped("a2", "Café Torrado e Moído 500g"),
+    ])
+
+    assert await titles("acucar") == ["Açúcar Refinado União 1kg"]
+    assert await titles("CAFÉ moido") == ["Café Torrado e Moído 500g"]
+    # Prefixos aproximam plurais e variações
+    assert await titles("torra") == ["Café Torrado e Moído 500g"]
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_filters(search_db):
+    await models.upsert_offers([
+        scraped("a1", "Cabo USB", discount_pct=50),
+        scraped("a2", "Fone Bluetooth com cabo USB", discount_pct=5),
+        scraped("m1", "Fone Bluetooth Fone de Ouvido", merchant="mercadolivre", discount_pct=30),
+    ])
+
+    # O título que repete o termo vem primeiro
+    assert (await titles("fone"))[0] == "Fone Bluetooth Fone de Ouvido"
+    # Todos os termos precisam aparecer
+    assert await titles("fone cabo") == ["Fone Bluetooth com cabo USB"]
+    assert await titles("fone", merchant="amazon") == ["Fone Bluetooth com cabo USB"]
+    assert await titles("usb", min_discount=20) == ["Cabo USB"]
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_pagination(search_db):
+    await models.upsert_offers([scraped(f"a{i}", f"Fone modelo {i}") for i in range(5)])
+
+    seen = []
+    cursor = None
+    while True:
+        page = await models.search_offers("fone", limit=2, cursor=cursor)
+        seen.extend(offer["id"] for offer in page)
+        if len(page) < 2:
+            break
+        cursor = models.encode_search_cursor(page[-1])
+
+    assert sorted(seen) == sorted(set(seen))
+    assert len(seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_index_follows_title_changes(search_db):
+    await models.upsert_offer(scraped("a1", "Notebook Antigo"))
+    await models.upsert_offer(scraped("a1", "Notebook Gamer"))
+
+    assert await titles("antigo") == []
+    assert await titles("gamer") == ["Notebook Gamer"]
+
+    async with search_db.writer() as db:
+        await db.execute("DELETE FROM offers")
+        await db.commit()
+
+    assert await titles("notebook") == []
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(search_db):
+    await models.upsert_offers([
+        scraped("a1", "Smartphone Galáxia 128GB"),
+        scraped("a2", "Capa para Smartphone"),
+    ])
+
+    client = TestClient(app_module.app)
+
+    response = client.get("/offers/search", params={"q": "galaxia", "limit": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert [offer["title"] for offer in body["data"]] == ["Smartphone Galáxia 128GB"]
+    assert body["next_cursor"]
+
+    response = client.get("/offers/search", params={"q": "smartphone", "limit": 1})
+    first = response.json()
+    response = client.get("/offers/search", params={
+        "q": "smartphone", "limit": 1, "cursor": first["next_cursor"]
+    })
+    assert response.json()["data"][0]["id"] != first["data"][0]["id"]
+
+    assert client.get("/offers/search", params={"q": "!!"}).status_code == 400
+    assert client.get("/offers/search", params={"q": "x", "cursor": "lixo"}).status_code == 400
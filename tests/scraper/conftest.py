@@ -53,4 +53,13 @@ def sample_offer_data():
             "external_id": "MLB12345678",
             "discount": 15
         }
-    } 
\ No newline at end of file
+    } 
+
+@pytest.fixture(autouse=True)
+def close_db_pool():
+    # O pool de conexões de api.models mantém threads abertas, que impedem o
+    # pytest de terminar; encerra ao final de cada teste. É síncrona porque o
+    # Playwright síncrono (get_browser) deixa um event loop rodando na thread.
+    yield
+    import api.models as api_models_module
+    api_models_module.stop_pool()
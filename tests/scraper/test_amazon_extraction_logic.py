@@ -100,4 +100,55 @@ async def test_extract_data_from_mock_amazon_html(browser_page: Page):
     assert offer3 is not None
     assert offer3.title == "Produto Sem Preço"
     assert offer3.price == 0.0
-    assert offer3.discount_pct == 0 
\ No newline at end of file
+    assert offer3.discount_pct == 0 
+
+# Saída do extrator antigo (query_selector/inner_text por elemento) para o
+# mock_amazon_page.html: o ASIN003 não tem preço e é descartado, e o ASIN002
+# só tem .a-price-whole, lido como 145.0
+LEGACY_AMAZON_OUTPUT = [
+    {
+        "external_id": "ASIN001",
+        "title": "Título do Produto 1",
+        "url": "https://www.amazon.com.br/dp/ASIN001/ref=xyz?tag=wagnermontezu-20",
+        "price": 99.90,
+        "discount_pct": 50,
+    },
+    {
+        "external_id": "ASIN002",
+        "title": "Título do Produto 2 Super Desconto",
+        "url": "https://www.amazon.com.br/dp/ASIN002/ref=abc?tag=wagnermontezu-20",
+        "price": 145.0,
+        "discount_pct": 0,
+    },
+]
+
+
+@pytest.mark.asyncio
+async def test_single_evaluate_extractor_parity(browser_page: Page):
+    from scraper.extractors import extract_amazon_offers
+
+    offers = await extract_amazon_offers(browser_page)
+
+    assert [
+        {
+            "external_id": o.external_id,
+            "title": o.title,
+            "url": o.url,
+            "price": o.price,
+            "discount_pct": o.discount_pct,
+        }
+        for o in offers
+    ] == LEGACY_AMAZON_OUTPUT
+
+
+@pytest.mark.asyncio
+async def test_wait_for_results_on_mock_page(browser_page: Page):
+    from scraper.extractors import AMAZON_SELECTORS
+    from scraper.readiness import WaitTimings, wait_for_results
+
+    result = await wait_for_results(
+        browser_page, "amazon", AMAZON_SELECTORS["product"], timings=WaitTimings()
+    )
+
+    assert result.ready
+    assert result.count == 3
@@ -0,0 +1,76 @@
+"""
+Testes para o benchmark offline dos extratores.
+"""
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper import benchmark
+
+
+def test_fixtures_are_served_locally():
+    pages = benchmark.fixture_pages("amazon")
+    assert pages == ["amazon/page1.html", "amazon/page2.html"]
+
+    with benchmark.serve_fixtures() as base_url:
+        response = httpx.get(f"{base_url}/{pages[0]}")
+
+    assert response.status_code == 200
+    assert 'data-component-type="s-search-result"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_extractors_match_baseline_offer_counts():
+    baseline = benchmark.load_baseline()
+
+    results = await benchmark.run_benchmark(list(benchmark.BENCHMARK_MERCHANTS), iterations=1)
+
+    for key, result in results.items():
+        assert result["offers_per_page"] == baseline[key]["offers_per_page"], key
+        assert result["pages_per_sec"] > 0
+        assert result["cpu_s"] >= 0
+
+
+def test_compare_results_reports_regressions():
+    base = {"amazon:http": {"offers_per_page": [55, 55], "pages_per_sec": 10.0, "offers_per_sec": 550.0}}
+
+    same = {"amazon:http": {"offers_per_page": [55, 55], "pages_per_sec": 9.0, "offers_per_sec": 495.0}}
+    assert benchmark.compare_results(same, base, tolerance=0.25) == []
+
+    # Vazão depende da máquina: sem strict, a queda só aparece como aviso
+    slower = {"amazon:http": {"offers_per_page": [55, 55], "pages_per_sec": 5.0, "offers_per_sec": 275.0}}
+    assert benchmark.compare_results(slower, base, tolerance=0.25) == []
+    assert len(benchmark.throughput_regressions(slower, base, tolerance=0.25)) == 2
+    assert len(benchmark.compare_results(slower, base, tolerance=0.25, strict=True)) == 2
+
+    broken = {"amazon:http": {"offers_per_page": [55, 0], "pages_per_sec": 10.0, "offers_per_sec": 550.0}}
+    assert "ofertas por página" in benchmark.compare_results(broken, base)[0]
+
+
+def test_report_shows_change_over_baseline():
+    base = {"amazon:http": {"pages_per_sec": 10.0, "offers_per_sec": 500.0, "cpu_s": 1.0, "peak_rss_mb": 60.0}}
+    results = {"amazon:http": {"offers_per_page": [50], "pages_per_sec": 12.0, "offers_per_sec": 600.0,
+                               "cpu_s": 0.8, "peak_rss_mb": 60.0}}
+
+    report = benchmark.format_report(results, base)
+
+    assert "pages_per_sec   12.0  (baseline 10.0, +20.0%)" in report
+    assert "cpu_s           0.8  (baseline 1.0, -20.0%)" in report
+
+
+def test_fixture_generator_reproduces_saved_pages(tmp_path):
+    from scraper import benchmark_fixtures
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmark_fixtures.generate(tmp_path)
+
+    for page in benchmark.fixture_pages("amazon") + benchmark.fixture_pages("mercadolivre"):
+        assert (tmp_path / page).read_bytes() == (benchmark.DATA_DIR / page).read_bytes(), page
@@ -0,0 +1,186 @@
+"""
+Testes para o pool de navegadores do scraper.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.browser_pool import BrowserPool, merchant_context
+
+
+class FakeContext:
+    def __init__(self, options):
+        self.options = options
+        self.closed = False
+        self._page_handlers = []
+        self.routes = []
+
+    def on(self, event, handler):
+        if event == "page":
+            self._page_handlers.append(handler)
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    async def new_page(self):
+        page = object()
+        for handler in self._page_handlers:
+            handler(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self, **options):
+        context = FakeContext(options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.stopped = False
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def fake_playwright():
+    return FakePlaywright()
+
+
+@pytest.mark.asyncio
+async def test_reuses_warm_browser(fake_playwright):
+    pool = BrowserPool(max_pages=10, playwright_factory=lambda: fake_playwright)
+
+    async with pool.context("amazon") as ctx_amazon:
+        await ctx_amazon.new_page()
+    async with pool.context("mercadolivre") as ctx_ml:
+        await ctx_ml.new_page()
+
+    # Um único navegador, mas um contexto novo (isolado) por merchant
+    assert pool.launches == 1
+    assert ctx_amazon is not ctx_ml
+    assert ctx_amazon.closed and ctx_ml.closed
+    assert ctx_amazon.options["viewport"] == {"width": 1280, "height": 800}
+
+    await pool.close()
+    assert fake_playwright.browsers[0].closed
+    assert fake_playwright.stopped
+
+
+@pytest.mark.asyncio
+async def test_recycles_after_max_pages(fake_playwright):
+    pool = BrowserPool(max_pages=2, playwright_factory=lambda: fake_playwright)
+
+    async with pool.context("amazon") as ctx:
+        await ctx.new_page()
+        await ctx.new_page()
+
+    async with pool.context("amazon") as ctx:
+        await ctx.new_page()
+
+    assert pool.launches == 2
+    assert fake_playwright.browsers[0].closed
+    assert not fake_playwright.browsers[1].closed
+
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_old_browser_waits_for_active_contexts(fake_playwright):
+    pool = BrowserPool(max_pages=1, playwright_factory=lambda: fake_playwright)
+
+    async with pool.context("amazon") as ctx_old:
+        await ctx_old.new_page()
+
+        # Um novo contexto lança outro navegador, mas o antigo segue em uso
+        async with pool.context("mercadolivre"):
+            assert pool.launches == 2
+            assert not fake_playwright.browsers[0].closed
+
+    assert fake_playwright.browsers[0].closed
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_relaunches_after_crash(fake_playwright):
+    pool = BrowserPool(playwright_factory=lambda: fake_playwright)
+
+    async with pool.context("amazon"):
+        pass
+    fake_playwright.browsers[0].connected = False
+
+    async with pool.context("amazon"):
+        pass
+
+    assert pool.launches == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_merchant_context_without_pool(monkeypatch, fake_playwright):
+    import scraper.browser_pool as browser_pool_module
+    monkeypatch.setattr(browser_pool_module, "async_playwright", lambda: fake_playwright)
+
+    async with merchant_context(None, "amazon") as ctx:
+        await ctx.new_page()
+
+    # O pool temporário é fechado ao final da coleta
+    assert fake_playwright.browsers[0].closed
+    assert fake_playwright.stopped
+
+
+@pytest.mark.asyncio
+async def test_contexts_get_merchant_blocking_profile(fake_playwright):
+    pool = BrowserPool(playwright_factory=lambda: fake_playwright)
+
+    async with pool.context("amazon") as ctx:
+        assert len(ctx.routes) == 1
+        pattern, handler = ctx.routes[0]
+        assert pattern == "**/*"
+        assert handler.__self__.profile.allowed_domains is not None
+
+    # Contadores do contexto encerrado ficam acumulados no pool
+    assert "amazon" in pool.blocking_stats
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_blocking_can_be_disabled(fake_playwright):
+    pool = BrowserPool(playwright_factory=lambda: fake_playwright, block_resources=False)
+
+    async with pool.context("amazon") as ctx:
+        assert ctx.routes == []
+
+    assert pool.blocking_stats == {}
+    await pool.close()
@@ -0,0 +1,115 @@
+"""
+Testes para a estratégia de busca HTTP primeiro, navegador como fallback.
+"""
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.fetch_strategy import FetchStrategy
+from scraper.main import scrape_amazon
+from scraper.rate_limiter import RateLimiter
+
+MOCK_AMAZON_HTML = (Path(__file__).parent / "mock_amazon_page.html").read_text(encoding="utf-8")
+
+
+def make_fetcher(handler, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    kwargs.setdefault("limiter", RateLimiter(enabled=False))
+    return FetchStrategy(client=client, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fetch_html_status_and_errors():
+    def handler(request):
+        if request.url.path == "/ok":
+            return httpx.Response(200, text="<html>ok</html>")
+        if request.url.path == "/erro":
+            raise httpx.ConnectError("sem conexão")
+        return httpx.Response(503)
+
+    fetcher = make_fetcher(handler)
+
+    assert await fetcher.fetch_html("https://example.com/ok") == "<html>ok</html>"
+    assert await fetcher.fetch_html("https://example.com/indisponivel") is None
+    assert await fetcher.fetch_html("https://example.com/erro") is None
+
+
+@pytest.mark.asyncio
+async def test_collect_prefers_http():
+    fetcher = make_fetcher(lambda request: httpx.Response(200))
+    calls = []
+
+    async def http_collect():
+        calls.append("http")
+        return ["oferta"]
+
+    async def browser_collect():
+        calls.append("browser")
+        return ["oferta do navegador"]
+
+    assert await fetcher.collect("amazon", http_collect, browser_collect) == ["oferta"]
+    assert calls == ["http"]
+    assert fetcher.stats["amazon"] == {"http": 1}
+
+
+@pytest.mark.asyncio
+async def test_collect_falls_back_to_browser():
+    fetcher = make_fetcher(lambda request: httpx.Response(200))
+
+    async def empty():
+        return []
+
+    async def broken():
+        raise RuntimeError("falhou")
+
+    async def browser_collect():
+        return ["oferta do navegador"]
+
+    assert await fetcher.collect("amazon", empty, browser_collect) == ["oferta do navegador"]
+    assert await fetcher.collect("amazon", broken, browser_collect) == ["oferta do navegador"]
+    assert await fetcher.collect("amazon", empty, empty) == []
+    assert fetcher.stats["amazon"] == {"browser": 2, "failed": 1}
+    assert fetcher.summary() == {"amazon": {"browser": 2, "failed": 1}}
+
+
+@pytest.mark.asyncio
+async def test_http_first_disabled_goes_to_browser():
+    fetcher = make_fetcher(lambda request: httpx.Response(200), http_first=False)
+
+    async def http_collect():
+        raise AssertionError("caminho HTTP não deveria ser usado")
+
+    async def browser_collect():
+        return ["oferta do navegador"]
+
+    assert await fetcher.collect("amazon", http_collect, browser_collect) == ["oferta do navegador"]
+    assert fetcher.stats["amazon"] == {"browser": 1}
+
+
+@pytest.mark.asyncio
+async def test_scrape_amazon_over_http():
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        # Só a primeira página tem resultados
+        if "page=" in str(request.url):
+            return httpx.Response(200, text="<html><body>captcha</body></html>")
+        return httpx.Response(200, text=MOCK_AMAZON_HTML)
+
+    fetcher = make_fetcher(handler)
+
+    offers = await scrape_amazon(keyword="fone bluetooth", max_pages=2, fetcher=fetcher)
+
+    assert [o.external_id for o in offers] == ["ASIN001", "ASIN002"]
+    assert requested == [
+        "https://www.amazon.com.br/s?k=fone+bluetooth",
+        "https://www.amazon.com.br/s?k=fone+bluetooth&page=2",
+    ]
+    assert fetcher.stats["amazon"] == {"http": 1}
@@ -0,0 +1,217 @@
+"""
+Testes para a fila persistente de URLs (crawl frontier).
+"""
+import datetime
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import api.models as api_models
+from scraper.frontier import STATUS_FAILED, CrawlFrontier
+
+
+@pytest.fixture
+async def frontier(tmp_path, monkeypatch):
+    """
+    Fila em um banco temporário, com as migrações aplicadas.
+    """
+    async def mock_get_db_path():
+        return tmp_path / "frontier.db"
+
+    monkeypatch.setattr(api_models, "get_db_path", mock_get_db_path)
+    await api_models.init_db()
+
+    yield CrawlFrontier(lease_seconds=60, max_attempts=2, retry_delay=30, recrawl_interval=3600,
+                        min_interval=900, max_interval=4 * 3600, budget_per_hour=0, jitter=0)
+
+    await api_models.close_pool()
+
+
+async def rows():
+    async with (await api_models.get_pool()).reader() as db:
+        return [dict(row) for row in await db.execute_fetchall(
+            "SELECT * FROM crawl_frontier ORDER BY id"
+        )]
+
+
+async def expire_leases():
+    """Simula a passagem do tempo: os leases em aberto vencem."""
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE crawl_frontier SET leased_until = '2000-01-01T00:00:00'")
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_add_deduplicates_and_keeps_highest_priority(frontier):
+    await frontier.add("amazon", "https://a/1", priority=1)
+    await frontier.add_many([("amazon", "https://a/1"), ("amazon", "https://a/2")], priority=5)
+    await frontier.add("amazon", "https://a/1", priority=0)
+
+    assert [(row["url"], row["priority"]) for row in await rows()] == [
+        ("https://a/1", 5), ("https://a/2", 5),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_and_ordered(frontier):
+    await frontier.add("amazon", "https://a/baixa", priority=0)
+    await frontier.add("amazon", "https://a/alta", priority=9)
+    await frontier.add("mercadolivre", "https://m/1", priority=5)
+    later = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    await frontier.add("amazon", "https://a/futura", priority=99, due=later)
+
+    first = await frontier.lease("w1", ["amazon"])
+    second = await frontier.lease("w2", ["amazon"])
+    third = await frontier.lease("w3", ["amazon"])
+
+    assert [item.url for item in first + second] == ["https://a/alta", "https://a/baixa"]
+    # Itens emprestados, de outro merchant ou ainda não vencidos não saem
+    assert third == []
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_resumed(frontier):
+    await frontier.add("amazon", "https://a/1")
+    [item] = await frontier.lease("processo-caido")
+    assert await frontier.lease("outro") == []
+
+    await expire_leases()
+    [resumed] = await frontier.lease("outro")
+
+    assert resumed.id == item.id
+    # O worker antigo não pode mais concluir o item
+    await frontier.complete(item)
+    assert (await rows())[0]["last_crawled"] is None
+
+    await frontier.complete(resumed)
+    row = (await rows())[0]
+    assert row["last_crawled"] is not None
+    assert row["lease_owner"] is None
+    assert await frontier.lease("outro") == []
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_give_up(frontier):
+    await frontier.add("amazon", "https://a/1")
+
+    [item] = await frontier.lease("w")
+    await frontier.fail(item, "HTTP 503")
+    row = (await rows())[0]
+    assert (row["attempts"], row["status"], row["last_error"]) == (1, "pending", "HTTP 503")
+    assert row["next_due"] > datetime.datetime.utcnow().isoformat()
+
+    # Força o vencimento e falha de novo: atinge max_attempts
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE crawl_frontier SET next_due = '2000-01-01T00:00:00'")
+        await db.commit()
+    [item] = await frontier.lease("w")
+    await frontier.fail(item, "HTTP 503")
+
+    row = (await rows())[0]
+    assert row["status"] == STATUS_FAILED
+    assert row["next_due"] > (datetime.datetime.utcnow() + datetime.timedelta(hours=23)).isoformat()
+    assert (await frontier.stats())["amazon"][STATUS_FAILED]["total"] == 1
+    assert await frontier.lease("w") == []
+
+
+@pytest.mark.asyncio
+async def test_failed_item_is_retried_after_cooloff(frontier):
+    await frontier.add("amazon", "https://a/1")
+    for _ in range(2):
+        async with (await api_models.get_pool()).writer() as db:
+            await db.execute("UPDATE crawl_frontier SET next_due = '2000-01-01T00:00:00'")
+            await db.commit()
+        [item] = await frontier.lease("w")
+        await frontier.fail(item, "captcha")
+    assert (await rows())[0]["status"] == STATUS_FAILED
+
+    # Passado o intervalo de suspensão, o item volta a ser emprestado
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE crawl_frontier SET next_due = '2000-01-01T00:00:00'")
+        await db.commit()
+    [item] = await frontier.lease("w")
+    await frontier.complete(item)
+
+    row = (await rows())[0]
+    assert (row["status"], row["attempts"], row["last_error"]) == ("pending", 0, None)
+
+
+@pytest.mark.asyncio
+async def test_next_due_counts_from_lease(frontier):
+    await frontier.add("amazon", "https://a/1")
+    [item] = await frontier.lease("w")
+    # Coleta demorada: o item é concluído bem depois do empréstimo
+    item.leased_at -= datetime.timedelta(minutes=30)
+    await frontier.complete(item)
+
+    expected = item.leased_at + datetime.timedelta(
+        seconds=frontier.recrawl_interval - frontier.due_slack
+    )
+    assert (await rows())[0]["next_due"] == expected.isoformat()
+
+
+async def complete_with(frontier, ratio):
+    """Empresta o único item vencido e o conclui com a fração de mudanças."""
+    await expire_leases()
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE crawl_frontier SET next_due = '2000-01-01T00:00:00'")
+        await db.commit()
+    [item] = await frontier.lease("w")
+    await frontier.complete(item, ratio)
+    return (await rows())[0]
+
+
+@pytest.mark.asyncio
+async def test_interval_backs_off_when_unchanged(frontier):
+    await frontier.add("amazon", "https://a/estavel")
+
+    intervals = [(await complete_with(frontier, 0.0))["refresh_interval"] for _ in range(4)]
+
+    # Dobra a cada coleta sem mudanças, até o máximo
+    assert intervals == [7200, 14400, 14400, 14400]
+    assert (await rows())[0]["change_rate"] < 0.2
+
+
+@pytest.mark.asyncio
+async def test_interval_shrinks_when_volatile(frontier):
+    await frontier.add("amazon", "https://a/relampago")
+
+    row = await complete_with(frontier, 0.5)
+    assert row["refresh_interval"] == 1800
+    row = await complete_with(frontier, 0.5)
+    assert row["refresh_interval"] == 900
+    # Nunca abaixo do mínimo
+    row = await complete_with(frontier, 1.0)
+    assert row["refresh_interval"] == 900
+    # Poucas mudanças mantêm o intervalo
+    row = await complete_with(frontier, 0.05)
+    assert row["refresh_interval"] == 900
+    assert row["change_rate"] > 0.8
+
+    leased_at = datetime.datetime.fromisoformat(row["last_crawled"])
+    assert datetime.datetime.fromisoformat(row["next_due"]) < leased_at + datetime.timedelta(seconds=900)
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_leases_and_prefers_volatile_urls(frontier):
+    frontier.budget_per_hour = 3
+    await frontier.add_many([("amazon", f"https://a/{i}") for i in range(5)])
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE crawl_frontier SET change_rate = 0.9 WHERE url = 'https://a/3'")
+        await db.execute("UPDATE crawl_frontier SET change_rate = 0.1 WHERE url = 'https://a/0'")
+        await db.commit()
+
+    first = await frontier.lease("w", limit=2)
+    second = await frontier.lease("w", limit=2)
+
+    assert first[0].url == "https://a/3"
+    # Só sobrou uma página no orçamento da hora
+    assert len(second) == 1
+    assert await frontier.lease("w") == []
+    assert await frontier.budget_used() == 3
+    assert "https://a/0" not in {item.url for item in first + second}
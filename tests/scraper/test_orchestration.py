@@ -0,0 +1,155 @@
+"""
+Testes para a coleta concorrente de merchants em scraper.main.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import api.models as api_models
+import scraper.main as scraper_main
+from scraper.frontier import CrawlFrontier
+from scraper.models import Offer
+
+
+def make_offer(merchant, i):
+    return Offer(
+        title=f"Produto {i}",
+        price=10.0,
+        url=f"https://example.com/{merchant}/{i}",
+        merchant=merchant,
+        external_id=f"{merchant}-{i}",
+        discount_pct=10,
+    )
+
+
+@pytest.fixture
+async def fake_merchants(monkeypatch, tmp_path):
+    """
+    Substitui scrapers e arquivos por versões em memória e usa um banco
+    temporário para a fila de URLs.
+    """
+    state = {"running": 0, "max_running": 0, "saved": [], "urls": []}
+
+    async def mock_get_db_path():
+        return tmp_path / "frontier.db"
+
+    monkeypatch.setattr(api_models, "get_db_path", mock_get_db_path)
+    await api_models.init_db()
+
+    def make_scraper(merchant, delay=0.05, fail=False):
+        async def scraper(url=None, browser_pool=None, fetcher=None):
+            state["urls"].append(url)
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            try:
+                await asyncio.sleep(delay)
+                if fail:
+                    raise RuntimeError(f"falha em {merchant}")
+                return [make_offer(merchant, i) for i in range(2)]
+            finally:
+                state["running"] -= 1
+        return scraper
+
+    async def fake_sync_offers(offers):
+        state["saved"].append([offer.merchant for offer in offers])
+        return {"ids": list(range(len(offers))), "new": len(offers), "changed": 0, "unchanged": 0}
+
+    monkeypatch.setattr(scraper_main, "sync_offers", fake_sync_offers)
+    monkeypatch.setattr(scraper_main, "save_offers", lambda offers, merchant, output_dir: None)
+
+    def configure(**scrapers):
+        monkeypatch.setattr(scraper_main, "MERCHANT_SCRAPERS", {
+            merchant: (make_scraper(merchant, **options), merchant)
+            for merchant, options in scrapers.items()
+        })
+        monkeypatch.setattr(scraper_main, "MERCHANT_SEED_URLS", {
+            merchant: [f"https://{merchant}.example.com/ofertas"] for merchant in scrapers
+        })
+        return state
+
+    yield configure
+
+    await api_models.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_merchants_run_concurrently(fake_merchants):
+    state = fake_merchants(a={}, b={}, c={})
+
+    counts = await scraper_main.main(browser_pool=object(), concurrency=2)
+
+    assert counts == {"a": 2, "b": 2, "c": 2}
+    assert state["max_running"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_one_is_sequential(fake_merchants):
+    state = fake_merchants(a={}, b={})
+
+    await scraper_main.main(browser_pool=object(), concurrency=1)
+
+    assert state["max_running"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_and_timeouts_are_isolated(fake_merchants):
+    state = fake_merchants(ok={}, broken={"fail": True}, slow={"delay": 5})
+
+    counts = await scraper_main.main(browser_pool=object(), concurrency=3, timeout=0.5)
+
+    assert counts == {"ok": 2, "broken": None, "slow": None}
+    assert state["saved"] == [["ok", "ok"]]
+
+
+@pytest.mark.asyncio
+async def test_results_saved_as_each_merchant_finishes(fake_merchants):
+    state = fake_merchants(slow={"delay": 0.3}, fast={"delay": 0.01})
+
+    task = asyncio.create_task(scraper_main.main(browser_pool=object(), concurrency=2))
+    await asyncio.sleep(0.15)
+
+    # O merchant rápido já foi salvo enquanto o lento ainda coleta
+    assert state["saved"] == [["fast", "fast"]]
+
+    await task
+    assert state["saved"][-1] == ["slow", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_workers_drain_the_frontier(fake_merchants):
+    state = fake_merchants(a={"delay": 0.01})
+    frontier = CrawlFrontier()
+    await frontier.add_many([("a", f"https://a.example.com/c/{i}") for i in range(4)])
+    await frontier.add("a", "https://a.example.com/urgente", priority=10)
+
+    counts = await scraper_main.main(browser_pool=object(), concurrency=1, frontier=frontier)
+
+    # Semente + 5 URLs cadastradas, a mais prioritária primeiro
+    assert counts == {"a": 12}
+    assert state["urls"][0] == "https://a.example.com/urgente"
+    assert len(set(state["urls"])) == 6
+
+    # Tudo coletado: a próxima execução não tem item vencido
+    state["urls"].clear()
+    assert await scraper_main.main(browser_pool=object(), frontier=frontier) == {"a": None}
+    assert state["urls"] == []
+
+
+@pytest.mark.asyncio
+async def test_failed_urls_are_retried_later(fake_merchants):
+    fake_merchants(broken={"fail": True})
+    frontier = CrawlFrontier()
+
+    await scraper_main.main(browser_pool=object(), frontier=frontier)
+
+    stats = await frontier.stats()
+    assert stats["broken"]["pending"]["total"] == 1
+    async with (await api_models.get_pool()).reader() as db:
+        rows = await db.execute_fetchall("SELECT attempts, last_error FROM crawl_frontier")
+    assert (rows[0]["attempts"], rows[0]["last_error"]) == (1, "falha em broken")
@@ -0,0 +1,189 @@
+"""
+Testes para o limite de requisições por host.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.fetch_strategy import FetchStrategy
+from scraper.rate_limiter import (
+    RATE_COOLDOWN, RateLimiter, host_key, is_captcha_page, limited_goto, parse_retry_after
+)
+
+URL = "https://www.example.com/s?k=fone"
+
+
+class FakeClock:
+    """Relógio manual: dormir só avança o tempo."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def make_limiter(rate=1.0, burst=2, max_in_flight=2):
+    clock = FakeClock()
+    limiter = RateLimiter(enabled=True, rate=rate, burst=burst, max_in_flight=max_in_flight,
+                          host_limits={}, clock=clock, sleep=clock.sleep)
+    return limiter, clock
+
+
+async def request_times(limiter, clock, count, url=URL):
+    times = []
+    for _ in range(count):
+        async with limiter.slot(url):
+            times.append(clock.now)
+    return times
+
+
+def test_host_key_and_helpers():
+    assert host_key("https://www.Amazon.com.br/s?k=tv") == "amazon.com.br"
+    assert host_key("https://lista.mercadolivre.com.br/x") == "lista.mercadolivre.com.br"
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
+    assert is_captcha_page('<form action="/errors/validateCaptcha">')
+    assert not is_captcha_page("<html><body>Resultados</body></html>")
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_burst_then_rate():
+    limiter, clock = make_limiter(rate=0.5, burst=2)
+
+    times = await request_times(limiter, clock, 4)
+
+    # Rajada de 2 sem espera, depois uma requisição a cada 2 s
+    assert times == pytest.approx([0.0, 0.0, 2.0, 4.0])
+    assert limiter.summary()["example.com"]["requests"] == 4
+
+
+@pytest.mark.asyncio
+async def test_hosts_are_independent():
+    limiter, clock = make_limiter(rate=0.5, burst=1)
+
+    await request_times(limiter, clock, 1)
+    times = await request_times(limiter, clock, 1, url="https://outro.com/")
+
+    assert times == [0.0]
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight_per_host():
+    limiter, _ = make_limiter(rate=1000, burst=1000, max_in_flight=2)
+    running = 0
+    peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with limiter.slot(URL):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*[request() for _ in range(6)])
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_throttling_slows_down_and_recovers():
+    limiter, clock = make_limiter(rate=1.0, burst=1)
+    bucket = limiter.bucket(URL)
+
+    limiter.report(URL, status=429)
+
+    assert bucket.slowdown == 2
+    assert bucket.cooldown_until == pytest.approx(RATE_COOLDOWN * 2)
+    times = await request_times(limiter, clock, 1)
+    assert times[0] == pytest.approx(RATE_COOLDOWN * 2)
+
+    # Retry-After maior que a pausa calculada prevalece
+    limiter.report(URL, status=503, retry_after=120)
+    assert bucket.cooldown_until == pytest.approx(clock.now + 120)
+
+    for _ in range(10):
+        limiter.report(URL, status=200)
+    assert bucket.slowdown == 1
+    assert limiter.summary()["example.com"]["throttled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_does_not_wait():
+    clock = FakeClock()
+    limiter = RateLimiter(enabled=False, rate=0.1, burst=1, clock=clock, sleep=clock.sleep)
+
+    limiter.report(URL, status=429)
+    times = await request_times(limiter, clock, 5)
+
+    assert times == [0.0] * 5
+    assert limiter.summary() == {}
+
+
+@pytest.mark.asyncio
+async def test_fetch_strategy_reports_to_limiter():
+    def handler(request):
+        if request.url.path == "/captcha":
+            return httpx.Response(200, text='<form action="/errors/validateCaptcha"></form>')
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    limiter, clock = make_limiter(rate=1.0, burst=5)
+    fetcher = FetchStrategy(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                            limiter=limiter)
+
+    assert await fetcher.fetch_html("https://example.com/lento") is None
+    assert await fetcher.fetch_html("https://example.com/captcha") is None
+
+    stats = limiter.summary()["example.com"]
+    assert stats["throttled"] == 1
+    assert stats["captchas"] == 1
+    # A segunda requisição esperou o Retry-After da primeira
+    assert clock.now >= 30
+
+
+@pytest.mark.asyncio
+async def test_limited_goto_reports_response():
+    class FakeResponse:
+        status = 503
+
+    class FakePage:
+        async def goto(self, url, **kwargs):
+            self.url = url
+            return FakeResponse()
+
+        async def query_selector(self, selector):
+            return None
+
+    limiter, _ = make_limiter()
+
+    await limited_goto(FakePage(), URL, limiter=limiter, wait_until="domcontentloaded")
+
+    assert limiter.bucket(URL).slowdown == 2
+
+
+@pytest.mark.asyncio
+async def test_share_divides_limits_between_processes():
+    limiter, clock = make_limiter(rate=1.0, burst=4, max_in_flight=2)
+    limiter.host_limits = {"example.com": (2.0, 6)}
+
+    limiter.share(2)
+
+    bucket = limiter.bucket(URL)
+    assert (bucket.rate, bucket.burst, bucket.max_in_flight) == (1.0, 3, 1)
+    assert limiter.bucket("https://outro.com/").rate == 0.5
+    # Rajada de 3 e depois uma requisição por segundo neste processo
+    times = await request_times(limiter, clock, 4)
+    assert times == pytest.approx([0.0, 0.0, 0.0, 1.0])
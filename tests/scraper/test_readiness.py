@@ -0,0 +1,123 @@
+"""
+Testes para as esperas por prontidão das páginas de resultados.
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.readiness import WaitTimings, click_and_wait_navigation, wait_for_results
+
+
+class FakeHandle:
+    def __init__(self, value):
+        self.value = value
+
+    async def json_value(self):
+        return self.value
+
+
+class FakePage:
+    def __init__(self, count=None, delay=0.0, navigates=True):
+        self.count = count
+        self.delay = delay
+        self.navigates = navigates
+        self.calls = []
+        self.clicked = False
+
+    async def wait_for_function(self, expression, arg=None, polling=None, timeout=None):
+        self.calls.append({"arg": arg, "polling": polling, "timeout": timeout})
+        await asyncio.sleep(self.delay)
+        if self.count is None:
+            raise PlaywrightTimeoutError("Timeout")
+        return FakeHandle(self.count)
+
+    @asynccontextmanager
+    async def expect_navigation(self, wait_until=None, timeout=None):
+        yield
+        if not self.navigates:
+            raise PlaywrightTimeoutError("Timeout")
+
+
+class FakeElement:
+    def __init__(self, page):
+        self.page = page
+
+    async def click(self):
+        self.page.clicked = True
+
+
+@pytest.mark.asyncio
+async def test_ready_page_records_saved_time():
+    page = FakePage(count=24, delay=0.05)
+    timings = WaitTimings()
+
+    result = await wait_for_results(
+        page, "amazon", [".resultado"], fixed_wait_ms=2000, timeout_ms=5000, timings=timings
+    )
+
+    assert result.ready
+    assert result.count == 24
+    assert 50 <= result.elapsed_ms < 2000
+    assert page.calls[0]["timeout"] == 5000
+    assert page.calls[0]["arg"]["selectors"] == [".resultado"]
+
+    summary = timings.summary()["amazon"]
+    assert summary["waits"] == 1
+    assert summary["timeouts"] == 0
+    assert summary["saved_ms"] == pytest.approx(2000 - result.elapsed_ms)
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_bounded_and_recorded():
+    timings = WaitTimings()
+
+    result = await wait_for_results(FakePage(count=None), "mercadolivre", [".item"], timings=timings)
+
+    assert not result.ready
+    assert result.count == 0
+    assert timings.summary()["mercadolivre"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_each_wait_gets_its_own_token():
+    page = FakePage(count=1)
+    timings = WaitTimings()
+
+    await wait_for_results(page, "amazon", [".a"], timings=timings)
+    await wait_for_results(page, "amazon", [".a"], timings=timings)
+
+    assert page.calls[0]["arg"]["token"] != page.calls[1]["arg"]["token"]
+    assert timings.summary()["amazon"]["waits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_click_and_wait_navigation():
+    page = FakePage()
+    assert await click_and_wait_navigation(page, FakeElement(page))
+    assert page.clicked
+
+    page = FakePage(navigates=False)
+    assert not await click_and_wait_navigation(page, FakeElement(page))
+
+
+def test_summary_since_reports_only_new_waits():
+    timings = WaitTimings()
+    timings.record("amazon", "busca", 100, 3000, True)
+    timings.record("mercadolivre", "busca", 5000, 3000, False)
+    before = timings.summary()
+
+    timings.record("amazon", "busca", 200, 3000, False)
+
+    assert timings.summary(since=before) == {"amazon": {
+        "waits": 1, "timeouts": 1, "elapsed_ms": 200, "fixed_wait_ms": 3000, "saved_ms": 2800,
+    }}
+    # Os totais do processo continuam disponíveis
+    assert timings.summary()["amazon"]["waits"] == 2
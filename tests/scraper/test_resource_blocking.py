@@ -0,0 +1,93 @@
+"""
+Testes para o perfil de bloqueio de recursos dos contextos do Playwright.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+from scraper.resource_blocking import (
+    BlockingProfile, BlockingStats, ResourceBlocker, domain_matches
+)
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.result = None
+
+    async def continue_(self):
+        self.result = "continue"
+
+    async def abort(self, error_code=None):
+        self.result = "abort"
+
+
+def test_domain_matches_subdomains():
+    assert domain_matches("www.amazon.com.br", ["amazon.com.br"])
+    assert domain_matches("amazon.com.br", ["amazon.com.br"])
+    assert not domain_matches("notamazon.com.br", ["amazon.com.br"])
+
+
+@pytest.mark.parametrize("url,resource_type,reason", [
+    ("https://www.amazon.com.br/s?k=ofertas", "document", None),
+    ("https://www.amazon.com.br/api/busca", "xhr", None),
+    ("https://m.media-amazon.com/style.css", "stylesheet", None),
+    ("https://m.media-amazon.com/foto.jpg", "image", "type"),
+    ("https://m.media-amazon.com/fonte.woff2", "font", "type"),
+    ("https://www.googletagmanager.com/gtm.js", "script", "blocked_domain"),
+    ("https://cdn.exemplo.com/widget.js", "script", "third_party"),
+    ("data:image/png;base64,xyz", "fetch", None),
+])
+def test_amazon_profile(url, resource_type, reason):
+    profile = BlockingProfile.for_merchant("amazon")
+
+    assert profile.block_reason(url, resource_type) == reason
+
+
+def test_merchant_without_allowlist_keeps_third_party():
+    profile = BlockingProfile.for_merchant("desconhecido")
+
+    assert profile.block_reason("https://cdn.exemplo.com/widget.js", "script") is None
+    assert profile.block_reason("https://cdn.exemplo.com/foto.png", "image") == "type"
+
+
+@pytest.mark.asyncio
+async def test_blocker_counts_requests():
+    blocker = ResourceBlocker(BlockingProfile.for_merchant("mercadolivre"))
+    routes = [
+        FakeRoute("https://lista.mercadolivre.com.br/ofertas", "document"),
+        FakeRoute("https://http2.mlstatic.com/foto.webp", "image"),
+        FakeRoute("https://www.google-analytics.com/collect", "xhr"),
+    ]
+
+    for route in routes:
+        await blocker.handle(route)
+
+    assert [r.result for r in routes] == ["continue", "abort", "abort"]
+    stats = blocker.stats
+    assert stats.allowed_requests == 1
+    assert stats.blocked_requests == 2
+    assert stats.blocked_bytes > 0
+    assert stats.blocked_by_type == {"image": 1, "xhr": 1}
+    assert stats.blocked_by_reason == {"type": 1, "blocked_domain": 1}
+
+
+def test_stats_merge():
+    total = BlockingStats()
+    total.merge(BlockingStats(allowed_requests=2, blocked_requests=1, blocked_bytes=10))
+    total.merge(BlockingStats(blocked_requests=3, blocked_bytes=5))
+
+    assert total.to_dict()["blocked_requests"] == 4
+    assert total.blocked_bytes == 15
+    assert total.allowed_requests == 2
@@ -0,0 +1,104 @@
+"""
+Testes para o registro e a exclusão mútua das execuções agendadas.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import api.models as api_models
+from scraper.run_ledger import STATUS_ABANDONED, STATUS_DONE, STATUS_FAILED, RunLedger
+
+
+@pytest.fixture
+async def ledger(tmp_path, monkeypatch):
+    """
+    Registro em um banco temporário, com as migrações aplicadas.
+    """
+    async def mock_get_db_path():
+        return tmp_path / "runs.db"
+
+    monkeypatch.setattr(api_models, "get_db_path", mock_get_db_path)
+    await api_models.init_db()
+
+    yield RunLedger(owner="teste")
+
+    await api_models.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_run_records_duration_and_offers(ledger):
+    async def collect(merchants):
+        await asyncio.sleep(0.05)
+        return {"amazon": 12, "mercadolivre": None}
+
+    counts = await ledger.run("crawl", ["amazon", "mercadolivre"], collect)
+
+    assert counts == {"amazon": 12, "mercadolivre": None}
+    runs = {row["merchant"]: row for row in await ledger.recent()}
+    assert runs["amazon"]["status"] == STATUS_DONE
+    assert runs["amazon"]["offers"] == 12
+    assert runs["amazon"]["duration_s"] >= 0.05
+    assert runs["mercadolivre"]["status"] == STATUS_FAILED
+
+
+@pytest.mark.asyncio
+async def test_overlapping_runs_of_a_merchant_are_skipped(ledger):
+    started = asyncio.Event()
+    release = asyncio.Event()
+    collected = []
+
+    async def slow_collect(merchants):
+        collected.append(merchants)
+        started.set()
+        await release.wait()
+        return {m: 1 for m in merchants}
+
+    async def quick_collect(merchants):
+        collected.append(merchants)
+        return {m: 2 for m in merchants}
+
+    first = asyncio.create_task(ledger.run("crawl", ["amazon"], slow_collect))
+    await started.wait()
+
+    # Amazon já está em execução: só o outro merchant é coletado
+    assert await ledger.run("crawl", ["amazon", "mercadolivre"], quick_collect) == {"mercadolivre": 2}
+    release.set()
+    assert await first == {"amazon": 1}
+
+    assert collected == [["amazon"], ["mercadolivre"]]
+    # Terminada a execução, o merchant fica livre de novo
+    assert await ledger.run("crawl", ["amazon"], quick_collect) == {"amazon": 2}
+
+
+@pytest.mark.asyncio
+async def test_failed_run_releases_the_lock(ledger):
+    async def broken(merchants):
+        raise RuntimeError("navegador caiu")
+
+    with pytest.raises(RuntimeError):
+        await ledger.run("crawl", ["amazon"], broken)
+
+    [run] = await ledger.recent()
+    assert (run["status"], run["error"]) == (STATUS_FAILED, "navegador caiu")
+    assert await ledger.start("crawl", "amazon") is not None
+
+
+@pytest.mark.asyncio
+async def test_stale_running_row_is_abandoned(ledger):
+    assert await ledger.start("crawl", "amazon") is not None
+    assert await ledger.start("crawl", "amazon") is None
+
+    # Processo que caiu no meio da execução: a linha envelhece
+    async with (await api_models.get_pool()).writer() as db:
+        await db.execute("UPDATE scrape_runs SET started_at = '2000-01-01T00:00:00'")
+        await db.commit()
+
+    assert await ledger.start("crawl", "amazon") is not None
+    statuses = [row["status"] for row in await ledger.recent()]
+    assert statuses == ["running", STATUS_ABANDONED]
@@ -0,0 +1,47 @@
+"""
+Testes para o agendador das coletas.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import api.models as api_models
+from scraper import scheduler as scheduler_module
+
+
+@pytest.mark.asyncio
+async def test_first_run_works_on_an_empty_database(tmp_path, monkeypatch):
+    async def mock_get_db_path():
+        return tmp_path / "novo.db"
+
+    collected = asyncio.Event()
+
+    async def fake_scraper(merchants, **kwargs):
+        collected.set()
+        return {merchant: 3 for merchant in merchants}
+
+    monkeypatch.setattr(api_models, "get_db_path", mock_get_db_path)
+    monkeypatch.setattr(scheduler_module, "run_scraper", fake_scraper)
+
+    # Banco sem tabelas: o disparo inicial precisa encontrar o esquema migrado
+    await scheduler_module.start()
+    try:
+        await asyncio.wait_for(collected.wait(), timeout=10)
+        for _ in range(100):
+            runs = await scheduler_module.ledger.recent()
+            if runs and all(run["status"] != "running" for run in runs):
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        scheduler_module.scheduler.shutdown(wait=False)
+
+    assert {run["merchant"]: (run["status"], run["offers"]) for run in runs} == {
+        merchant: ("done", 3) for merchant in scheduler_module.merchant_list()
+    }
+    await api_models.close_pool()
@@ -0,0 +1,162 @@
+"""
+Testes para o supervisor da coleta em vários processos.
+
+Os processos são criados com "fork" para herdarem os scrapers falsos
+instalados pelo monkeypatch.
+"""
+import asyncio
+import os
+import signal
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório parent ao path
+parent_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(parent_dir))
+
+import api.models as api_models
+import scraper.main as scraper_main
+from scraper.frontier import CrawlFrontier
+from scraper.models import Offer
+from scraper.supervisor import Supervisor, run_supervisor
+
+
+async def fake_scraper(url=None, browser_pool=None, fetcher=None):
+    await asyncio.sleep(0.2)
+    if url.endswith("/cai"):
+        os._exit(1)
+    if url.endswith("/erro"):
+        raise RuntimeError("página quebrada")
+    return [Offer(
+        title=f"Produto de {os.getpid()}",
+        price=10.0,
+        url=url,
+        merchant="loja",
+        external_id=url,
+        discount_pct=10,
+    )]
+
+
+@pytest.fixture
+async def supervised(monkeypatch, tmp_path):
+    """
+    Banco temporário e um merchant falso ("loja") sem URLs iniciais.
+    """
+    async def mock_get_db_path():
+        return tmp_path / "supervisor.db"
+
+    monkeypatch.setattr(api_models, "get_db_path", mock_get_db_path)
+    monkeypatch.setattr(scraper_main, "MERCHANT_SCRAPERS", {"loja": (fake_scraper, "Loja")})
+    monkeypatch.setattr(scraper_main, "MERCHANT_SEED_URLS", {})
+    monkeypatch.setattr(scraper_main, "save_offers", lambda offers, merchant, output_dir: None)
+    await api_models.init_db()
+
+    yield CrawlFrontier()
+
+    await api_models.close_pool()
+
+
+async def offer_titles():
+    async with (await api_models.get_pool()).reader() as db:
+        rows = await db.execute_fetchall("SELECT title FROM offers")
+    return [row["title"] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_items_are_spread_across_processes(supervised):
+    await supervised.add_many([("loja", f"https://loja.example.com/{i}") for i in range(6)])
+
+    counts = await run_supervisor(
+        "loja", processes=2, frontier=supervised, start_method="fork", heartbeat=0.1
+    )
+
+    assert counts == {"loja": 6}
+    titles = await offer_titles()
+    assert len(titles) == 6
+    # As ofertas vieram de dois processos diferentes, nenhum deles o supervisor
+    pids = {title.rsplit(" ", 1)[1] for title in titles}
+    assert len(pids) == 2
+    assert str(os.getpid()) not in pids
+
+
+@pytest.mark.asyncio
+async def test_crashed_worker_is_replaced(supervised):
+    await supervised.add_many([
+        ("loja", "https://loja.example.com/cai"),
+        ("loja", "https://loja.example.com/erro"),
+        ("loja", "https://loja.example.com/1"),
+        ("loja", "https://loja.example.com/2"),
+    ])
+    supervisor = Supervisor(processes=1, frontier=supervised, start_method="fork",
+                            heartbeat=0.1, timeout=5)
+
+    counts = await supervisor.run(["loja"])
+
+    assert counts == {"loja": 2}
+    health = supervisor.health()[0]
+    assert health["restarts"] == 1
+    assert health["jobs_done"] == 2
+    assert health["jobs_failed"] == 2
+    assert not health["alive"]
+
+    async with (await api_models.get_pool()).reader() as db:
+        rows = await db.execute_fetchall(
+            "SELECT url, attempts, last_error FROM crawl_frontier WHERE attempts > 0 ORDER BY url"
+        )
+    assert [(row["url"].rsplit("/", 1)[1], row["last_error"]) for row in rows] == [
+        ("cai", "Worker encerrado inesperadamente"),
+        ("erro", "página quebrada"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stop_returns_unstarted_items(supervised):
+    await supervised.add_many([("loja", f"https://loja.example.com/{i}") for i in range(3)])
+    supervisor = Supervisor(processes=1, frontier=supervised, start_method="fork",
+                            heartbeat=0.1, shutdown_grace=5)
+
+    async def stop_soon():
+        await asyncio.sleep(0.1)
+        supervisor.request_stop()
+
+    asyncio.get_running_loop().create_task(stop_soon())
+    counts = await supervisor.run(["loja"])
+
+    # Só o item que já estava em andamento terminou
+    assert counts == {"loja": 1}
+    assert len(await supervised.lease("outro", limit=10)) == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_are_kept_between_runs(supervised):
+    supervisor = Supervisor(processes=1, frontier=supervised, start_method="fork",
+                            heartbeat=0.1, keep_workers=True)
+    try:
+        await supervised.add("loja", "https://loja.example.com/1")
+        assert await run_supervisor("loja", supervisor=supervisor) == {"loja": 1}
+        pid = supervisor.workers[0].process.pid
+        assert supervisor.workers[0].process.is_alive()
+
+        await supervised.add("loja", "https://loja.example.com/2")
+        assert await run_supervisor("loja", supervisor=supervisor) == {"loja": 1}
+        assert supervisor.workers[0].process.pid == pid
+    finally:
+        await supervisor.close()
+
+    assert not supervisor.workers[0].process.is_alive()
+
+
+@pytest.mark.asyncio
+async def test_previous_signal_handlers_are_restored(supervised):
+    def previous_handler(signum, frame):
+        pass
+
+    original = signal.signal(signal.SIGTERM, previous_handler)
+    try:
+        await run_supervisor("loja", processes=1, frontier=supervised, start_method="fork",
+                             heartbeat=0.1)
+        assert signal.getsignal(signal.SIGTERM) is previous_handler
+    finally:
+        signal.signal(signal.SIGTERM, original)